@@ -0,0 +1,249 @@
+"""Lightweight agent that streams this host's samples to remote dashboards.
+
+    python agent.py --host 0.0.0.0 --port 9400
+
+The stream is not authenticated, so the agent listens on the loopback
+interface unless ``--host`` names an address other machines can reach.
+
+Every frame is a 5-byte header (type, payload length) and a payload.
+Metric samples are fixed-size structs broadcast to every client. Process
+tables go only to clients that subscribed to them: a full keyframe on
+subscribe, then deltas holding just the rows that changed and the PIDs
+that exited.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import queue
+import struct
+import sys
+import zlib
+from collections import namedtuple
+
+import psutil
+
+from collector import MetricsCollector, MetricSample, ProcessSample, ProcessRow
+
+DEFAULT_PORT = 9400
+
+FRAME_HEADER = struct.Struct('<BI')
+MAX_PAYLOAD = 16 << 20
+
+HELLO = 1
+METRICS = 2
+PROCESS_KEYFRAME = 3
+PROCESS_DELTA = 4
+SUBSCRIBE = 5
+
+# timestamp, cpu %, memory %/used/total, disk %/used/total, net up/down KB/s
+METRICS_FRAME = struct.Struct('<dffQQfQQff')
+
+HostInfo = namedtuple('HostInfo', ['hostname', 'system', 'logical_cores', 'physical_cores'])
+
+# Memory and disk usage as received from an agent.
+Usage = namedtuple('Usage', ['percent', 'used', 'total'])
+
+
+def frame(kind, payload):
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+async def read_frame(reader):
+    kind, length = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+    if length > MAX_PAYLOAD:
+        raise ValueError(f"frame of {length} bytes is too large")
+    return kind, await reader.readexactly(length)
+
+
+def encode_hello():
+    return json.dumps({
+        'hostname': platform.node() or 'localhost',
+        'system': f"{platform.system()} {platform.release()}",
+        'logical_cores': psutil.cpu_count(logical=True),
+        'physical_cores': psutil.cpu_count(logical=False),
+    }).encode()
+
+
+def decode_hello(payload):
+    info = json.loads(payload)
+    return HostInfo(*(info.get(field) for field in HostInfo._fields))
+
+
+def encode_metrics(sample):
+    return METRICS_FRAME.pack(sample.timestamp, sample.cpu_percent,
+                              sample.mem.percent, sample.mem.used, sample.mem.total,
+                              sample.disk.percent, sample.disk.used, sample.disk.total,
+                              sample.net_up, sample.net_down)
+
+
+def decode_metrics(payload):
+    (ts, cpu, mem_percent, mem_used, mem_total,
+     disk_percent, disk_used, disk_total, net_up, net_down) = METRICS_FRAME.unpack(payload)
+    return MetricSample(ts, cpu, Usage(mem_percent, mem_used, mem_total),
+                        Usage(disk_percent, disk_used, disk_total), net_up, net_down)
+
+
+def encode_rows(timestamp, rows, removed=()):
+    columns = zip(*rows) if rows else ([] for _ in ProcessRow._fields)
+    payload = {
+        'ts': timestamp,
+        'removed': list(removed),
+        'columns': dict(zip(ProcessRow._fields, map(list, columns))),
+    }
+    return zlib.compress(json.dumps(payload, separators=(',', ':')).encode(), 1)
+
+
+def decode_rows(payload):
+    """Return ``(timestamp, rows, removed pids)`` from a process frame."""
+    data = json.loads(zlib.decompress(payload))
+    columns = data['columns']
+    rows = list(map(ProcessRow, *(columns[field] for field in ProcessRow._fields
+                                  if field in columns)))
+    return data['ts'], rows, data['removed']
+
+
+class ProcessTable:
+    """The latest process table by PID, on either end of the delta stream."""
+
+    def __init__(self):
+        self.rows = {}
+        self.timestamp = None
+
+    def delta(self, sample):
+        """Replace the table with ``sample``; return (changed rows, removed pids)."""
+        rows = {row.pid: row for row in sample.rows}
+        previous = self.rows
+        changed = [row for pid, row in rows.items() if previous.get(pid) != row]
+        removed = [pid for pid in previous if pid not in rows]
+        self.rows = rows
+        self.timestamp = sample.timestamp
+        return changed, removed
+
+    def apply(self, timestamp, changed, removed, reset=False):
+        if reset:
+            self.rows = {}
+        for pid in removed:
+            self.rows.pop(pid, None)
+        for row in changed:
+            self.rows[row.pid] = row
+        self.timestamp = timestamp
+        return ProcessSample(timestamp, tuple(self.rows.values()))
+
+
+class Agent:
+    """Serves one collector's samples to any number of dashboards.
+
+    Each sample is encoded once and the same bytes are written to every
+    client. A client whose unsent data grows past ``max_buffer`` is
+    disconnected; it resynchronizes from a keyframe when it reconnects.
+    """
+
+    def __init__(self, collector, host='127.0.0.1', port=DEFAULT_PORT, max_buffer=1 << 20):
+        self.collector = collector
+        self.host = host
+        self.port = port
+        self.max_buffer = max_buffer
+        self.clients = {}
+        self.table = ProcessTable()
+        self.hello = frame(HELLO, encode_hello())
+
+    async def serve(self):
+        server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.collector.start()
+        pump = asyncio.create_task(self.pump())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            pump.cancel()
+            self.collector.stop()
+
+    async def handle(self, reader, writer):
+        self.clients[writer] = False
+        writer.write(self.hello)
+        try:
+            while True:
+                kind, payload = await read_frame(reader)
+                if kind != SUBSCRIBE:
+                    continue
+                subscribed = payload == b'\x01'
+                if subscribed and not self.clients.get(writer) and self.table.timestamp is not None:
+                    writer.write(frame(PROCESS_KEYFRAME,
+                                       encode_rows(self.table.timestamp,
+                                                   list(self.table.rows.values()))))
+                self.clients[writer] = subscribed
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    async def pump(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            for sample in await loop.run_in_executor(None, self.next_samples):
+                self.broadcast(sample)
+
+    def next_samples(self):
+        try:
+            sample = self.collector.samples.get(timeout=1.0)
+        except queue.Empty:
+            return []
+        return [sample] + self.collector.drain()
+
+    def broadcast(self, sample):
+        if isinstance(sample, MetricSample):
+            targets = list(self.clients)
+            data = frame(METRICS, encode_metrics(sample))
+        elif isinstance(sample, ProcessSample):
+            # The table is kept current even with no subscribers, so a new
+            # subscriber's keyframe is never stale.
+            changed, removed = self.table.delta(sample)
+            targets = [writer for writer, subscribed in self.clients.items() if subscribed]
+            if not targets:
+                return
+            data = frame(PROCESS_DELTA, encode_rows(sample.timestamp, changed, removed))
+        else:
+            print(f"agent: sampling failed: {sample}", file=sys.stderr)
+            return
+
+        for writer in targets:
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.clients.pop(writer, None)
+                writer.close()
+                continue
+            writer.write(data)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1',
+                        help="address to listen on; use 0.0.0.0 to accept remote "
+                             "dashboards (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="seconds between metric samples (default: 1.0)")
+    parser.add_argument('--process-interval', type=float, default=2.0,
+                        help="seconds between process scans (default: 2.0)")
+    parser.add_argument('--source', choices=('psutil', 'procfs'), default='psutil',
+                        help="process data source (default: psutil)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    collector = MetricsCollector(
+        interval=args.interval,
+        process_interval=args.process_interval,
+        process_source=args.source
+    )
+    try:
+        asyncio.run(Agent(collector, args.host, args.port).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
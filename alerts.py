@@ -0,0 +1,538 @@
+"""Threshold and rate-of-change alerts evaluated as samples arrive.
+
+Rules are plain dicts, typically loaded from a JSON file::
+
+    {
+        "hook": "notify-send \"$ALERT_RULE\" \"$ALERT_MESSAGE\"",
+        "rules": [
+            {"name": "CPU busy", "metric": "cpu", "aggregate": "avg",
+             "window": 30, "op": ">", "threshold": 90},
+            {"name": "RSS growth", "scope": "process", "metric": "rss",
+             "aggregate": "delta", "window": 300, "op": ">", "threshold": 524288000}
+        ]
+    }
+
+``aggregate`` is one of last, avg, min, max, delta (newest minus oldest
+value in the window) or rate (delta per second). Process rules apply to
+every process, or to those whose name matches the ``match`` glob, each
+with its own window.
+
+Rules are evaluated by an AlertWorker on a thread of its own; the UI
+only receives the alerts that start and stop.
+"""
+import fnmatch
+import json
+import operator
+import os
+import queue
+import re
+import subprocess
+import threading
+from collections import deque, namedtuple
+from operator import attrgetter
+
+SYSTEM_METRICS = {
+    'cpu': attrgetter('cpu_percent'),
+    'memory': lambda sample: sample.mem.percent,
+    'disk': lambda sample: sample.disk.percent,
+    'net_up': attrgetter('net_up'),
+    'net_down': attrgetter('net_down'),
+}
+
+# rss is derived from memory_percent and the host's total memory.
+PROCESS_METRICS = ('cpu_percent', 'memory_percent', 'rss', 'disk', 'network')
+
+AGGREGATES = ('last', 'avg', 'min', 'max', 'delta', 'rate')
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+# Per-process rules keep state for every process they apply to, so none
+# are on by default; add them to alerts.json (see the RSS growth example
+# above).
+DEFAULT_RULES = (
+    {'name': "CPU busy", 'metric': 'cpu', 'aggregate': 'avg', 'window': 30,
+     'op': '>', 'threshold': 90},
+    {'name': "Memory high", 'metric': 'memory', 'aggregate': 'min', 'window': 60,
+     'op': '>', 'threshold': 90},
+)
+
+AlertEvent = namedtuple('AlertEvent', ['timestamp', 'state', 'rule', 'subject', 'value'])
+
+
+class SlidingWindow:
+    """Aggregates of the samples from the last ``span`` seconds.
+
+    Each sample is appended and evicted once; the running sum and the
+    monotonic min/max deques are only kept when ``aggregate`` needs them
+    (all of them by default), so every aggregate costs O(1) amortized per
+    sample however long the window is.
+    """
+
+    __slots__ = ('span', 'samples', 'mins', 'maxs', 'total', 'started', 'seq')
+
+    def __init__(self, span, aggregate=None):
+        self.span = span
+        self.samples = deque()
+        self.mins = deque() if aggregate in (None, 'min') else None
+        self.maxs = deque() if aggregate in (None, 'max') else None
+        self.total = 0.0
+        self.started = None
+        self.seq = 0
+
+    def add(self, timestamp, value):
+        if self.started is None:
+            self.started = timestamp
+        seq = self.seq
+        self.seq += 1
+        samples = self.samples
+        samples.append((seq, timestamp, value))
+        self.total += value
+
+        mins = self.mins
+        if mins is not None:
+            while mins and mins[-1][1] >= value:
+                mins.pop()
+            mins.append((seq, value))
+        maxs = self.maxs
+        if maxs is not None:
+            while maxs and maxs[-1][1] <= value:
+                maxs.pop()
+            maxs.append((seq, value))
+
+        cutoff = timestamp - self.span
+        while samples[0][1] < cutoff:
+            old_seq, _, old_value = samples.popleft()
+            self.total -= old_value
+            if mins is not None and mins[0][0] == old_seq:
+                mins.popleft()
+            if maxs is not None and maxs[0][0] == old_seq:
+                maxs.popleft()
+
+    @property
+    def full(self):
+        """Whether samples have been seen for at least the whole span."""
+        return self.samples[-1][1] - self.started >= self.span
+
+    def aggregate(self, name):
+        samples = self.samples
+        if name == 'last':
+            return samples[-1][2]
+        if name == 'avg':
+            return self.total / len(samples)
+        if name == 'min':
+            return self.mins[0][1]
+        if name == 'max':
+            return self.maxs[0][1]
+        delta = samples[-1][2] - samples[0][2]
+        if name == 'delta':
+            return delta
+        elapsed = samples[-1][1] - samples[0][1]
+        return delta / elapsed if elapsed > 0 else 0.0
+
+
+class BucketWindow:
+    """Aggregates over the last ``span`` seconds in a fixed number of buckets.
+
+    Per-process windows use this instead of SlidingWindow, which keeps
+    every raw sample. Samples are folded into buckets ``span / slots``
+    seconds wide, so a window never holds more than ``slots + 1`` of
+    them. A bucket is evicted once its newest sample is older than the
+    span: min, max, avg and the oldest value for delta and rate may reach
+    back up to one bucket further than ``span``.
+    """
+
+    __slots__ = ('span', 'step', 'buckets', 'total', 'count', 'started', 'last')
+
+    def __init__(self, span, slots=4):
+        self.span = span
+        self.step = span / slots
+        # [start time, newest time, first value, sum, count, min, max]
+        self.buckets = deque()
+        self.total = 0.0
+        self.count = 0
+        self.started = None
+        self.last = None
+
+    def add(self, timestamp, value):
+        if self.started is None:
+            self.started = timestamp
+        self.last = value
+        buckets = self.buckets
+        if buckets and timestamp - buckets[-1][0] < self.step:
+            bucket = buckets[-1]
+            bucket[1] = timestamp
+            bucket[3] += value
+            bucket[4] += 1
+            if value < bucket[5]:
+                bucket[5] = value
+            elif value > bucket[6]:
+                bucket[6] = value
+        else:
+            buckets.append([timestamp, timestamp, value, value, 1, value, value])
+        self.total += value
+        self.count += 1
+
+        cutoff = timestamp - self.span
+        while buckets[0][1] < cutoff:
+            bucket = buckets.popleft()
+            self.total -= bucket[3]
+            self.count -= bucket[4]
+
+    @property
+    def full(self):
+        return self.buckets[-1][1] - self.started >= self.span
+
+    def aggregate(self, name):
+        buckets = self.buckets
+        if name == 'last':
+            return self.last
+        if name == 'avg':
+            return self.total / self.count
+        if name == 'min':
+            return min(bucket[5] for bucket in buckets)
+        if name == 'max':
+            return max(bucket[6] for bucket in buckets)
+        delta = self.last - buckets[0][2]
+        if name == 'delta':
+            return delta
+        elapsed = buckets[-1][1] - buckets[0][0]
+        return delta / elapsed if elapsed > 0 else 0.0
+
+
+class Rule:
+    def __init__(self, name, metric, op, threshold, aggregate='last', window=0,
+                 scope='system', match=None):
+        if scope not in ('system', 'process'):
+            raise ValueError(f"{name}: scope must be 'system' or 'process'")
+        metrics = SYSTEM_METRICS if scope == 'system' else PROCESS_METRICS
+        if metric not in metrics:
+            raise ValueError(f"{name}: unknown {scope} metric {metric!r}")
+        if aggregate not in AGGREGATES:
+            raise ValueError(f"{name}: unknown aggregate {aggregate!r}")
+        if op not in OPERATORS:
+            raise ValueError(f"{name}: unknown operator {op!r}")
+        self.name = name
+        self.metric = metric
+        self.op = op
+        self.compare = OPERATORS[op]
+        self.threshold = float(threshold)
+        self.aggregate = aggregate
+        self.window = float(window)
+        self.scope = scope
+        self.match = match
+        self._match = re.compile(fnmatch.translate(match)).match if match is not None else None
+
+    @classmethod
+    def from_dict(cls, spec):
+        try:
+            return cls(**spec)
+        except TypeError as e:
+            raise ValueError(f"{spec.get('name', spec)}: {e}") from None
+
+    @property
+    def is_pattern(self):
+        return self.match is not None and any(c in self.match for c in '*?[')
+
+    def matches(self, process_name):
+        return self._match is None or self._match(process_name) is not None
+
+    def describe(self):
+        window = f" over {self.window:g}s" if self.window else ""
+        return f"{self.metric} {self.aggregate}{window} {self.op} {self.threshold:g}"
+
+
+def load_rules(path):
+    """Return ``(rules, hook command)`` from a JSON rules file.
+
+    Rule names must be unique: alerts are tracked by name.
+    """
+    with open(path) as f:
+        config = json.load(f)
+    if isinstance(config, list):
+        config = {'rules': config}
+    rules = [Rule.from_dict(spec) for spec in config.get('rules', [])]
+    names = set()
+    for rule in rules:
+        if rule.name in names:
+            raise ValueError(f"{rule.name}: duplicate rule name")
+        names.add(rule.name)
+    return rules, config.get('hook')
+
+
+class AlertEngine:
+    """Evaluates rules incrementally and reports state changes.
+
+    ``observe_metrics`` and ``observe_processes`` feed one sample into
+    every rule's window and return an AlertEvent for each alert that
+    started ('firing') or stopped ('resolved'); ``active`` maps
+    ``(rule name, subject)`` to the event that started each alert. A
+    rule with a window is not evaluated until it has seen a full window.
+
+    Process rules are indexed by their ``match``: a row is only checked
+    against the rules without one, the rule for its exact name and the
+    glob rules that match it, and which rules apply to a name is cached
+    for up to ``name_cache_size`` names. Windowed process rules keep a
+    BucketWindow per process, dropped when the process exits.
+    """
+
+    def __init__(self, rules, name_cache_size=4096):
+        self.system_rules = [rule for rule in rules if rule.scope == 'system']
+        self.process_rules = [rule for rule in rules if rule.scope == 'process']
+        self._system_windows = [SlidingWindow(rule.window, rule.aggregate)
+                                for rule in self.system_rules]
+        self._any = []
+        self._by_name = {}
+        self._globs = []
+        for index, rule in enumerate(self.process_rules):
+            if rule.match is None:
+                self._any.append(index)
+            elif rule.is_pattern:
+                self._globs.append(index)
+            else:
+                self._by_name.setdefault(rule.match, []).append(index)
+        self._candidates = {}
+        self.name_cache_size = name_cache_size
+        # pid -> (name, {rule index: BucketWindow}) for the processes that
+        # windowed rules apply to.
+        self._subjects = {}
+        self.active = {}
+
+    def _evaluate(self, rule, window, subject, timestamp, events):
+        value = window.aggregate(rule.aggregate)
+        firing = (not rule.window or window.full) and rule.compare(value, rule.threshold)
+        self._transition(rule, subject, firing, value, timestamp, events)
+
+    def _transition(self, rule, subject, firing, value, timestamp, events):
+        key = (rule.name, subject)
+        if firing:
+            if key not in self.active:
+                event = AlertEvent(timestamp, 'firing', rule, subject, value)
+                self.active[key] = event
+                events.append(event)
+        elif key in self.active:
+            del self.active[key]
+            events.append(AlertEvent(timestamp, 'resolved', rule, subject, value))
+
+    def candidates(self, process_name):
+        """Return the process rules that apply to ``process_name``.
+
+        Each is an ``(index, rule, getter, is_rss)`` tuple.
+        """
+        found = self._candidates.get(process_name)
+        if found is None:
+            indices = self._any + self._by_name.get(process_name, [])
+            indices += [index for index in self._globs
+                        if self.process_rules[index].matches(process_name)]
+            found = []
+            for index in sorted(indices):
+                rule = self.process_rules[index]
+                is_rss = rule.metric == 'rss'
+                found.append((index, rule,
+                              attrgetter('memory_percent' if is_rss else rule.metric), is_rss))
+            found = tuple(found)
+            if len(self._candidates) >= self.name_cache_size:
+                self._candidates.clear()
+            self._candidates[process_name] = found
+        return found
+
+    def observe_metrics(self, sample):
+        events = []
+        ts = sample.timestamp
+        for rule, window in zip(self.system_rules, self._system_windows):
+            window.add(ts, SYSTEM_METRICS[rule.metric](sample))
+            self._evaluate(rule, window, 'system', ts, events)
+        return events
+
+    def observe_processes(self, sample, total_memory):
+        events = []
+        if not self.process_rules:
+            return events
+        ts = sample.timestamp
+        rss_scale = total_memory / 100
+        active = self.active
+        subjects = self._subjects
+        candidates = self.candidates
+        seen = set()
+        for row in sample.rows:
+            name = row.name
+            rules = candidates(name)
+            if not rules:
+                continue
+            pid = row.pid
+            seen.add(pid)
+            subject = (pid, name)
+            state = subjects.get(pid)
+            if state is not None and state[0] != name:
+                # The pid was reused or the process exec'd: start over.
+                self._forget(pid, ts, events)
+                state = None
+            for index, rule, get, is_rss in rules:
+                value = get(row) * rss_scale if is_rss else get(row)
+                if not rule.window:
+                    # Instantaneous rules need no window.
+                    firing = rule.compare(value, rule.threshold)
+                else:
+                    if state is None:
+                        state = subjects[pid] = (name, {})
+                    window = state[1].get(index)
+                    if window is None:
+                        window = state[1][index] = BucketWindow(rule.window)
+                    window.add(ts, value)
+                    value = window.aggregate(rule.aggregate)
+                    firing = window.full and rule.compare(value, rule.threshold)
+                # Only touch the alert table on a state change.
+                if firing != ((rule.name, subject) in active):
+                    if state is None:
+                        # Remember the process so its alert resolves when it exits.
+                        state = subjects[pid] = (name, {})
+                    self._transition(rule, subject, firing, value, ts, events)
+
+        # Exited processes: drop their windows and resolve their alerts.
+        for pid in subjects.keys() - seen:
+            self._forget(pid, ts, events)
+        return events
+
+    def _forget(self, pid, timestamp, events):
+        name, _ = self._subjects.pop(pid)
+        subject = (pid, name)
+        for _, rule, _, _ in self.candidates(name):
+            event = self.active.pop((rule.name, subject), None)
+            if event is not None:
+                events.append(AlertEvent(timestamp, 'resolved', rule, subject, event.value))
+
+
+class AlertWorker:
+    """Runs an AlertEngine on a background thread.
+
+    ``submit`` never blocks the caller: if the worker falls behind by more
+    than ``maxsize`` samples, new ones are dropped and counted in
+    ``dropped``. ``drain`` returns what the worker has produced since the
+    last call: a list of AlertEvents per sample that changed anything, or
+    the exception a sample raised.
+    """
+
+    def __init__(self, engine, maxsize=16):
+        self.engine = engine
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.results = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name='alert-engine', daemon=True)
+        self._thread.start()
+
+    def submit(self, sample, total_memory=None):
+        """Queue a MetricSample, or a ProcessSample with the host's total memory."""
+        try:
+            self._queue.put_nowait((sample, total_memory))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            sample, total_memory = item
+            try:
+                if total_memory is None:
+                    events = self.engine.observe_metrics(sample)
+                else:
+                    events = self.engine.observe_processes(sample, total_memory)
+            except Exception as e:
+                self.results.put(e)
+                continue
+            if events:
+                self.results.put(events)
+
+    def drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self.results.get_nowait())
+            except queue.Empty:
+                return items
+
+    def close(self, timeout=2.0):
+        # Never block the caller: if the queue is full, drop the oldest
+        # pending sample to make room for the stop marker.
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self._thread.join(timeout)
+
+
+def format_subject(subject):
+    if subject == 'system':
+        return "System"
+    pid, name = subject
+    return f"{name} ({pid})"
+
+
+def format_value(rule, value):
+    if rule.metric == 'rss':
+        return f"{value / 1024**2:.1f} MB"
+    return f"{value:.1f}"
+
+
+class AlertHook:
+    """Runs a shell command for each batch of alert events, off-thread.
+
+    The events are passed as JSON lines on stdin; the first event is also
+    in ALERT_STATE, ALERT_RULE, ALERT_SUBJECT, ALERT_VALUE and
+    ALERT_MESSAGE for simple one-line hooks. Batches queue up behind a
+    slow hook rather than spawning a process per alert.
+    """
+
+    def __init__(self, command, timeout=30.0):
+        self.command = command
+        self.timeout = timeout
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='alert-hook', daemon=True)
+        self._thread.start()
+
+    def notify(self, events):
+        if events:
+            self._queue.put(list(events))
+
+    def close(self):
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            events = self._queue.get()
+            if events is None:
+                return
+            payload = "".join(json.dumps({
+                'timestamp': event.timestamp,
+                'state': event.state,
+                'rule': event.rule.name,
+                'condition': event.rule.describe(),
+                'subject': format_subject(event.subject),
+                'value': event.value,
+            }) + "\n" for event in events)
+            first = events[0]
+            env = dict(os.environ,
+                       ALERT_STATE=first.state,
+                       ALERT_RULE=first.rule.name,
+                       ALERT_SUBJECT=format_subject(first.subject),
+                       ALERT_VALUE=format_value(first.rule, first.value),
+                       ALERT_MESSAGE=f"{format_subject(first.subject)}: {first.rule.describe()} "
+                                     f"({format_value(first.rule, first.value)})",
+                       ALERT_COUNT=str(len(events)))
+            try:
+                subprocess.run(self.command, shell=True, input=payload.encode(), env=env,
+                               timeout=self.timeout, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+            except (OSError, subprocess.SubprocessError):
+                pass
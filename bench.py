@@ -0,0 +1,379 @@
+"""Benchmarks for the dashboard's tick, refresh and render paths.
+
+    python bench.py -o results.json
+    python bench.py --baseline results.json --threshold 0.25
+
+Builds the real dashboard against a synthetic collector serving process
+tables of each requested size and times update_data, update_process_list,
+sort_processes and update_perf_graphs, including the Tk idle work they
+queue. Reports latency percentiles, Tk calls per call and Python
+allocations per call. Needs a display; without $DISPLAY an Xvfb server is
+started for the run. With --baseline, any path whose p50 latency or Tk
+call count grew by more than --threshold fails the run.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import types
+
+import numpy as np
+import psutil
+
+import finalos
+from agent import Usage
+from collector import MetricSample, ProcessSample, ProcessRow, CORE_FIELDS
+from tsstore import MetricStore
+
+DEFAULT_SIZES = (1000, 10000, 50000)
+SORT_COLUMNS = ('cpu', 'memory', 'name', 'pid')
+COUNTED_TK_METHODS = {'call', 'eval', 'setvar', 'getvar', 'globalsetvar', 'globalgetvar'}
+
+
+class SyntheticProcessTable:
+    """A process table of ``size`` rows that changes a little every step.
+
+    Each step about ``churn`` of the processes exit and are replaced by
+    new PIDs and five times as many change their CPU usage, which is
+    roughly what a busy host looks like between two refreshes.
+    """
+
+    STATUSES = ('running', 'sleeping', 'sleeping', 'sleeping', 'idle', 'disk-sleep')
+
+    def __init__(self, size, churn=0.02, seed=0):
+        self.random = random.Random(seed)
+        self.churn = churn
+        self.next_pid = 1
+        self.rows = [self.new_row() for _ in range(size)]
+
+    def new_row(self):
+        r = self.random
+        pid = self.next_pid
+        self.next_pid += 1
+        return ProcessRow(pid, f"proc-{pid % 997}", r.choice(self.STATUSES),
+                          r.expovariate(1.0), r.expovariate(5.0),
+                          r.choice((0.0, 0.0, r.expovariate(1e-5))),
+                          r.choice((0.0, 0.0, 0.0, r.expovariate(1e-4))),
+                          r.uniform(0, 10000))
+
+    def step(self):
+        r = self.random
+        rows = self.rows
+        replaced = max(1, int(len(rows) * self.churn))
+        for i in r.sample(range(len(rows)), replaced):
+            rows[i] = self.new_row()
+        for i in r.sample(range(len(rows)), min(len(rows), replaced * 5)):
+            row = rows[i]
+            cpu = r.expovariate(0.2)
+            rows[i] = row._replace(cpu_percent=cpu, cpu_time=row.cpu_time + cpu / 100)
+        return tuple(rows)
+
+
+class SyntheticCollector:
+    """Stands in for MetricsCollector; ``tick`` queues one refresh."""
+
+    def __init__(self, table, cores):
+        self.table = table
+        self.cores = cores
+        self.ready = threading.Event()
+        self.ready.set()
+        self.samples = []
+        memory = psutil.virtual_memory()
+        self.mem = Usage(memory.percent, memory.used, memory.total)
+        self.disk = Usage(50.0, 250 << 30, 500 << 30)
+        self.tick()
+
+    def tick(self, processes=True):
+        r = np.random.default_rng(len(self.samples))
+        cores = r.uniform(0, 100, (self.cores, len(CORE_FIELDS))).astype('f4')
+        self.samples.append(MetricSample(time.time(), float(cores[:, 0].mean()), self.mem,
+                                         self.disk, r.uniform(0, 500), r.uniform(0, 5000),
+                                         cores))
+        if processes:
+            self.samples.append(ProcessSample(time.time(), self.table.step()))
+
+    def start(self):
+        pass
+
+    def stop(self, timeout=1.0):
+        pass
+
+    def wait_ready(self, timeout=None):
+        return True
+
+    def set_intervals(self, interval=None, process_interval=None):
+        pass
+
+    def drain(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+
+class TkCallCounter:
+    """Wraps a Tcl interpreter and counts the commands sent to it."""
+
+    def __init__(self, interp):
+        self._interp = interp
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attr = getattr(self._interp, name)
+        if name not in COUNTED_TK_METHODS:
+            return attr
+
+        def counted(*args):
+            self.calls += 1
+            return attr(*args)
+        return counted
+
+
+def raise_error(title, message, **options):
+    raise RuntimeError(f"{title}: {message}")
+
+
+def start_virtual_display():
+    if shutil.which('Xvfb') is None:
+        sys.exit("No $DISPLAY and Xvfb is not installed; install it or run under xvfb-run.")
+    number = next(n for n in range(99, 200) if not os.path.exists(f'/tmp/.X{n}-lock'))
+    server = subprocess.Popen(['Xvfb', f':{number}', '-screen', '0', '1600x1200x24',
+                               '-nolisten', 'tcp'],
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 10
+    while not os.path.exists(f'/tmp/.X11-unix/X{number}'):
+        if server.poll() is not None or time.monotonic() > deadline:
+            sys.exit("Xvfb failed to start.")
+        time.sleep(0.05)
+    os.environ['DISPLAY'] = f':{number}'
+    return server
+
+
+class Bench:
+    """One dashboard instance built for a synthetic table of ``size`` rows."""
+
+    def __init__(self, size, cores, store_dir, timeout=30.0):
+        self.size = size
+        self.collector = SyntheticCollector(SyntheticProcessTable(size), cores)
+        finalos.MetricsCollector = lambda *args, **kwargs: self.collector
+        finalos.probe_hardware = lambda: {
+            'logical_cores': cores, 'physical_cores': cores, 'process_count': size,
+        }
+        finalos.MetricStore = lambda directory, readonly=False: MetricStore(store_dir, readonly)
+        # A failing update must fail the run rather than open a dialog.
+        finalos.messagebox = types.SimpleNamespace(showerror=raise_error,
+                                                   showinfo=raise_error)
+
+        self.root = finalos.tk.Tk()
+        self.counter = TkCallCounter(self.root.tk)
+        self.root.tk = self.counter
+        self.root.geometry('1400x900')
+        self.app = finalos.TaskManagerStyleMonitor(self.root)
+
+        deadline = time.monotonic() + timeout
+        while not getattr(self.app, 'perf_cards', None) or not self.root.winfo_viewable():
+            if time.monotonic() > deadline:
+                raise RuntimeError("dashboard did not finish starting")
+            self.root.update()
+        self.app.running = False  # keep update_data's own timer from firing
+        self.root.update()
+
+    def close(self):
+        self.app.on_close()
+
+    def select(self, tab):
+        self.app.notebook.select(tab)
+        self.root.update()
+
+    def measure(self, setup, call, iterations, alloc_iterations):
+        """Time ``call`` (after an untimed ``setup``) with its Tk idle work."""
+        root = self.root
+        latencies = []
+        tk_calls = []
+        for _ in range(iterations):
+            setup()
+            calls = self.counter.calls
+            start = time.perf_counter()
+            call()
+            root.update_idletasks()
+            latencies.append(time.perf_counter() - start)
+            tk_calls.append(self.counter.calls - calls)
+
+        peaks = []
+        retained = []
+        tracemalloc.start()
+        for _ in range(alloc_iterations):
+            setup()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            call()
+            root.update_idletasks()
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+        tracemalloc.stop()
+
+        ms = np.array(latencies) * 1000
+        return {
+            'iterations': iterations,
+            'p50_ms': round(float(np.percentile(ms, 50)), 3),
+            'p90_ms': round(float(np.percentile(ms, 90)), 3),
+            'p99_ms': round(float(np.percentile(ms, 99)), 3),
+            'max_ms': round(float(ms.max()), 3),
+            'tk_calls': round(float(np.mean(tk_calls)), 1),
+            'alloc_peak_kb': round(float(np.mean(peaks)) / 1024, 1),
+            'alloc_retained_kb': round(float(np.mean(retained)) / 1024, 1),
+        }
+
+    def run(self, iterations, alloc_iterations):
+        app = self.app
+        collector = self.collector
+        runs = alloc_iterations + iterations
+        results = {}
+
+        def setup_tick():
+            app.running = True
+            collector.tick()
+
+        def update_data():
+            app.update_data()
+            app.running = False
+
+        self.select(app.process_tab)
+        results['update_data'] = self.measure(
+            setup_tick, update_data, iterations, alloc_iterations)
+
+        pending = []
+
+        def setup_rows():
+            pending[:] = [collector.table.step()]
+
+        def update_process_list():
+            app.update_process_list(pending[0])
+            app.renderer.flush()
+
+        results['update_process_list'] = self.measure(
+            setup_rows, update_process_list, iterations, alloc_iterations)
+
+        columns = iter(SORT_COLUMNS * runs)
+        results['sort_processes'] = self.measure(
+            lambda: None, lambda: app.sort_processes(next(columns)),
+            iterations, alloc_iterations)
+
+        def setup_metrics():
+            collector.tick(processes=False)
+            for sample in collector.drain():
+                app.record_metrics(sample)
+
+        self.select(app.perf_tab)
+        results['update_perf_graphs'] = self.measure(
+            setup_metrics, app.update_perf_graphs, iterations, alloc_iterations)
+        return results
+
+
+def run_benchmarks(sizes, iterations, cores):
+    alloc_iterations = max(iterations // 5, 1)
+    results = {}
+    with tempfile.TemporaryDirectory() as store_dir:
+        for size in sizes:
+            bench = Bench(size, cores, store_dir)
+            try:
+                for path, stats in bench.run(iterations, alloc_iterations).items():
+                    results[f"{path}/{size}"] = stats
+            finally:
+                bench.close()
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Lines describing every result that regressed beyond ``threshold``."""
+    regressions = []
+    for key, stats in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'tk_calls'):
+            old, new = base[metric], stats[metric]
+            if old > 0 and new > old * (1 + threshold):
+                regressions.append(f"{key}: {metric} {old} -> {new} "
+                                   f"(+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_table(results, stream=None):
+    stream = sys.stdout if stream is None else stream
+    header = f"{'path/size':32} {'p50':>9} {'p90':>9} {'p99':>9} {'tk calls':>9} {'alloc KB':>9}"
+    print(header, file=stream)
+    print('-' * len(header), file=stream)
+    for key, stats in results.items():
+        print(f"{key:32} {stats['p50_ms']:9.2f} {stats['p90_ms']:9.2f} {stats['p99_ms']:9.2f} "
+              f"{stats['tk_calls']:9.1f} {stats['alloc_peak_kb']:9.1f}", file=stream)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated process table sizes (default: 1000,10000,50000)")
+    parser.add_argument('--iterations', type=int, default=50,
+                        help="timed calls per path and size (default: 50)")
+    parser.add_argument('--cores', type=int, default=psutil.cpu_count(logical=True) or 1,
+                        help="logical CPUs in the synthetic per-core data (default: this host's)")
+    parser.add_argument('-o', '--output',
+                        help="write the results to this JSON file")
+    parser.add_argument('--baseline',
+                        help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed relative slowdown before failing (default: 0.25)")
+    parser.add_argument('--xvfb', action='store_true',
+                        help="run on a new Xvfb display even if $DISPLAY is set")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',')]
+    server = None
+    if args.xvfb or not os.environ.get('DISPLAY'):
+        server = start_virtual_display()
+    try:
+        results = run_benchmarks(sizes, args.iterations, args.cores)
+    finally:
+        if server is not None:
+            server.terminate()
+
+    print_table(results)
+    report = {
+        'meta': {
+            'timestamp': time.time(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': psutil.cpu_count(logical=True),
+            'iterations': args.iterations,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == "__main__":
+    main()
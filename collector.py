@@ -0,0 +1,648 @@
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+import psutil
+
+try:
+    import pwd
+except ImportError:
+    pwd = None
+
+# cores is a (logical CPUs, len(CORE_FIELDS)) float32 array of percentages,
+# or None when per-core data is not available. disks is a DiskStats and
+# partitions a tuple of PartitionUsage, or None.
+MetricSample = namedtuple('MetricSample', [
+    'timestamp', 'cpu_percent', 'mem', 'disk', 'net_up', 'net_down', 'cores',
+    'disks', 'partitions'
+], defaults=(None, None, None))
+
+CORE_FIELDS = ('busy', 'user', 'system', 'iowait', 'steal')
+
+# Bytes/s read and written, read and write operations/s, and the average
+# time per completed operation in milliseconds.
+DISK_FIELDS = ('read', 'write', 'read_iops', 'write_iops', 'await')
+
+# values is a (devices, len(DISK_FIELDS)) float32 array in names order.
+DiskStats = namedtuple('DiskStats', ['names', 'values'])
+
+PartitionUsage = namedtuple('PartitionUsage', [
+    'device', 'mountpoint', 'total', 'used', 'percent'
+])
+
+ProcessSample = namedtuple('ProcessSample', ['timestamp', 'rows'])
+
+ProcessRow = namedtuple('ProcessRow', [
+    'pid', 'name', 'status', 'cpu_percent', 'memory_percent', 'disk', 'network',
+    'cpu_time', 'ppid', 'user'
+], defaults=(0, ''))
+
+# Column-oriented process table returned by every process source: one
+# list per ProcessRow field, all of the same length. disk and network
+# are rates in bytes per second, cpu_time is cumulative user+system
+# seconds. ppid and user default to 0 and '' for tables recorded before
+# they existed.
+ProcessColumns = namedtuple('ProcessColumns', ProcessRow._fields)
+
+
+def empty_columns():
+    return ProcessColumns(*([] for _ in ProcessColumns._fields))
+
+
+class IORateCache:
+    """Turns cumulative per-process I/O counters into rates.
+
+    Entries are keyed by ``(pid, create_time)`` so a reused PID starts
+    fresh; every scan builds a new generation, which evicts processes
+    that exited since the previous scan.
+    """
+
+    def __init__(self):
+        self._last = {}
+        self._current = {}
+        self._now = None
+
+    def begin(self, now):
+        self._current = {}
+        self._now = now
+
+    def rates(self, key, disk_bytes, other_bytes):
+        self._current[key] = (self._now, disk_bytes, other_bytes)
+        previous = self._last.get(key)
+        if previous is None:
+            return 0.0, 0.0
+        last_time, last_disk, last_other = previous
+        elapsed = self._now - last_time
+        if elapsed <= 0:
+            return 0.0, 0.0
+        return (max(disk_bytes - last_disk, 0) / elapsed,
+                max(other_bytes - last_other, 0) / elapsed)
+
+    def end(self):
+        self._last = self._current
+        self._current = {}
+
+    def __len__(self):
+        return len(self._last)
+
+
+class SocketOwners:
+    """PIDs that currently own an inet socket, refreshed at a slow cadence.
+
+    Per-process byte counts for sockets are not exposed by the OS. The
+    ``network`` column is a process's other I/O: read/write syscall bytes
+    that did not hit storage (sockets, but also pipes and reads served
+    from the page cache), and it is only kept for processes holding a
+    socket.
+
+    ``net_connections`` walks every process's file descriptors, so it
+    runs on a thread of its own; ``pids`` returns the last completed
+    result, or None until there is one.
+    """
+
+    def __init__(self, refresh_interval=10.0):
+        self.refresh_interval = refresh_interval
+        self._pids = None
+        self._refreshed = None
+        self._thread = None
+
+    def pids(self, now):
+        if ((self._refreshed is None or now - self._refreshed >= self.refresh_interval)
+                and (self._thread is None or not self._thread.is_alive())):
+            self._refreshed = now
+            self._thread = threading.Thread(target=self._refresh, name='socket-owners',
+                                            daemon=True)
+            self._thread.start()
+        return self._pids
+
+    def _refresh(self):
+        try:
+            self._pids = {conn.pid for conn in psutil.net_connections(kind='inet')
+                          if conn.pid}
+        except (psutil.AccessDenied, OSError):
+            self._pids = None
+
+
+class PerCpuSampler:
+    """Per-core utilization with its user/system/iowait/steal split.
+
+    One ``psutil.cpu_times(percpu=True)`` call per sample; the deltas for
+    every core are turned into percentages in one array operation. Busy
+    is everything except idle and iowait, as in ``psutil.cpu_percent``.
+    """
+
+    def __init__(self):
+        fields = psutil.cpu_times(percpu=True)[0]._fields
+        self._columns = [(index, fields.index(name))
+                         for index, name in enumerate(CORE_FIELDS)
+                         if name in fields]
+        self._idle = [fields.index(name) for name in ('idle', 'iowait') if name in fields]
+        # guest time is already counted in user time on Linux.
+        self._guest = [fields.index(name) for name in ('guest', 'guest_nice') if name in fields]
+        self._last = None
+
+    def sample(self):
+        times = np.array(psutil.cpu_times(percpu=True), dtype='f8')
+        last = self._last
+        self._last = times
+        if last is None or last.shape != times.shape:
+            return None
+
+        delta = np.maximum(times - last, 0.0)
+        total = delta.sum(axis=1) - delta[:, self._guest].sum(axis=1)
+        scale = np.divide(100.0, total, out=np.zeros_like(total), where=total > 0)
+        cores = np.zeros((len(times), len(CORE_FIELDS)), dtype='f4')
+        cores[:, 0] = np.clip(100.0 - delta[:, self._idle].sum(axis=1) * scale, 0.0, 100.0)
+        cores[:, 0][total <= 0] = 0.0
+        for index, column in self._columns:
+            cores[:, index] = delta[:, column] * scale
+        return cores
+
+
+# Processes have uids on POSIX only; elsewhere the owner comes from
+# Process.username().
+HAS_UIDS = hasattr(psutil.Process, 'uids')
+
+_user_names = {}
+
+
+def user_name(uid):
+    name = _user_names.get(uid)
+    if name is None:
+        try:
+            name = pwd.getpwuid(uid).pw_name
+        except KeyError:
+            name = str(uid)
+        _user_names[uid] = name
+    return name
+
+
+def process_user(proc):
+    try:
+        return proc.username()
+    except (psutil.AccessDenied, KeyError):
+        return ''
+
+
+# Network filesystems, whose statvfs can hang for as long as the server
+# does; their capacity is not sampled.
+REMOTE_FSTYPES = frozenset({
+    '9p', 'afs', 'ceph', 'cifs', 'davfs', 'fuse.ceph', 'fuse.glusterfs', 'fuse.rclone',
+    'fuse.sshfs', 'glusterfs', 'lustre', 'ncpfs', 'nfs', 'nfs4', 'smb3', 'smbfs', 'sshfs',
+})
+
+
+def is_whole_disk(name):
+    # Linux reports partitions alongside their disks; only whole devices
+    # have an entry in /sys/block. Loop and RAM disks (zram included) are
+    # left out, and so are devices stacked on other disks (device-mapper,
+    # md RAID), whose I/O is already counted on the disks below them.
+    if not os.path.isdir('/sys/block'):
+        return True
+    if name.startswith(('loop', 'ram', 'zram')) or not os.path.exists(f'/sys/block/{name}'):
+        return False
+    try:
+        return not os.listdir(f'/sys/block/{name}/slaves')
+    except OSError:
+        return True
+
+
+def mounted_partitions():
+    """``psutil.disk_partitions()`` without loop devices and without
+    repeated mounts (bind mounts) of a device already listed."""
+    seen = set()
+    for part in psutil.disk_partitions():
+        if part.device in seen or part.device.startswith('/dev/loop'):
+            continue
+        seen.add(part.device)
+        yield part
+
+
+class DiskSampler:
+    """Per-device throughput, IOPS and average await.
+
+    One ``psutil.disk_io_counters(perdisk=True)`` call per sample, with
+    the deltas for every device computed in one array operation. Await
+    is the time spent on the operations completed in the interval over
+    their number, as iostat reports it.
+    """
+
+    def __init__(self):
+        self._whole = {}
+        self._last = None
+        self._last_time = None
+
+    def sample(self):
+        now = time.monotonic()
+        names = []
+        rows = []
+        for name, io in (psutil.disk_io_counters(perdisk=True) or {}).items():
+            whole = self._whole.get(name)
+            if whole is None:
+                whole = self._whole[name] = is_whole_disk(name)
+            if whole:
+                names.append(name)
+                rows.append((io.read_bytes, io.write_bytes, io.read_count, io.write_count,
+                             io.read_time + io.write_time))
+
+        last, last_time = self._last, self._last_time
+        self._last = dict(zip(names, rows))
+        self._last_time = now
+        if last is None or now <= last_time:
+            return None
+
+        counters = np.array(rows, dtype='f8').reshape(-1, 5)
+        # A device seen for the first time reports zero until next sample.
+        previous = np.array([last.get(name, row) for name, row in zip(names, rows)],
+                            dtype='f8').reshape(-1, 5)
+        delta = np.maximum(counters - previous, 0.0)
+        values = np.zeros((len(names), len(DISK_FIELDS)), dtype='f4')
+        values[:, :4] = delta[:, :4] / (now - last_time)
+        operations = delta[:, 2] + delta[:, 3]
+        values[:, 4] = np.divide(delta[:, 4], operations,
+                                 out=np.zeros_like(operations), where=operations > 0)
+        return DiskStats(tuple(names), values)
+
+
+class PartitionSampler:
+    """Capacity of every mounted local partition, re-read at a slow cadence.
+
+    The mounts are walked every ``refresh_interval`` seconds on a thread
+    of their own, since ``statvfs`` can block on a stale mount. That
+    thread posts its result to ``results``; ``sample`` never waits for
+    it, it picks up whatever has been posted and otherwise returns the
+    previous capacities. No new refresh starts while one is stuck.
+    """
+
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+        self.results = queue.SimpleQueue()
+        self._partitions = ()
+        self._refreshed = None
+        self._thread = None
+
+    def sample(self, now):
+        while True:
+            try:
+                self._partitions = self.results.get_nowait()
+            except queue.Empty:
+                break
+        if ((self._refreshed is None or now - self._refreshed >= self.refresh_interval)
+                and (self._thread is None or not self._thread.is_alive())):
+            self._refreshed = now
+            self._thread = threading.Thread(target=self._refresh, name='partition-sampler',
+                                            daemon=True)
+            self._thread.start()
+        return self._partitions
+
+    def _refresh(self):
+        partitions = []
+        for part in mounted_partitions():
+            if part.fstype in REMOTE_FSTYPES:
+                continue
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+            except OSError:
+                continue
+            partitions.append(PartitionUsage(part.device, part.mountpoint,
+                                             usage.total, usage.used, usage.percent))
+        self.results.put(tuple(partitions))
+
+
+def parent_and_start(proc):
+    """Return the parent PID and a start stamp, which differs between two
+    processes that had the same PID.
+
+    Call it inside ``proc.oneshot()``. On Linux both come from the
+    /proc/[pid]/stat read that oneshot already caches for cpu_times and
+    status, so they cost nothing; ``Process.ppid()`` would construct a
+    second Process to check for PID reuse, which the registry does
+    itself. Elsewhere psutil caches create_time() per object and a fresh
+    object is needed.
+    """
+    if psutil.LINUX:
+        stat = proc._proc._parse_stat_file()
+        return int(stat['ppid']), stat['create_time']
+    return proc.ppid(), psutil.Process(proc.pid).create_time()
+
+
+class ProcessEntry:
+    __slots__ = ('proc', 'key', 'start', 'user', 'cpu_time', 'sampled_at')
+
+    def __init__(self, proc, key):
+        self.proc = proc
+        self.key = key
+        # The start stamp from parent_and_start() as first seen, to detect a reused PID.
+        self.start = None
+        # Only used without uids, where the owner is looked up once.
+        self.user = None
+        self.cpu_time = None
+        self.sampled_at = None
+
+
+class ProcessRegistry:
+    """Long-lived ``psutil.Process`` objects reused across scans.
+
+    Entries are identified by ``(pid, create_time)``. A ``psutil.Process``
+    is only constructed for a PID the registry has not seen; ``verify``
+    then compares the start stamp read during each scan and replaces an
+    entry whose PID now belongs to a different process. PIDs that
+    disappear from ``psutil.pids()`` are evicted.
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def sync(self, pids):
+        live = set(pids)
+        for pid in [pid for pid in self.entries if pid not in live]:
+            del self.entries[pid]
+
+    def get(self, pid):
+        entry = self.entries.get(pid)
+        if entry is None:
+            entry = self._create(pid)
+        return entry
+
+    def _create(self, pid):
+        try:
+            proc = psutil.Process(pid)
+            key = (pid, proc.create_time())
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            self.discard(pid)
+            return None
+        entry = self.entries[pid] = ProcessEntry(proc, key)
+        return entry
+
+    def verify(self, entry, start):
+        """Return the entry for the process whose start stamp is ``start``.
+
+        The values just read through ``entry.proc`` belong to whichever
+        process has the PID now, so only the identity and the CPU state
+        need replacing when it was reused.
+        """
+        if entry.start is None:
+            entry.start = start
+        elif entry.start != start:
+            entry = self._create(entry.key[0])
+            if entry is not None:
+                entry.start = start
+        return entry
+
+    def discard(self, pid):
+        self.entries.pop(pid, None)
+
+    def sample(self, entry, cpu_time, now):
+        """Record a CPU time reading and return the interval CPU%."""
+        if entry.cpu_time is None:
+            # First sighting: report the average over the process lifetime
+            # rather than 0.0.
+            lifetime = time.time() - entry.key[1]
+            percent = cpu_time / lifetime * 100 if lifetime > 0 else 0.0
+        else:
+            elapsed = now - entry.sampled_at
+            percent = (cpu_time - entry.cpu_time) / elapsed * 100 if elapsed > 0 else 0.0
+
+        entry.cpu_time = cpu_time
+        entry.sampled_at = now
+        return percent
+
+
+class PsutilProcessSource:
+    def __init__(self):
+        self.registry = ProcessRegistry()
+        self.io_rates = IORateCache()
+        self.sockets = SocketOwners()
+
+    def scan(self):
+        now = time.monotonic()
+        socket_pids = self.sockets.pids(now)
+        memory_scale = 100.0 / psutil.virtual_memory().total
+        pids = psutil.pids()
+        self.registry.sync(pids)
+        self.io_rates.begin(now)
+        columns = empty_columns()
+
+        for pid in pids:
+            entry = self.registry.get(pid)
+            if entry is None:
+                continue
+            proc = entry.proc
+            try:
+                with proc.oneshot():
+                    # Read every scan: exec changes the name, not the PID.
+                    name = proc.name()
+                    times = proc.cpu_times()
+                    status = proc.status()
+                    ppid, start = parent_and_start(proc)
+                    rss = proc.memory_info().rss
+                    # Read every scan as well: setuid changes the owner.
+                    uid = proc.uids().effective if HAS_UIDS else None
+                    try:
+                        io = proc.io_counters()
+                    except (psutil.AccessDenied, AttributeError):
+                        io = None
+            except psutil.NoSuchProcess:
+                self.registry.discard(pid)
+                continue
+            except psutil.AccessDenied:
+                continue
+            entry = self.registry.verify(entry, start)
+            if entry is None:
+                continue
+
+            cpu_time = times.user + times.system
+            cpu_percent = self.registry.sample(entry, cpu_time, now)
+
+            disk = network = 0.0
+            if io is not None:
+                disk_bytes = io.read_bytes + io.write_bytes
+                other_bytes = (getattr(io, 'read_chars', io.read_bytes)
+                               + getattr(io, 'write_chars', io.write_bytes)
+                               - disk_bytes)
+                disk, network = self.io_rates.rates(entry.key, disk_bytes, other_bytes)
+                if socket_pids is not None and pid not in socket_pids:
+                    network = 0.0
+
+            columns.pid.append(pid)
+            columns.name.append(name or '')
+            columns.status.append(status or '')
+            columns.cpu_percent.append(cpu_percent)
+            columns.memory_percent.append(rss * memory_scale)
+            columns.disk.append(disk)
+            columns.network.append(network)
+            columns.cpu_time.append(cpu_time)
+            columns.ppid.append(ppid)
+            if uid is not None:
+                # The effective uid, like the owner of /proc/[pid] that
+                # the procfs source reports.
+                user = user_name(uid)
+            else:
+                if entry.user is None:
+                    entry.user = process_user(proc)
+                user = entry.user
+            columns.user.append(user)
+
+        self.io_rates.end()
+        return columns
+
+
+def make_process_source(name):
+    if name == 'psutil':
+        return PsutilProcessSource()
+    if name == 'procfs':
+        from procfs import ProcfsProcessSource
+        return ProcfsProcessSource()
+    raise ValueError(f"Unknown process source: {name}")
+
+
+class MetricsCollector:
+    """Samples system metrics and the process table off the Tk thread.
+
+    Two daemon threads run on their own clocks: a fast one for the
+    CPU/memory/disk/network counters and a slower one for the process
+    scan, so a long scan never delays a metric sample. Both publish
+    immutable samples to ``self.samples`` for the UI to drain; a failed
+    sample is published as the exception instead. ``set_intervals``
+    changes either clock while running. At most ``maxsize`` samples wait
+    in the queue; beyond that the oldest are dropped.
+    """
+
+    def __init__(self, interval=1.0, process_interval=2.0, maxsize=256,
+                 process_source='psutil', warmup=0.25):
+        if maxsize < 1:
+            # Queue(0) is unbounded: a stalled consumer would grow it forever.
+            raise ValueError("maxsize must be at least 1")
+        self.interval = interval
+        self.process_interval = process_interval
+        self.warmup = warmup
+        self.ready = threading.Event()
+        self.process_source = make_process_source(process_source)
+        self.per_cpu = PerCpuSampler()
+        self.disk_io = DiskSampler()
+        self.partitions = PartitionSampler()
+        self.samples = queue.Queue(maxsize=maxsize)
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._threads = []
+        self._net_io_last = None
+        self._net_time_last = None
+
+    def start(self):
+        self._stopped = False
+        psutil.cpu_percent()
+        self.per_cpu.sample()
+        self.disk_io.sample()
+        self._net_io_last = psutil.net_io_counters()
+        self._net_time_last = time.monotonic()
+        for target, name in ((self._metric_loop, 'metric-sampler'),
+                             (self._process_loop, 'process-sampler')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=1.0):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def set_intervals(self, interval=None, process_interval=None):
+        with self._condition:
+            if interval is not None:
+                self.interval = interval
+            if process_interval is not None:
+                self.process_interval = process_interval
+            # Wake the samplers so a shorter interval applies right away.
+            self._condition.notify_all()
+
+    def wait_ready(self, timeout=None):
+        return self.ready.wait(timeout)
+
+    def drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self.samples.get_nowait())
+            except queue.Empty:
+                return items
+
+    def sample_metrics(self):
+        now = time.monotonic()
+        net_io = psutil.net_io_counters()
+        elapsed = max(now - self._net_time_last, 1e-6)
+        net_up = (net_io.bytes_sent - self._net_io_last.bytes_sent) / 1024 / elapsed
+        net_down = (net_io.bytes_recv - self._net_io_last.bytes_recv) / 1024 / elapsed
+        self._net_io_last = net_io
+        self._net_time_last = now
+
+        return MetricSample(
+            timestamp=time.time(),
+            cpu_percent=psutil.cpu_percent(),
+            mem=psutil.virtual_memory(),
+            disk=psutil.disk_usage('/'),
+            net_up=net_up,
+            net_down=net_down,
+            cores=self.per_cpu.sample(),
+            disks=self.disk_io.sample(),
+            partitions=self.partitions.sample(now)
+        )
+
+    def sample_processes(self):
+        columns = self.process_source.scan()
+        return ProcessSample(time.time(), tuple(map(ProcessRow, *columns)))
+
+    def _publish(self, sample):
+        # Never block the sampler on a stalled UI: drop the oldest sample.
+        while True:
+            try:
+                self.samples.put_nowait(sample)
+                if isinstance(sample, MetricSample):
+                    self.ready.set()
+                return
+            except queue.Full:
+                try:
+                    self.samples.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def _run_periodic(self, interval_name, sample_fn, first_delay=0.0):
+        last_tick = time.monotonic() + first_delay - getattr(self, interval_name)
+        while True:
+            tick = self._next_tick(last_tick, interval_name)
+            if tick is None:
+                return
+            try:
+                self._publish(sample_fn())
+            except Exception as e:
+                self._publish(e)
+            last_tick = tick
+
+    def _next_tick(self, last_tick, interval_name):
+        """Wait for the tick after ``last_tick``; None once stopped."""
+        with self._condition:
+            while not self._stopped:
+                # Re-read on every wakeup: set_intervals() may have changed it.
+                interval = getattr(self, interval_name)
+                now = time.monotonic()
+                tick = last_tick + interval
+                if tick <= now:
+                    # Fell behind (e.g. a very slow scan); skip missed ticks
+                    # instead of firing a burst to catch up.
+                    return now - (now - tick) % interval
+                self._condition.wait(tick - now)
+        return None
+
+    def _metric_loop(self):
+        self._run_periodic('interval', self.sample_metrics, self.warmup)
+
+    def _process_loop(self):
+        self._run_periodic('process_interval', self.sample_processes)
@@ -0,0 +1,148 @@
+"""Optional HTTP endpoint exposing the latest sample to pull-based scrapers.
+
+    GET /metrics       Prometheus text exposition format
+    GET /metrics.json  the same values as JSON
+
+Both bodies are rendered once per sample by ``publish``; request handlers
+only send the current bytes, so scrape traffic costs the monitored host
+no extra sampling or serialization work.
+"""
+import heapq
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from collector import MetricSample, ProcessSample
+
+PROMETHEUS_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+JSON_TYPE = 'application/json'
+
+# name, help, type, MetricSample -> value
+SYSTEM_METRICS = (
+    ('system_cpu_percent', 'System-wide CPU utilization.', 'gauge',
+     lambda s: s.cpu_percent),
+    ('system_memory_percent', 'Physical memory in use.', 'gauge',
+     lambda s: s.mem.percent),
+    ('system_memory_used_bytes', 'Physical memory in use.', 'gauge',
+     lambda s: s.mem.used),
+    ('system_memory_total_bytes', 'Total physical memory.', 'gauge',
+     lambda s: s.mem.total),
+    ('system_disk_percent', 'Root filesystem space in use.', 'gauge',
+     lambda s: s.disk.percent),
+    ('system_disk_used_bytes', 'Root filesystem space in use.', 'gauge',
+     lambda s: s.disk.used),
+    ('system_disk_total_bytes', 'Root filesystem size.', 'gauge',
+     lambda s: s.disk.total),
+    ('system_network_up_kilobytes_per_second', 'Network send rate.', 'gauge',
+     lambda s: s.net_up),
+    ('system_network_down_kilobytes_per_second', 'Network receive rate.', 'gauge',
+     lambda s: s.net_down),
+)
+
+# name, help, ProcessRow field
+PROCESS_METRICS = (
+    ('process_cpu_percent', 'CPU utilization of the top processes.', 'cpu_percent'),
+    ('process_memory_percent', 'Memory share of the top processes.', 'memory_percent'),
+    ('process_disk_bytes_per_second', 'Disk I/O rate of the top processes.', 'disk'),
+    ('process_network_bytes_per_second', 'Non-disk I/O rate (sockets, pipes) of the top processes.', 'network'),
+    ('process_cpu_seconds_total', 'CPU time used by the top processes.', 'cpu_time'),
+)
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render_prometheus(metrics, processes):
+    lines = []
+    if metrics is not None:
+        for name, help_text, kind, value in SYSTEM_METRICS:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {float(value(metrics))!r}")
+    if processes:
+        labels = [f'pid="{row.pid}",name="{escape_label(row.name)}"' for row in processes]
+        for name, help_text, field in PROCESS_METRICS:
+            kind = 'counter' if name.endswith('_total') else 'gauge'
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for label, row in zip(labels, processes):
+                lines.append(f"{name}{{{label}}} {float(getattr(row, field))!r}")
+    lines.append('')
+    return '\n'.join(lines).encode()
+
+
+def render_json(metrics, processes):
+    body = {}
+    if metrics is not None:
+        body['timestamp'] = metrics.timestamp
+        body['system'] = {name: value(metrics) for name, _, _, value in SYSTEM_METRICS}
+    body['processes'] = [row._asdict() for row in processes]
+    return json.dumps(body, separators=(',', ':')).encode()
+
+
+class MetricsExporter:
+    """Serves pre-rendered snapshots of the latest samples over HTTP.
+
+    ``publish`` takes MetricSample and ProcessSample objects as they come
+    out of the collector and rebuilds both bodies; the server thread only
+    reads the current ``(prometheus, json)`` pair, which is replaced in a
+    single assignment.
+    """
+
+    def __init__(self, host='127.0.0.1', port=9101, top_n=10):
+        self.top_n = top_n
+        self._metrics = None
+        self._processes = ()
+        self._snapshot = (render_prometheus(None, ()), render_json(None, ()))
+
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                prometheus, body = exporter._snapshot
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    self.send_body(prometheus, PROMETHEUS_TYPE)
+                elif path == '/metrics.json':
+                    self.send_body(body, JSON_TYPE)
+                else:
+                    self.send_error(404)
+
+            def send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever,
+                                        name='metrics-exporter', daemon=True)
+
+    @property
+    def address(self):
+        return self.server.server_address[:2]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def publish(self, sample):
+        if isinstance(sample, MetricSample):
+            self._metrics = sample
+        elif isinstance(sample, ProcessSample):
+            self._processes = heapq.nlargest(self.top_n, sample.rows,
+                                             key=lambda row: row.cpu_percent)
+        else:
+            return
+        self._snapshot = (render_prometheus(self._metrics, self._processes),
+                          render_json(self._metrics, self._processes))
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,13 +1,43 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import psutil
+import os
 import platform
-from datetime import datetime
-from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import GPUtil
 import time
-import threading
+import json
+import numpy as np
+import bisect
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from collector import MetricsCollector, MetricSample, ProcessSample, CORE_FIELDS, DISK_FIELDS
+from history import MetricHistory, CoreHistory, DiskHistory, TIME_RANGES
+from sysinfo import SystemInfoCache, probe_hardware
+from tsstore import MetricStore, StoreWriter
+from replay import Replay, SPEEDS, Usage
+from exporter import MetricsExporter
+from fleet import FleetClient, FleetHost, parse_address
+from scheduler import AdaptiveScheduler
+from profiler import Profiler, profiled, format_snapshot
+from alerts import (AlertEngine, AlertHook, AlertWorker, Rule, DEFAULT_RULES, load_rules,
+                    format_subject, format_value)
+from proctree import ProcessTree
+from procfilter import ProcessFilter, ProcessIndex, FilterError
+
+# matplotlib takes longer to import than everything else combined, so it
+# is loaded in the background by load_chart_modules() during startup.
+Figure = None
+Polygon = None
+FigureCanvasTkAgg = None
+colormaps = None
+
+
+def load_chart_modules():
+    global Figure, Polygon, FigureCanvasTkAgg, colormaps
+    from matplotlib import colormaps
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Polygon
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
 
 class LoadingScreen:
     def __init__(self, root):
@@ -84,11 +114,780 @@ class LoadingScreen:
         self.message_label.config(text=message)
         self.loading_window.update_idletasks()
         
+    def close(self, step=5):
+        if step == 0:
+            self.loading_window.destroy()
+            return
+        self.loading_window.attributes('-alpha', step/5)
+        self.loading_window.after(50, self.close, step - 1)
+
+def nice_ceiling(value):
+    if value <= 0:
+        return 100
+    magnitude = 10 ** np.floor(np.log10(value))
+    for step in (1, 2, 2.5, 5, 10):
+        if value <= step * magnitude:
+            return float(step * magnitude)
+
+
+class BlitChart:
+    """Line + area chart that updates its artists in place and blits.
+
+    The axes background is cached on every full draw; regular frames only
+    restore it, redraw the two animated artists and blit the axes box. A
+    full redraw happens only when the x span or the y limit changes.
+    """
+
+    def __init__(self, ax, canvas, color, max_limit=None):
+        self.ax = ax
+        self.canvas = canvas
+        self.max_limit = max_limit
+        self.span = None
+        self.background = None
+        self.line, = ax.plot([], [], color=color, linewidth=1.5, alpha=0.8,
+                             animated=True)
+        self.fill = Polygon([[0, 0]], closed=True, color=color, alpha=0.2,
+                            linewidth=0, animated=True)
+        ax.add_patch(self.fill)
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        self.ax.draw_artist(self.fill)
+        self.ax.draw_artist(self.line)
+
+    def update(self, x, y, span):
+        self.line.set_data(x, y)
+        verts = np.empty((len(x) + 2, 2))
+        verts[0] = (x[0], 0)
+        verts[1:-1, 0] = x
+        verts[1:-1, 1] = y
+        verts[-1] = (x[-1], 0)
+        self.fill.set_xy(verts)
+
+        ylim = nice_ceiling(y.max() * 1.2)
+        if self.max_limit is not None:
+            ylim = min(ylim, self.max_limit)
+        if (self.background is None or span != self.span
+                or self.ax.get_ylim() != (0, ylim)):
+            self.span = span
+            self.ax.set_xlim(-span, 0)
+            self.ax.set_ylim(0, ylim)
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.ax.bbox)
+
+
+DEVICE_COLORS = ('#9467BD', '#17BECF', '#BCBD22', '#E377C2', '#8C564B', '#7F7F7F')
+
+
+class StackedChart:
+    """Area chart of several series, stacked or overlaid, blitted like BlitChart.
+
+    Each layer is an animated band and line updated in place; a full
+    redraw, which also redraws the legend, only happens when the x span,
+    the y limit or the set of layers changes.
+    """
+
+    def __init__(self, ax, canvas, colors=DEVICE_COLORS):
+        self.ax = ax
+        self.canvas = canvas
+        self.colors = colors
+        self.span = None
+        self.labels = None
+        self.background = None
+        self.bands = []
+        self.lines = []
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._draw_artists()
+
+    def _draw_artists(self):
+        for artist in self.bands + self.lines:
+            self.ax.draw_artist(artist)
+
+    def _set_layers(self, labels):
+        for artist in self.bands + self.lines:
+            artist.remove()
+        self.bands = []
+        self.lines = []
+        for index, label in enumerate(labels):
+            color = self.colors[index % len(self.colors)]
+            band = Polygon([[0, 0]], closed=True, color=color, alpha=0.3,
+                           linewidth=0, animated=True, label=label)
+            self.ax.add_patch(band)
+            line, = self.ax.plot([], [], color=color, linewidth=1.2, alpha=0.9,
+                                 animated=True)
+            self.bands.append(band)
+            self.lines.append(line)
+
+        legend = self.ax.get_legend()
+        if legend is not None:
+            legend.remove()
+        if len(labels) > 1:
+            self.ax.legend(handles=self.bands, loc='upper left', fontsize=7,
+                           facecolor='#252526', edgecolor='#404040', labelcolor='white')
+        self.labels = labels
+
+    def update(self, x, layers, span, labels=(), stacked=True, max_limit=None):
+        labels = tuple(labels)
+        relabeled = labels != self.labels
+        if relabeled:
+            self._set_layers(labels)
+
+        base = np.zeros(len(x))
+        peak = 0.0
+        for band, line, values in zip(self.bands, self.lines, layers):
+            # NaN marks samples a layer has no data for: it adds nothing
+            # to a stack and leaves a gap in an overlaid line.
+            top = base + np.nan_to_num(values) if stacked else values
+            bottom = base if stacked else np.zeros(len(x))
+            band.set_xy(np.concatenate((np.column_stack((x, np.nan_to_num(top))),
+                                        np.column_stack((x[::-1], bottom[::-1])))))
+            line.set_data(x, top)
+            if np.isfinite(top).any():
+                peak = max(peak, float(np.nanmax(top)))
+            if stacked:
+                base = top
+
+        ylim = nice_ceiling(peak * 1.2)
+        if max_limit is not None:
+            ylim = min(ylim, max_limit)
+        if (relabeled or self.background is None or span != self.span
+                or self.ax.get_ylim() != (0, ylim)):
+            self.span = span
+            self.ax.set_xlim(-span, 0)
+            self.ax.set_ylim(0, ylim)
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self.background)
+        self._draw_artists()
+        self.canvas.blit(self.ax.bbox)
+
+
+# Disk card views: DISK_FIELDS summed per device, and whether devices stack.
+DISK_VIEWS = {
+    'Throughput': (('read', 'write'), True),
+    'Read': (('read',), True),
+    'Write': (('write',), True),
+    'IOPS': (('read_iops', 'write_iops'), True),
+    'Await': (('await',), False),
+}
+
+
+# Samples shown across the per-core heatmap, and the most rows it draws;
+# with more cores than rows, neighbouring cores share a row showing their
+# maximum so a single pinned core still stands out.
+HEATMAP_SAMPLES = 120
+HEATMAP_MAX_ROWS = 128
+
+# A core is listed as pinned when it was at least this busy in every one
+# of the last PINNED_SAMPLES samples.
+PINNED_PERCENT = 90
+PINNED_SAMPLES = 10
+
+
+def fold_cores(data, max_rows=HEATMAP_MAX_ROWS):
+    """Max-pool a (cores, samples) array down to at most ``max_rows`` rows."""
+    group = -(-len(data) // max_rows)
+    if group == 1:
+        return data, 1
+    rows = -(-len(data) // group)
+    padded = np.zeros((rows * group, data.shape[1]), dtype=data.dtype)
+    padded[:len(data)] = data
+    return padded.reshape(rows, group, -1).max(axis=1), group
+
+
+def heatmap_frame(window, samples=HEATMAP_SAMPLES):
+    """Right-align a (cores, n) window in a (cores, ``samples``) image.
+
+    Keeping the image a fixed width means a filling history does not
+    force full redraws; missing samples are NaN, drawn as background.
+    """
+    window = window[:, -samples:]
+    data = np.full((len(window), samples), np.nan, dtype='f4')
+    data[:, samples - window.shape[1]:] = window
+    return data
+
+
+def pinned_cores(window):
+    """Indexes of the cores that are pinned in a (cores, samples) window."""
+    if window.shape[1] < PINNED_SAMPLES:
+        return np.empty(0, dtype=int)
+    return np.flatnonzero((window[:, -PINNED_SAMPLES:] >= PINNED_PERCENT).all(axis=1))
+
+
+class HeatmapChart:
+    """Cores x time heatmap redrawn with one image update and a blit.
+
+    Like BlitChart, the full figure is only drawn again when the image
+    shape changes; every other frame restores the cached background and
+    blits the axes.
+    """
+
+    def __init__(self, ax, canvas):
+        self.ax = ax
+        self.canvas = canvas
+        self.shape = None
+        self.background = None
+        cmap = colormaps['inferno'].with_extremes(bad='#1F1F1F')
+        self.image = ax.imshow(np.zeros((1, 1)), aspect='auto', cmap=cmap,
+                               vmin=0, vmax=100, interpolation='nearest',
+                               origin='lower', animated=True)
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.ax.draw_artist(self.image)
+
+    def update(self, data, group=1):
+        self.image.set_data(data)
+        if self.background is None or data.shape != self.shape:
+            self.shape = data.shape
+            rows, columns = data.shape
+            self.image.set_extent((-0.5, columns - 0.5, -0.5, rows - 0.5))
+            ticks = np.unique(np.linspace(0, rows - 1, min(rows, 5)).round().astype(int))
+            self.ax.set_yticks(ticks)
+            self.ax.set_yticklabels([str(tick * group) for tick in ticks], fontsize=7)
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.image)
+        self.canvas.blit(self.ax.bbox)
+
+
+def format_rate(bytes_per_sec):
+    if bytes_per_sec < 1024:
+        return f"{bytes_per_sec:.0f} B/s"
+    for unit in ('KB/s', 'MB/s', 'GB/s'):
+        bytes_per_sec /= 1024
+        if bytes_per_sec < 1024 or unit == 'GB/s':
+            return f"{bytes_per_sec:.1f} {unit}"
+
+
+def format_cpu_time(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def format_process_row(proc):
+    return (
+        proc.name,
+        str(proc.pid),
+        proc.status,
+        f"{proc.cpu_percent:.1f}%",
+        f"{proc.memory_percent:.1f}%",
+        format_rate(proc.disk),
+        format_rate(proc.network),
+        format_cpu_time(proc.cpu_time)
+    )
+
+
+def increasing_subsequence_mask(seq):
+    """Mark one longest strictly increasing subsequence of ``seq``."""
+    tails = []
+    tail_index = []
+    parent = [-1] * len(seq)
+    for i, value in enumerate(seq):
+        pos = bisect.bisect_left(tails, value)
+        if pos == len(tails):
+            tails.append(value)
+            tail_index.append(i)
+        else:
+            tails[pos] = value
+            tail_index[pos] = i
+        parent[i] = tail_index[pos - 1] if pos else -1
+
+    keep = [False] * len(seq)
+    i = tail_index[-1] if tail_index else -1
+    while i >= 0:
+        keep[i] = True
+        i = parent[i]
+    return keep
+
+
+def move_into_order(tree, parent, current, order, items):
+    """Move ``parent``'s children from ``current`` key order into ``order``.
+
+    Only the keys outside the longest run that is already in order are
+    moved; ``current`` is updated in place.
+    """
+    position = {key: index for index, key in enumerate(current)}
+    keep = increasing_subsequence_mask([position[key] for key in order])
+    for index, key in enumerate(order):
+        if keep[index]:
+            continue
+        current.remove(key)
+        target = current.index(order[index - 1]) + 1 if index else 0
+        current.insert(target, key)
+        tree.move(items[key], parent, target)
+
+
+class TreeviewReconciler:
+    """Keeps a Treeview in sync with a keyed row set using minimal Tk calls.
+
+    Rows are keyed by PID; an item is only touched when its rendered values
+    changed, rows for exited processes are removed in one batched delete,
+    and the tree is brought into the given row order by moving only the
+    rows outside the longest run that is already in order.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.items = {}
+        self.keys = {}
+        self.rendered = {}
+        self.order = []
+
+    def reconcile(self, rows):
+        seen = set()
+        order = []
+        for key, values in rows:
+            seen.add(key)
+            order.append(key)
+            item = self.items.get(key)
+            if item is None:
+                item = self.tree.insert('', 'end', values=values)
+                self.items[key] = item
+                self.keys[item] = key
+                self.order.append(key)
+            elif self.rendered[key] != values:
+                self.tree.item(item, values=values)
+            self.rendered[key] = values
+
+        dead = [key for key in self.items if key not in seen]
+        if dead:
+            stale = []
+            for key in dead:
+                item = self.items.pop(key)
+                del self.keys[item]
+                del self.rendered[key]
+                stale.append(item)
+            self.tree.delete(*stale)
+            self.order = [key for key in self.order if key in self.items]
+
+        if order != self.order:
+            self._reorder(order)
+
+    def _reorder(self, order):
+        move_into_order(self.tree, '', self.order, order, self.items)
+        self.order = order
+
+    def key_for(self, item):
+        return self.keys.get(item)
+
+
+PROCESS_SORT_KEYS = {
+    'name': lambda proc: proc.name.lower(),
+    'pid': lambda proc: proc.pid,
+    'status': lambda proc: proc.status,
+    'cpu': lambda proc: proc.cpu_percent,
+    'memory': lambda proc: proc.memory_percent,
+    'disk': lambda proc: proc.disk,
+    'network': lambda proc: proc.network,
+    'cpu_time': lambda proc: proc.cpu_time,
+}
+
+# Hosts with more processes than this get the virtual process list; it
+# is dropped again below 3/4 of the threshold, so a host hovering around
+# it doesn't switch on every refresh.
+VIRTUAL_LIST_THRESHOLD = 2000
+
+
+class VirtualProcessList:
+    """Process list that only materializes the rows in the viewport.
+
+    The full table stays in ``self.rows``; the Treeview holds a fixed pool
+    of slot items (visible rows plus a small overscan) that are refilled
+    from the current window, and the scrollbar is driven from the model
+    size instead of the Treeview's own item count.
+    """
+
+    BINDINGS = ('<Configure>', '<<TreeviewSelect>>', '<MouseWheel>', '<Button-4>',
+                '<Button-5>', '<Prior>', '<Next>')
+
+    def __init__(self, tree, scrollbar, row_height=28, overscan=5, selected_pid=None):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.row_height = row_height
+        self.overscan = overscan
+        self.rows = []
+        self.first = 0
+        self.visible = max(1, tree.winfo_height() // row_height - 1)
+        self.selected_pid = selected_pid
+        self.slots = TreeviewReconciler(tree)
+
+        tree.configure(yscrollcommand='')
+        scrollbar.configure(command=self.yview)
+        tree.bind('<Configure>', self._on_configure)
+        tree.bind('<<TreeviewSelect>>', self._on_select)
+        tree.bind('<MouseWheel>', self._on_wheel)
+        tree.bind('<Button-4>', self._on_wheel)
+        tree.bind('<Button-5>', self._on_wheel)
+        tree.bind('<Prior>', lambda e: self._scroll_to(self.first - self.visible))
+        tree.bind('<Next>', lambda e: self._scroll_to(self.first + self.visible))
+
     def close(self):
-        for i in range(5, 0, -1):
-            self.loading_window.attributes('-alpha', i/5)
-            time.sleep(0.05)
-        self.loading_window.destroy()
+        """Remove the slot items and give scrolling back to the Treeview."""
+        for sequence in self.BINDINGS:
+            self.tree.unbind(sequence)
+        if self.slots.items:
+            self.tree.delete(*self.slots.items.values())
+        self.tree.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.configure(command=self.tree.yview)
+
+    def update(self, rows):
+        self.rows = list(rows)
+        self.render()
+
+    def key_for(self, item):
+        slot = self.slots.key_for(item)
+        if slot is None or self.first + slot >= len(self.rows):
+            return None
+        return self.rows[self.first + slot].pid
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self._scroll_to(int(float(args[1]) * len(self.rows)))
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible
+            self._scroll_to(self.first + amount)
+
+    def _scroll_to(self, first):
+        first = max(0, min(first, len(self.rows) - self.visible))
+        if first != self.first:
+            self.first = first
+            self.render()
+        return 'break'
+
+    def _on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            return self._scroll_to(self.first - 3)
+        return self._scroll_to(self.first + 3)
+
+    def _on_configure(self, event):
+        # One row's worth of height is taken by the column headings.
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    def _on_select(self, event):
+        selected = self.tree.selection()
+        if selected:
+            self.selected_pid = self.key_for(selected[0])
+
+    def render(self):
+        self.first = max(0, min(self.first, len(self.rows) - self.visible))
+        window = self.rows[self.first:self.first + self.visible + self.overscan]
+        self.slots.reconcile(
+            (slot, format_process_row(proc)) for slot, proc in enumerate(window)
+        )
+        self.tree.yview_moveto(0)
+
+        selected = [self.slots.items[slot] for slot, proc in enumerate(window)
+                    if proc.pid == self.selected_pid]
+        if tuple(selected) != self.tree.selection():
+            self.tree.selection_set(selected)
+
+        total = max(len(self.rows), 1)
+        self.scrollbar.set(self.first / total,
+                           min(1.0, (self.first + self.visible) / total))
+
+
+TREE_SORT_KEYS = {
+    '#0': lambda node: node.row.name.lower(),
+    'pid': lambda node: node.pid,
+    'status': lambda node: node.row.status,
+    'cpu': lambda node: node.row.cpu_percent,
+    'cpu_total': lambda node: node.cpu,
+    'memory': lambda node: node.row.memory_percent,
+    'memory_total': lambda node: node.memory,
+}
+
+
+def format_tree_node(node):
+    row = node.row
+    return (
+        str(row.pid),
+        row.status,
+        f"{row.cpu_percent:.1f}%",
+        f"{node.cpu:.1f}%",
+        f"{row.memory_percent:.1f}%",
+        f"{node.memory:.1f}%"
+    )
+
+
+class ProcessTreeView:
+    """Collapsible parent/child view over an incrementally updated ProcessTree.
+
+    Only the children of expanded nodes exist as Treeview items, and at
+    most ``page_size`` of them per parent, in sort order, followed by a
+    "more" row that shows the next page when activated; a collapsed node
+    with children holds one empty placeholder so it gets an expand arrow.
+    Expanding a node with thousands of children therefore inserts one
+    page, and a refresh only re-sorts the expanded parents whose children
+    changed and touches the items whose rendered values changed.
+    """
+
+    def __init__(self, tree, page_size=200):
+        self.tree = tree
+        self.page_size = page_size
+        self.model = ProcessTree()
+        self.items = {}
+        self.keys = {}
+        self.rendered = {}
+        self.parents = {}
+        self.placeholders = {}
+        # Expanded parents (None is the top level): the child PIDs shown,
+        # in display order, and how many of them may be shown.
+        self.shown = {None: []}
+        self.limits = {None: page_size}
+        self.more_items = {}
+        self.more_keys = {}
+        self.sort_column = 'cpu_total'
+        self.sort_reverse = True
+        self._mark_sort_heading()
+
+        tree.bind('<<TreeviewOpen>>', self._on_open)
+        tree.bind('<<TreeviewClose>>', self._on_close)
+        tree.bind('<Double-1>', self._on_activate)
+        tree.bind('<Return>', self._on_activate)
+
+    def key_for(self, item):
+        return self.keys.get(item)
+
+    def update(self, rows):
+        changes = self.model.update(rows)
+        nodes = self.model.nodes
+
+        stale = []
+        resync = set()
+        for pid in changes.removed + changes.placed:
+            if pid in self.items:
+                parent = self.parents[pid]
+                self.shown[parent].remove(pid)
+                stale.append(self.items[pid])
+                self._forget(pid)
+                resync.add(parent)
+        if stale:
+            self.tree.delete(*stale)
+
+        for pid in changes.dirty:
+            node = nodes.get(pid)
+            if node is None:
+                continue
+            resync.add(node.parent.pid if node.parent is not None else None)
+            if pid in self.items:
+                self._refresh(node)
+
+        for parent in resync:
+            if parent in self.shown:
+                self._sync(parent)
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = column not in ('#0', 'pid', 'status')
+        self._mark_sort_heading()
+
+        for parent in list(self.shown):
+            # Re-sorting one parent can collapse another by dropping it.
+            if parent in self.shown:
+                self._sync(parent)
+
+    def _mark_sort_heading(self):
+        for col in ('#0',) + tuple(self.tree['columns']):
+            self.tree.heading(col, text=self.tree.heading(col)['text'].rstrip(' ↑↓'))
+        column = self.sort_column
+        self.tree.heading(column,
+                          text=f"{self.tree.heading(column)['text']} {'↓' if self.sort_reverse else '↑'}")
+
+    def _children(self, parent):
+        if parent is None:
+            return self.model.roots.values()
+        return self.model.nodes[parent].children.values()
+
+    def _sync(self, parent):
+        """Bring an expanded parent's items in line with its current children."""
+        key = TREE_SORT_KEYS[self.sort_column]
+        ordered = sorted(self._children(parent), key=key, reverse=self.sort_reverse)
+        visible = ordered[:self.limits[parent]]
+        wanted = {node.pid for node in visible}
+        parent_item = self.items[parent] if parent is not None else ''
+        shown = self.shown[parent]
+
+        dropped = [pid for pid in shown if pid not in wanted]
+        if dropped:
+            stale = []
+            for pid in dropped:
+                stale.append(self.items[pid])
+                self._forget(pid)
+            self.tree.delete(*stale)
+            shown[:] = [pid for pid in shown if pid in wanted]
+
+        opened = []
+        for node in visible:
+            if node.pid not in self.items:
+                self._insert(node, parent, parent_item, len(shown))
+                shown.append(node.pid)
+                if parent is None and node.children:
+                    opened.append(node.pid)
+
+        order = [node.pid for node in visible]
+        if order != shown:
+            move_into_order(self.tree, parent_item, shown, order, self.items)
+
+        hidden = len(ordered) - len(visible)
+        more = self.more_items.get(parent)
+        if hidden and more is None:
+            more = self.tree.insert(parent_item, 'end', text=f"... {hidden} more")
+            self.more_items[parent] = more
+            self.more_keys[more] = parent
+        elif hidden:
+            self.tree.item(more, text=f"... {hidden} more")
+        elif more is not None:
+            del self.more_keys[self.more_items.pop(parent)]
+            self.tree.delete(more)
+
+        # Top-level processes (init, kthreadd) start out expanded.
+        for pid in opened:
+            self._expand(pid)
+
+    def _insert(self, node, parent, parent_item, index):
+        values = format_tree_node(node)
+        item = self.tree.insert(parent_item, index, text=node.row.name, values=values)
+        self.items[node.pid] = item
+        self.keys[item] = node.pid
+        self.rendered[node.pid] = (node.row.name, values)
+        self.parents[node.pid] = parent
+        if node.children:
+            self.placeholders[node.pid] = self.tree.insert(item, 'end', text='')
+
+    def _refresh(self, node):
+        pid = node.pid
+        item = self.items[pid]
+        rendered = (node.row.name, format_tree_node(node))
+        if rendered != self.rendered[pid]:
+            self.tree.item(item, text=rendered[0], values=rendered[1])
+            self.rendered[pid] = rendered
+        if pid in self.shown:
+            return
+        placeholder = self.placeholders.get(pid)
+        if node.children and placeholder is None:
+            self.placeholders[pid] = self.tree.insert(item, 'end', text='')
+        elif not node.children and placeholder is not None:
+            del self.placeholders[pid]
+            self.tree.delete(placeholder)
+
+    def _forget(self, pid):
+        """Drop the bookkeeping for ``pid`` and everything shown below it.
+
+        The caller deletes the item itself; Tk deletes the descendants.
+        """
+        item = self.items.pop(pid)
+        del self.keys[item]
+        del self.rendered[pid]
+        del self.parents[pid]
+        self.placeholders.pop(pid, None)
+        more = self.more_items.pop(pid, None)
+        if more is not None:
+            del self.more_keys[more]
+        self.limits.pop(pid, None)
+        for child in self.shown.pop(pid, ()):
+            self._forget(child)
+
+    def _expand(self, pid):
+        if pid in self.shown:
+            return
+        placeholder = self.placeholders.pop(pid, None)
+        if placeholder is not None:
+            self.tree.delete(placeholder)
+        self.shown[pid] = []
+        self.limits[pid] = self.page_size
+        self.tree.item(self.items[pid], open=True)
+        self._sync(pid)
+
+    def _collapse(self, pid):
+        shown = self.shown.pop(pid, None)
+        if shown is None:
+            return
+        self.limits.pop(pid)
+        stale = [self.items[child] for child in shown]
+        for child in shown:
+            self._forget(child)
+        more = self.more_items.pop(pid, None)
+        if more is not None:
+            del self.more_keys[more]
+            stale.append(more)
+        if stale:
+            self.tree.delete(*stale)
+        if self.model.nodes[pid].children:
+            self.placeholders[pid] = self.tree.insert(self.items[pid], 'end', text='')
+
+    def _on_open(self, event):
+        pid = self.keys.get(self.tree.focus())
+        if pid is not None:
+            self._expand(pid)
+
+    def _on_close(self, event):
+        pid = self.keys.get(self.tree.focus())
+        if pid is not None:
+            self._collapse(pid)
+
+    def _on_activate(self, event):
+        focus = self.tree.focus()
+        if focus not in self.more_keys:
+            return
+        parent = self.more_keys[focus]
+        self.limits[parent] += self.page_size
+        self._sync(parent)
+        return 'break'
+
+
+class TabRenderer:
+    """Runs render callbacks only for the notebook tab that is on screen.
+
+    Data updates ``invalidate`` the tabs that show them; ``flush`` redraws
+    the selected tab if it is stale. A hidden tab collects no frames, it
+    is redrawn once from the latest state when it is selected again.
+    """
+
+    def __init__(self, notebook):
+        self.notebook = notebook
+        self.consumers = {}
+        self.stale = set()
+
+    def register(self, tab, render):
+        self.consumers[str(tab)] = render
+        self.stale.add(str(tab))
+
+    def invalidate(self, *tabs):
+        self.stale.update(map(str, tabs))
+
+    def flush(self):
+        if not self.notebook.winfo_viewable():
+            return
+        current = self.notebook.select()
+        if current in self.stale and current in self.consumers:
+            self.stale.discard(current)
+            self.consumers[current]()
+
 
 class TaskManagerStyleMonitor:
     def __init__(self, root: tk.Tk):
@@ -96,45 +895,71 @@ class TaskManagerStyleMonitor:
         self.root.withdraw()
         
         self.loading_screen = LoadingScreen(root)
-        self.initialization_complete = False
-        threading.Thread(target=self.initialize_app, daemon=True).start()
+        self.profiler = Profiler()
+        self.process_update_interval = 2000
+        self.perf_update_interval = 1000
+        self.ui_poll_interval = 100
+        # Quiet time after the last keystroke before the filter is applied.
+        self.filter_delay = 250
+        # Percent of one core the monitor may use before it samples and
+        # redraws less often.
+        self.cpu_budget = 5.0
+        # 'procfs' reads /proc directly on Linux instead of using psutil.
+        self.process_source = 'psutil'
+        # Metric history is also recorded here for post-incident analysis.
+        self.history_dir = os.path.join(os.path.expanduser('~'), '.system-monitor',
+                                        platform.node() or 'localhost')
+        # Set to a port number to serve /metrics and /metrics.json.
+        self.exporter_port = None
+        # "host:port" addresses of agents (agent.py) shown on the Fleet tab.
+        self.fleet_hosts = []
+        # Alert rules and hook command (see alerts.py); the built-in rules
+        # are used when this file does not exist.
+        self.alerts_path = os.path.join(os.path.dirname(self.history_dir), 'alerts.json')
+
+        # Start sampling right away; the window is shown as soon as the
+        # first sample and the hardware probe are in, while matplotlib
+        # keeps loading in the background for the Performance tab.
+        self.collector = MetricsCollector(
+            interval=self.perf_update_interval / 1000,
+            process_interval=self.process_update_interval / 1000,
+            process_source=self.process_source
+        )
+        self.collector.start()
+
+        self.startup_pool = ThreadPoolExecutor(max_workers=3, thread_name_prefix='startup')
+        self.chart_modules = self.startup_pool.submit(load_chart_modules)
+        self.hardware_probe = self.startup_pool.submit(probe_hardware)
+        self.startup_tasks = [
+            (self.hardware_probe, 50, "Analyzing hardware..."),
+            (self.startup_pool.submit(self.collector.wait_ready, 2.0), 50, "Collecting first sample..."),
+        ]
+        self.startup_progress = 0
+        self.loading_screen.update_progress(0, "Loading system modules...")
         self.check_initialization()
     
     def check_initialization(self):
-        if self.initialization_complete:
-            self.loading_screen.close()
-            self.setup_main_app()
-            self.root.deiconify()
-        else:
-            self.root.after(100, self.check_initialization)
-    
-    def initialize_app(self):
-        tasks = [
-            (10, "Loading system modules..."),
-            (25, "Analyzing hardware..."),
-            (40, "Initializing monitors..."),
-            (60, "Scanning network..."),
-            (75, "Preparing process manager..."),
-            (90, "Finalizing UI..."),
-            (100, "Ready!")
-        ]
-        
-        for progress, message in tasks:
-            time.sleep(0.3)
-            self.loading_screen.update_progress(progress, message)
-        
-        self.initialization_complete = True
+        pending = []
+        for future, weight, message in self.startup_tasks:
+            if future.done():
+                self.startup_progress += weight
+                self.loading_screen.update_progress(self.startup_progress, message)
+            else:
+                pending.append((future, weight, message))
+        self.startup_tasks = pending
+
+        if pending:
+            self.root.after(20, self.check_initialization)
+            return
+
+        self.hardware = self.hardware_probe.result()
+        self.loading_screen.close()
+        self.setup_main_app()
+        self.root.deiconify()
 
     def setup_main_app(self):
-        self.root.title("System Monitor")
-        self.setup_style()
-        self.setup_main_window()
         self.running = True
-        self.process_update_interval = 2000
-        self.perf_update_interval = 1000
         self.init_data_structures()
-        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
-        self.root.minsize(800, 600)
         self.sort_column = None
         self.sort_reverse = False
 
@@ -143,8 +968,14 @@ class TaskManagerStyleMonitor:
         self.disk = psutil.disk_usage('/')
         self.net_up = 0
         self.net_down = 0
-        
-        self.root.after(1000, self.update_data)
+
+        self.root.title("System Monitor")
+        self.setup_style()
+        self.setup_main_window()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.minsize(800, 600)
+
+        self.update_data()
 
     def setup_style(self):
         self.style = ttk.Style()
@@ -175,8 +1006,13 @@ class TaskManagerStyleMonitor:
                       foreground=[('selected', 'white')])
 
     def setup_main_window(self):
+        self.setup_menu()
+
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(fill=tk.BOTH, expand=True)
+        self.renderer = TabRenderer(self.notebook)
+        self.setup_replay_bar()
+        self.setup_host_bar()
 
         # Processes Tab
         self.process_tab = ttk.Frame(self.notebook)
@@ -184,15 +1020,151 @@ class TaskManagerStyleMonitor:
         
         # Performance Tab
         self.perf_tab = ttk.Frame(self.notebook)
-        self.setup_performance_tab()
+        self.perf_cards = {}
+        self.perf_placeholder = ttk.Label(self.perf_tab, text="Loading charts...",
+                                          foreground='lightgray')
+        self.perf_placeholder.grid(row=0, column=0, padx=10, pady=10)
+        self.check_chart_modules()
         
         # System Details Tab
         self.sys_tab = ttk.Frame(self.notebook)
         self.setup_system_details_tab()
+
+        # Fleet Tab
+        self.fleet_tab = ttk.Frame(self.notebook)
+        self.setup_fleet_tab()
+
+        # Alerts Tab
+        self.alerts_tab = ttk.Frame(self.notebook)
+        self.setup_alerts_tab()
         
         self.notebook.add(self.process_tab, text="Processes")
         self.notebook.add(self.perf_tab, text="Performance")
         self.notebook.add(self.sys_tab, text="System Details")
+        self.notebook.add(self.fleet_tab, text="Fleet")
+        self.notebook.add(self.alerts_tab, text="Alerts")
+
+        self.renderer.register(self.process_tab, self.render_process_list)
+        self.renderer.register(self.perf_tab, self.update_perf_graphs)
+        self.renderer.register(self.fleet_tab, self.update_fleet_cards)
+        self.renderer.register(self.alerts_tab, self.render_alerts)
+        # Catch up as soon as the window is restored.
+        self.root.bind('<Map>', lambda e: e.widget is self.root and self.renderer.flush())
+
+    def setup_menu(self):
+        menubar = tk.Menu(self.root, tearoff=0,
+                          bg='#252526', fg='white',
+                          activebackground='#094771',
+                          activeforeground='white')
+        file_menu = tk.Menu(menubar, tearoff=0,
+                            bg='#252526', fg='white',
+                            activebackground='#094771',
+                            activeforeground='white')
+        file_menu.add_command(label="Open Recording...", command=self.open_recording)
+        file_menu.add_command(label="Return to Live", command=self.return_to_live)
+        file_menu.add_separator()
+        file_menu.add_command(label="Exit", command=self.on_close)
+        menubar.add_cascade(label="File", menu=file_menu)
+
+        view_menu = tk.Menu(menubar, tearoff=0,
+                            bg='#252526', fg='white',
+                            activebackground='#094771',
+                            activeforeground='white')
+        self.profiler_visible = tk.BooleanVar(value=False)
+        view_menu.add_checkbutton(label="Profiler Overlay", accelerator="F12",
+                                  variable=self.profiler_visible,
+                                  command=self.apply_profiler_overlay)
+        view_menu.add_command(label="Export Profile...", command=self.export_profile)
+        menubar.add_cascade(label="View", menu=view_menu)
+        self.root.config(menu=menubar)
+        self.root.bind('<F12>', lambda e: self.toggle_profiler_overlay())
+
+        self.profiler_overlay = tk.Label(self.root, text="", justify=tk.LEFT, anchor='nw',
+                                         font=('Consolas', 9), bg='#000000', fg='#9CDCFE',
+                                         padx=8, pady=6)
+        self.profiler_overlay_job = None
+
+    def setup_replay_bar(self):
+        # Only packed while a recording is being replayed.
+        self.replay_bar = ttk.Frame(self.root)
+
+        self.replay_button = ttk.Button(self.replay_bar, text="Pause", width=7,
+                                        command=self.toggle_replay)
+        self.replay_button.pack(side=tk.LEFT, padx=(10, 5), pady=5)
+
+        self.replay_speed = tk.StringVar(value=f"{SPEEDS[0]}x")
+        speed_box = ttk.Combobox(self.replay_bar,
+                                 textvariable=self.replay_speed,
+                                 values=[f"{speed}x" for speed in SPEEDS],
+                                 state='readonly',
+                                 width=5)
+        speed_box.pack(side=tk.LEFT, padx=5)
+        speed_box.bind('<<ComboboxSelected>>',
+                       lambda e: self.replay.set_speed(int(self.replay_speed.get().rstrip('x'))))
+
+        ttk.Button(self.replay_bar, text="Back to Live",
+                   command=self.return_to_live).pack(side=tk.RIGHT, padx=10)
+        self.replay_time_label = ttk.Label(self.replay_bar, text="", width=20)
+        self.replay_time_label.pack(side=tk.RIGHT, padx=5)
+
+        # The scrubber only seeks on release so playback can keep moving it.
+        self.replay_position = tk.DoubleVar()
+        self.replay_dragging = False
+        self.replay_scale = ttk.Scale(self.replay_bar, orient='horizontal',
+                                      variable=self.replay_position)
+        self.replay_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        self.replay_scale.bind('<ButtonPress-1>', self.start_scrub)
+        self.replay_scale.bind('<ButtonRelease-1>', self.end_scrub)
+
+    def toggle_profiler_overlay(self):
+        self.profiler_visible.set(not self.profiler_visible.get())
+        self.apply_profiler_overlay()
+
+    def apply_profiler_overlay(self):
+        # Toggling restarts the refresh chain rather than adding a second one.
+        if self.profiler_overlay_job is not None:
+            self.root.after_cancel(self.profiler_overlay_job)
+            self.profiler_overlay_job = None
+        if self.profiler_visible.get():
+            self.profiler.enable(self.root)
+            self.profiler_overlay.place(relx=1.0, y=40, x=-10, anchor='ne')
+            self.profiler_overlay.lift()
+            self.refresh_profiler_overlay()
+        else:
+            self.profiler.disable()
+            self.profiler_overlay.place_forget()
+
+    def refresh_profiler_overlay(self):
+        self.profiler_overlay_job = None
+        if not self.running or not self.profiler.enabled:
+            return
+        self.profiler_overlay.config(text=format_snapshot(self.profiler.snapshot()))
+        self.profiler_overlay_job = self.root.after(1000, self.refresh_profiler_overlay)
+
+    def export_profile(self):
+        path = filedialog.asksaveasfilename(
+            title="Export Profile",
+            defaultextension=".json",
+            initialfile="system-monitor-profile.json",
+            filetypes=[("JSON", "*.json")]
+        )
+        if not path:
+            return
+        try:
+            with open(path, 'w') as f:
+                json.dump(self.profiler.snapshot(), f, indent=2)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not export profile: {e}")
+
+    def setup_host_bar(self):
+        # Only packed while a remote host is shown.
+        self.host_bar = ttk.Frame(self.root)
+        self.host_label = ttk.Label(self.host_bar, text="",
+                                    font=('Segoe UI', 9, 'bold'),
+                                    foreground='#4EC9B0')
+        self.host_label.pack(side=tk.LEFT, padx=10, pady=5)
+        ttk.Button(self.host_bar, text="Back to This Computer",
+                   command=self.view_local).pack(side=tk.RIGHT, padx=10)
 
     def setup_processes_tab(self):
         columns = {
@@ -202,11 +1174,28 @@ class TaskManagerStyleMonitor:
             'cpu': ('CPU', 80),
             'memory': ('Memory', 100),
             'disk': ('Disk', 80),
-            'network': ('Network', 100)
+            'network': ('Other I/O', 100),
+            'cpu_time': ('CPU Time', 90)
         }
 
+        toolbar = ttk.Frame(self.process_tab)
+        toolbar.grid(row=0, column=0, sticky='ew')
+        ttk.Label(toolbar, text="Filter:").pack(side=tk.LEFT, padx=(10, 5), pady=5)
+        self.filter_text = tk.StringVar()
+        self.filter_entry = ttk.Entry(toolbar, textvariable=self.filter_text, width=40)
+        self.filter_entry.pack(side=tk.LEFT)
+        self.filter_entry.bind('<Escape>', lambda e: self.filter_text.set(''))
+        self.filter_text.trace_add('write', lambda *args: self.schedule_filter())
+        self.process_tree_mode = tk.BooleanVar(value=False)
+        ttk.Checkbutton(toolbar, text="Group by parent process",
+                        variable=self.process_tree_mode,
+                        command=self.toggle_process_tree).pack(side=tk.LEFT, padx=10, pady=5)
+        self.filter_status = ttk.Label(toolbar, text="", foreground='lightgray')
+        self.filter_status.pack(side=tk.RIGHT, padx=10)
+
+        self.process_list_frame = ttk.Frame(self.process_tab)
         self.process_tree = ttk.Treeview(
-            self.process_tab, 
+            self.process_list_frame, 
             columns=tuple(columns.keys()),
             show='headings',
             selectmode='browse'
@@ -218,17 +1207,22 @@ class TaskManagerStyleMonitor:
             self.process_tree.column(col, width=width, 
                                     anchor=tk.CENTER if col != 'name' else tk.W)
 
-        vsb = ttk.Scrollbar(self.process_tab, orient="vertical", 
+        vsb = ttk.Scrollbar(self.process_list_frame, orient="vertical", 
                            command=self.process_tree.yview)
-        hsb = ttk.Scrollbar(self.process_tab, orient="horizontal", 
+        hsb = ttk.Scrollbar(self.process_list_frame, orient="horizontal", 
                            command=self.process_tree.xview)
         self.process_tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
 
         self.process_tree.grid(row=0, column=0, sticky='nsew')
         vsb.grid(row=0, column=1, sticky='ns')
         hsb.grid(row=1, column=0, sticky='ew')
+        self.process_list_frame.grid_columnconfigure(0, weight=1)
+        self.process_list_frame.grid_rowconfigure(0, weight=1)
+        self.process_list_frame.grid(row=1, column=0, sticky='nsew')
         self.process_tab.grid_columnconfigure(0, weight=1)
-        self.process_tab.grid_rowconfigure(0, weight=1)
+        self.process_tab.grid_rowconfigure(1, weight=1)
+
+        self.setup_process_tree_view()
 
         self.context_menu = tk.Menu(self.root, tearoff=0, 
                                   bg='#252526', fg='white',
@@ -236,26 +1230,270 @@ class TaskManagerStyleMonitor:
                                   activeforeground='white')
         self.context_menu.add_command(label="End Task", command=self.end_process)
         self.process_tree.bind("<Button-3>", self.show_context_menu)
+        self.process_tree_view.tree.bind("<Button-3>", self.show_context_menu)
+
+        self.process_vsb = vsb
+        self.virtual_list = False
+        self.process_rows = TreeviewReconciler(self.process_tree)
+        self.use_virtual_list(self.hardware['process_count'])
+
+    def setup_process_tree_view(self):
+        columns = {
+            'pid': ('PID', 80),
+            'status': ('Status', 120),
+            'cpu': ('CPU', 80),
+            'cpu_total': ('CPU (Tree)', 100),
+            'memory': ('Memory', 100),
+            'memory_total': ('Memory (Tree)', 110)
+        }
+
+        # Only gridded while "Group by parent process" is checked.
+        self.process_tree_frame = ttk.Frame(self.process_tab)
+        tree = ttk.Treeview(
+            self.process_tree_frame,
+            columns=tuple(columns.keys()),
+            show='tree headings',
+            selectmode='browse'
+        )
+        tree.heading('#0', text="Name",
+                     command=lambda: self.process_tree_view.sort_by('#0'))
+        tree.column('#0', width=320, anchor=tk.W)
+        for col, (text, width) in columns.items():
+            tree.heading(col, text=text,
+                         command=lambda c=col: self.process_tree_view.sort_by(c))
+            tree.column(col, width=width, anchor=tk.CENTER)
+        self.process_tree_view = ProcessTreeView(tree)
+
+        vsb = ttk.Scrollbar(self.process_tree_frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        tree.grid(row=0, column=0, sticky='nsew')
+        vsb.grid(row=0, column=1, sticky='ns')
+        self.process_tree_frame.grid_columnconfigure(0, weight=1)
+        self.process_tree_frame.grid_rowconfigure(0, weight=1)
+
+    def toggle_process_tree(self):
+        if self.process_tree_mode.get():
+            self.process_list_frame.grid_remove()
+            self.process_tree_frame.grid(row=1, column=0, sticky='nsew')
+        else:
+            self.process_tree_frame.grid_remove()
+            self.process_list_frame.grid()
+        self.renderer.invalidate(self.process_tab)
+        self.renderer.flush()
+
+    def schedule_filter(self):
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(self.filter_delay, self.apply_filter)
+
+    def apply_filter(self):
+        self.filter_job = None
+        try:
+            self.process_filter = ProcessFilter(self.filter_text.get())
+        except FilterError as e:
+            # Keep showing the last valid filter while the text is incomplete.
+            self.filter_status.config(text=str(e), foreground='#F48771')
+            return
+        self.filter_status.config(text="", foreground='lightgray')
+        self.renderer.invalidate(self.process_tab)
+        self.renderer.flush()
+
+    @profiled('filter_processes')
+    def filter_processes(self, rows):
+        if not self.process_filter:
+            if self.filter_status['text']:
+                self.filter_status.config(text="", foreground='lightgray')
+            return rows
+
+        # The index is only kept up to date while a filter is set; the
+        # first query after that diffs against whatever it saw last.
+        self.process_index.update(rows)
+        matched = self.process_index.query(self.process_filter)
+        status = f"{len(matched):,} of {len(rows):,} processes"
+        if self.process_tree_mode.get():
+            # Keep the path from each match up to its root.
+            by_pid = self.process_index.rows
+            shown = {proc.pid for proc in matched}
+            ancestors = []
+            for proc in matched:
+                parent = by_pid.get(proc.ppid)
+                while parent is not None and parent.pid not in shown:
+                    shown.add(parent.pid)
+                    ancestors.append(parent)
+                    parent = by_pid.get(parent.ppid)
+            matched.extend(ancestors)
+        if self.filter_status['text'] != status:
+            self.filter_status.config(text=status)
+        return matched
+
+    def selected_process(self):
+        if self.process_tree_mode.get():
+            tree, rows = self.process_tree_view.tree, self.process_tree_view
+        else:
+            tree, rows = self.process_tree, self.process_rows
+        selected = tree.selection()
+        return rows.key_for(selected[0]) if selected else None
+
+    def check_chart_modules(self):
+        if not self.chart_modules.done():
+            self.root.after(50, self.check_chart_modules)
+            return
+        self.chart_modules.result()
+        self.startup_pool.shutdown(wait=False)
+        self.perf_placeholder.destroy()
+        self.setup_performance_tab()
+        self.renderer.invalidate(self.perf_tab)
+        self.renderer.flush()
 
     def setup_performance_tab(self):
         self.perf_cards = {
-            'CPU': self.create_perf_card(self.perf_tab, "CPU", '#1F77B4'),
-            'Memory': self.create_perf_card(self.perf_tab, "Memory", '#2CA02C'),
-            'Disk': self.create_perf_card(self.perf_tab, "Disk", '#9467BD'),
+            'CPU': self.create_perf_card(self.perf_tab, "CPU", '#1F77B4', 100),
+            'Memory': self.create_perf_card(self.perf_tab, "Memory", '#2CA02C', 100),
+            'Disk': self.create_disk_card(self.perf_tab),
             'Network': self.create_perf_card(self.perf_tab, "Network", '#FF7F0E')
         }
 
         for i, card in enumerate(self.perf_cards.values()):
             card.grid(row=i//2, column=i%2, sticky='nsew', padx=10, pady=10)
+
+        self.cores_card = self.create_cores_card(self.perf_tab)
+        self.cores_card.grid(row=2, column=0, columnspan=2, sticky='nsew', padx=10, pady=10)
             
         self.perf_tab.grid_columnconfigure(0, weight=1)
         self.perf_tab.grid_columnconfigure(1, weight=1)
         self.perf_tab.grid_rowconfigure(0, weight=1)
         self.perf_tab.grid_rowconfigure(1, weight=1)
+        self.perf_tab.grid_rowconfigure(2, weight=1)
+
+    def create_disk_card(self, parent):
+        frame = ttk.Frame(parent)
+
+        header = ttk.Frame(frame)
+        header.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(header,
+                 text="Disk",
+                 font=('Segoe UI', 10, 'bold'),
+                 foreground=DEVICE_COLORS[0]).pack(side=tk.LEFT)
+
+        frame.range_var = tk.StringVar(value='1 min')
+        range_box = ttk.Combobox(header,
+                                 textvariable=frame.range_var,
+                                 values=list(TIME_RANGES),
+                                 state='readonly',
+                                 width=9)
+        range_box.pack(side=tk.RIGHT)
+        range_box.bind('<<ComboboxSelected>>', lambda e: self.update_perf_graphs())
+
+        frame.view_var = tk.StringVar(value='Throughput')
+        view_box = ttk.Combobox(header,
+                                textvariable=frame.view_var,
+                                values=list(DISK_VIEWS),
+                                state='readonly',
+                                width=10)
+        view_box.pack(side=tk.RIGHT, padx=5)
+        view_box.bind('<<ComboboxSelected>>', lambda e: self.update_perf_graphs())
+
+        # Filled with one checkbutton per device as devices show up.
+        frame.device_menu = tk.Menu(frame, tearoff=0,
+                                    bg='#252526', fg='white',
+                                    activebackground='#094771',
+                                    activeforeground='white')
+        frame.device_vars = {}
+        ttk.Menubutton(header, text="Devices",
+                       menu=frame.device_menu).pack(side=tk.RIGHT)
+
+        usage_frame = ttk.Frame(frame)
+        usage_frame.pack(fill=tk.X, pady=(5, 0))
+
+        frame.stats_label = ttk.Label(usage_frame,
+                                    text="0 B/s",
+                                    font=('Segoe UI', 16, 'bold'),
+                                    foreground=DEVICE_COLORS[0])
+        frame.stats_label.pack(side=tk.LEFT)
+
+        fig = Figure(figsize=(5, 2), dpi=100, facecolor='#1F1F1F')
+        ax = fig.add_subplot(111)
+        ax.set_facecolor('#1F1F1F')
+        ax.tick_params(axis='both', colors='white')
+        ax.set_xticks([])
+        ax.set_yticks([])
+        [spine.set_color('#404040') for spine in ax.spines.values()]
+
+        canvas = FigureCanvasTkAgg(fig, master=frame)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        frame.detail_label = ttk.Label(frame,
+                                     text="",
+                                     font=('Segoe UI', 9),
+                                     foreground='lightgray',
+                                     justify=tk.LEFT)
+        frame.detail_label.pack(fill=tk.X, pady=(5, 0))
+        frame.capacity_label = ttk.Label(frame,
+                                       text="",
+                                       font=('Segoe UI', 9),
+                                       foreground='lightgray')
+        frame.capacity_label.pack(fill=tk.X)
+
+        frame._chart = StackedChart(ax, canvas)
+        return frame
+
+    def sync_disk_devices(self, card, names):
+        for name in names:
+            if name in card.device_vars:
+                continue
+            card.device_vars[name] = tk.BooleanVar(value=True)
+            card.device_menu.add_checkbutton(label=name, variable=card.device_vars[name],
+                                             command=self.update_perf_graphs)
+
+    def create_cores_card(self, parent):
+        frame = ttk.Frame(parent)
+
+        header = ttk.Frame(frame)
+        header.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(header,
+                 text="CPU Cores",
+                 font=('Segoe UI', 10, 'bold'),
+                 foreground='#E45756').pack(side=tk.LEFT)
+        frame.stats_label = ttk.Label(header, text="", foreground='lightgray')
+        frame.stats_label.pack(side=tk.LEFT, padx=10)
+
+        frame.field_var = tk.StringVar(value='Busy')
+        field_box = ttk.Combobox(header,
+                                 textvariable=frame.field_var,
+                                 values=['Busy', 'User', 'System', 'IOWait', 'Steal'],
+                                 state='readonly',
+                                 width=9)
+        field_box.pack(side=tk.RIGHT)
+        field_box.bind('<<ComboboxSelected>>', lambda e: self.update_core_heatmap())
+
+        fig = Figure(figsize=(10, 2.4), dpi=100, facecolor='#1F1F1F')
+        ax = fig.add_subplot(111)
+        ax.set_facecolor('#1F1F1F')
+        ax.tick_params(axis='both', colors='white')
+        ax.set_xticks([])
+        [spine.set_color('#404040') for spine in ax.spines.values()]
+        fig.subplots_adjust(left=0.04, right=0.99, top=0.97, bottom=0.05)
+
+        canvas = FigureCanvasTkAgg(fig, master=frame)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+        frame.detail_label = ttk.Label(frame,
+                                     text="Collecting...",
+                                     font=('Segoe UI', 9),
+                                     foreground='lightgray')
+        frame.detail_label.pack(fill=tk.X, pady=(5, 0))
+
+        frame._chart = HeatmapChart(ax, canvas)
+        return frame
 
     def setup_system_details_tab(self):
         main_frame = ttk.Frame(self.sys_tab)
         main_frame.pack(fill=tk.BOTH, expand=True)
+
+        toolbar = ttk.Frame(main_frame)
+        toolbar.pack(side="top", fill=tk.X, padx=10, pady=(5, 0))
+        ttk.Button(toolbar, text="Refresh",
+                   command=self.refresh_system_details).pack(side=tk.RIGHT)
         
         canvas = tk.Canvas(main_frame, bg='#252526', highlightthickness=0)
         scrollbar = ttk.Scrollbar(main_frame, orient="vertical", command=canvas.yview)
@@ -274,9 +1512,13 @@ class TaskManagerStyleMonitor:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
-        sys_info = self.get_system_info()
+        # Sections are fetched the first time the tab is opened.
+        self.sys_info = SystemInfoCache()
+        self.sys_info_polling = False
+        self.sys_sections = {}
+        self.sys_rendered = {}
         
-        for category, details in sys_info.items():
+        for category in self.sys_info.titles:
             header_frame = ttk.Frame(scrollable_frame)
             header_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
             
@@ -290,79 +1532,375 @@ class TaskManagerStyleMonitor:
             
             details_frame = ttk.Frame(scrollable_frame)
             details_frame.pack(fill=tk.X, padx=10, pady=(0, 10))
-            
-            for i, (key, value) in enumerate(details.items()):
-                ttk.Label(
-                    details_frame,
-                    text=f"{key}:",
-                    font=('Segoe UI', 9),
-                    foreground='#9CDCFE',
-                    background='#252526'
-                ).grid(row=i, column=0, sticky='e', padx=(0, 5), pady=2)
-                
-                ttk.Label(
-                    details_frame,
-                    text=value,
-                    font=('Segoe UI', 9),
-                    foreground='white',
-                    background='#252526',
-                    wraplength=400
-                ).grid(row=i, column=1, sticky='w', padx=(0, 10), pady=2)
-            
             details_frame.columnconfigure(0, weight=0)
             details_frame.columnconfigure(1, weight=1)
+            
+            ttk.Label(
+                details_frame,
+                text="Loading...",
+                font=('Segoe UI', 9),
+                foreground='lightgray',
+                background='#252526'
+            ).grid(row=0, column=0, sticky='w', pady=2)
+            
+            self.sys_sections[category] = details_frame
+
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
+
+    def setup_fleet_tab(self):
+        toolbar = ttk.Frame(self.fleet_tab)
+        toolbar.pack(side="top", fill=tk.X, padx=10, pady=5)
+        ttk.Label(toolbar, text="Agent (host:port):").pack(side=tk.LEFT)
+        self.fleet_entry = ttk.Entry(toolbar, width=30)
+        self.fleet_entry.pack(side=tk.LEFT, padx=5)
+        self.fleet_entry.bind('<Return>', lambda e: self.add_fleet_host(self.fleet_entry.get()))
+        ttk.Button(toolbar, text="Add",
+                   command=lambda: self.add_fleet_host(self.fleet_entry.get())).pack(side=tk.LEFT)
+        self.fleet_summary = ttk.Label(toolbar, text="", foreground='lightgray')
+        self.fleet_summary.pack(side=tk.RIGHT)
 
-    def get_system_info(self):
-        gpu_info = "Not detected"
+        canvas = tk.Canvas(self.fleet_tab, bg='#1F1F1F', highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self.fleet_tab, orient="vertical", command=canvas.yview)
+        self.fleet_grid = ttk.Frame(canvas)
+        self.fleet_grid.bind(
+            "<Configure>",
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        )
+        canvas.create_window((0, 0), window=self.fleet_grid, anchor="nw")
+        canvas.configure(yscrollcommand=scrollbar.set)
+        canvas.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self.fleet_menu = tk.Menu(self.root, tearoff=0,
+                                  bg='#252526', fg='white',
+                                  activebackground='#094771',
+                                  activeforeground='white')
+        self.fleet_columns = 4
+        self.fleet = FleetClient().start()
+        self.fleet_state = {}
+        self.fleet_cards = {}
+        for address in self.fleet_hosts:
+            self.add_fleet_host(address)
+
+    def add_fleet_host(self, text):
         try:
-            gpus = GPUtil.getGPUs()
-            if gpus:
-                gpu_info = f"{gpus[0].name} ({gpus[0].driver})"
-        except:
-            pass
-
-        net_info = psutil.net_if_addrs()
-        net_interfaces = []
-        for interface, addrs in net_info.items():
-            for addr in addrs:
-                if addr.family == 2:  # AF_INET
-                    net_interfaces.append(f"{interface}: {addr.address}")
-
-        return {
-            "Operating System": {
-                "System": platform.system(),
-                "Node Name": platform.node(),
-                "Release": platform.release(),
-                "Version": platform.version(),
-                "Machine": platform.machine(),
-                "Processor": platform.processor()
-            },
-            "Hardware Information": {
-                "Physical Cores": str(psutil.cpu_count(logical=False)),
-                "Total Cores": str(psutil.cpu_count(logical=True)),
-                "Max Frequency": f"{psutil.cpu_freq().max:.2f} MHz",
-                "Total RAM": f"{psutil.virtual_memory().total / (1024**3):.2f} GB",
-                "GPU": gpu_info
-            },
-            "Boot Information": {
-                "Boot Time": datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S"),
-                "Up Time": str(datetime.now() - datetime.fromtimestamp(psutil.boot_time()))
-            },
-            "Network Information": {
-                "Hostname": platform.node(),
-                "IP Addresses": "\n".join(net_interfaces) if net_interfaces else "Not connected",
-                "DNS": "\n".join([f"{conn.laddr.ip}:{conn.laddr.port}" for conn in psutil.net_connections(kind='inet') if conn.status == 'LISTEN'])
-            },
-            "Disk Information": {
-                "Partitions": "\n".join([f"{part.device} ({part.mountpoint})" 
-                                       for part in psutil.disk_partitions()]),
-                "Total Space": f"{psutil.disk_usage('/').total / (1024**3):.2f} GB",
-                "Used Space": f"{psutil.disk_usage('/').used / (1024**3):.2f} GB",
-                "Free Space": f"{psutil.disk_usage('/').free / (1024**3):.2f} GB"
-            }
+            address = parse_address(text)
+        except ValueError:
+            messagebox.showerror("Error", f"Invalid agent address: {text}")
+            return
+        if address in self.fleet_state:
+            return
+        self.fleet_entry.delete(0, tk.END)
+        self.fleet_state[address] = FleetHost(address)
+        self.fleet_cards[address] = self.create_fleet_card(address)
+        self.layout_fleet_cards()
+        self.fleet.add(address)
+
+    def remove_fleet_host(self, address):
+        if self.viewed_host == address:
+            self.view_local()
+        self.fleet.remove(address)
+        del self.fleet_state[address]
+        self.fleet_cards.pop(address).destroy()
+        self.layout_fleet_cards()
+
+    def create_fleet_card(self, address):
+        card = tk.Frame(self.fleet_grid, bg='#252526', padx=8, pady=6, cursor='hand2')
+        card.title_label = tk.Label(card, text=f"{address[0]}:{address[1]}", anchor='w',
+                                    font=('Segoe UI', 10, 'bold'),
+                                    fg='#4EC9B0', bg='#252526')
+        card.title_label.pack(fill=tk.X)
+        card.stats_label = tk.Label(card, text="Connecting...", anchor='w', justify=tk.LEFT,
+                                    font=('Segoe UI', 9), fg='lightgray', bg='#252526')
+        card.stats_label.pack(fill=tk.X)
+        card.spark = tk.Canvas(card, width=180, height=36, bg='#1F1F1F',
+                               highlightthickness=0)
+        card.spark.pack(pady=(4, 0))
+        card.spark_line = card.spark.create_line(0, 36, 0, 36, fill='#1F77B4', width=1)
+
+        for widget in (card, card.title_label, card.stats_label, card.spark):
+            widget.bind('<Button-1>', lambda e, a=address: self.view_host(a))
+            widget.bind('<Button-3>', lambda e, a=address: self.show_fleet_menu(e, a))
+        return card
+
+    def layout_fleet_cards(self):
+        for i, card in enumerate(self.fleet_cards.values()):
+            card.grid(row=i // self.fleet_columns, column=i % self.fleet_columns,
+                      sticky='nsew', padx=5, pady=5)
+        self.renderer.invalidate(self.fleet_tab)
+        self.renderer.flush()
+
+    def show_fleet_menu(self, event, address):
+        self.fleet_menu.delete(0, tk.END)
+        self.fleet_menu.add_command(label="Show Details",
+                                    command=lambda: self.view_host(address))
+        self.fleet_menu.add_command(label="Remove",
+                                    command=lambda: self.remove_fleet_host(address))
+        self.fleet_menu.tk_popup(event.x_root, event.y_root)
+
+    @profiled('update_fleet_cards')
+    def update_fleet_cards(self):
+        connected = sum(host.status.connected for host in self.fleet_state.values())
+        self.fleet_summary.config(text=f"{connected} of {len(self.fleet_state)} hosts connected")
+
+        # Only cards whose host sent something since the last refresh.
+        for address, host in self.fleet_state.items():
+            if not host.changed:
+                continue
+            host.changed = False
+            card = self.fleet_cards[address]
+            card.title_label.config(text=host.label)
+            if not host.status.connected:
+                card.stats_label.config(text=f"Offline: {host.status.error}", fg='#F48771')
+                continue
+            if host.metrics is None:
+                continue
+
+            m = host.metrics
+            card.stats_label.config(
+                text=f"CPU {m.cpu_percent:.0f}% | Mem {m.mem.percent:.0f}% | Disk {m.disk.percent:.0f}%\n"
+                     f"↑ {m.net_up:.1f} KB/s | ↓ {m.net_down:.1f} KB/s",
+                fg='lightgray'
+            )
+            series = host.history['CPU'].series(60)
+            if len(series.values) > 1:
+                width = int(card.spark['width'])
+                height = int(card.spark['height'])
+                x = (series.times - series.times[-1] + 60) * (width / 60)
+                y = height - series.values * (height / 100)
+                coords = np.column_stack((x, y)).ravel().tolist()
+                card.spark.coords(card.spark_line, *coords)
+
+    def setup_alerts_tab(self):
+        toolbar = ttk.Frame(self.alerts_tab)
+        toolbar.pack(side="top", fill=tk.X, padx=10, pady=5)
+        self.alerts_summary = ttk.Label(toolbar, text="", foreground='lightgray')
+        self.alerts_summary.pack(side=tk.LEFT)
+        ttk.Button(toolbar, text="Reload Rules",
+                   command=self.reload_alert_rules).pack(side=tk.RIGHT)
+
+        panes = ttk.PanedWindow(self.alerts_tab, orient=tk.VERTICAL)
+        panes.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+        columns = {
+            'since': ('Since', 140),
+            'rule': ('Rule', 160),
+            'subject': ('Subject', 220),
+            'value': ('Value', 100),
+            'condition': ('Condition', 260)
         }
+        self.active_alerts_tree = self.create_alerts_tree(panes, columns, "Active")
+        columns = {
+            'time': ('Time', 140),
+            'state': ('State', 80),
+            'rule': ('Rule', 160),
+            'subject': ('Subject', 220),
+            'value': ('Value', 100)
+        }
+        self.alert_events_tree = self.create_alerts_tree(panes, columns, "Recent Events")
+        self.active_alerts = TreeviewReconciler(self.active_alerts_tree)
+        self.alert_events_view = TreeviewReconciler(self.alert_events_tree)
+
+    def create_alerts_tree(self, panes, columns, title):
+        frame = ttk.Frame(panes)
+        ttk.Label(frame, text=title, font=('Segoe UI', 10, 'bold'),
+                  foreground='#4EC9B0').pack(anchor='w', pady=(5, 2))
+        tree = ttk.Treeview(frame, columns=tuple(columns.keys()),
+                            show='headings', selectmode='browse', height=8)
+        for col, (text, width) in columns.items():
+            tree.heading(col, text=text)
+            tree.column(col, width=width, anchor=tk.W)
+        vsb = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=vsb.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        vsb.pack(side=tk.RIGHT, fill=tk.Y)
+        panes.add(frame, weight=1)
+        return tree
+
+    def load_alert_rules(self):
+        self.alert_error = None
+        hook = None
+        try:
+            rules, hook = load_rules(self.alerts_path)
+        except FileNotFoundError:
+            rules = [Rule.from_dict(spec) for spec in DEFAULT_RULES]
+        except (OSError, ValueError) as e:
+            self.alert_error = f"Could not load {self.alerts_path}: {e}"
+            rules = [Rule.from_dict(spec) for spec in DEFAULT_RULES]
+
+        # Rules are evaluated off the Tk thread; only the alerts that start
+        # and stop come back, through apply_alert_events.
+        if self.alert_worker is not None:
+            self.alert_worker.close()
+        self.alert_worker = AlertWorker(AlertEngine(rules))
+        self.alert_rule_count = len(rules)
+        self.alert_active = {}
+        if self.alert_hook is not None:
+            self.alert_hook.close()
+        self.alert_hook = AlertHook(hook) if hook else None
+
+    def reload_alert_rules(self):
+        self.load_alert_rules()
+        self.update_alerts_title()
+        self.renderer.invalidate(self.alerts_tab)
+        self.renderer.flush()
+
+    def check_alerts(self, sample):
+        if isinstance(sample, MetricSample):
+            self.alert_worker.submit(sample)
+        else:
+            total_memory = (self.last_live_sample.mem.total
+                            if self.last_live_sample is not None
+                            else psutil.virtual_memory().total)
+            self.alert_worker.submit(sample, total_memory)
+
+    @profiled('apply_alert_events')
+    def apply_alert_events(self):
+        changed = False
+        for item in self.alert_worker.drain():
+            if isinstance(item, Exception):
+                self.alert_error = f"Alert evaluation failed: {item}"
+                changed = True
+                continue
+            for event in item:
+                key = (event.rule.name, event.subject)
+                if event.state == 'firing':
+                    self.alert_active[key] = event
+                else:
+                    self.alert_active.pop(key, None)
+            self.alert_events.extend(item)
+            self.alert_event_count += len(item)
+            if self.alert_hook is not None:
+                self.alert_hook.notify(item)
+            changed = True
+        if changed:
+            self.update_alerts_title()
+            self.renderer.invalidate(self.alerts_tab)
+
+    def update_alerts_title(self):
+        active = len(self.alert_active)
+        self.notebook.tab(self.alerts_tab,
+                          text=f"Alerts ({active})" if active else "Alerts")
 
-    def create_perf_card(self, parent, title, color):
+    @profiled('render_alerts')
+    def render_alerts(self):
+        summary = f"{self.alert_rule_count} rules | {len(self.alert_active)} active"
+        if self.alert_worker.dropped:
+            summary += f" | {self.alert_worker.dropped} samples skipped"
+        if self.alert_hook is not None:
+            summary += f" | hook: {self.alert_hook.command}"
+        if self.alert_error:
+            summary += f" | {self.alert_error}"
+        self.alerts_summary.config(text=summary)
+
+        def when(timestamp):
+            return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
+        self.active_alerts.reconcile(
+            (key, (when(event.timestamp), event.rule.name, format_subject(event.subject),
+                   format_value(event.rule, event.value), event.rule.describe()))
+            for key, event in sorted(self.alert_active.items(),
+                                     key=lambda item: item[1].timestamp, reverse=True)
+        )
+        first = self.alert_event_count - len(self.alert_events)
+        self.alert_events_view.reconcile(
+            (first + index, (when(event.timestamp), event.state, event.rule.name,
+                             format_subject(event.subject),
+                             format_value(event.rule, event.value)))
+            for index, event in reversed(list(enumerate(self.alert_events)))
+        )
+
+    def view_host(self, address):
+        if self.replay is not None:
+            self.return_to_live()
+        if self.viewed_host is not None:
+            self.fleet.subscribe(self.viewed_host, False)
+
+        host = self.fleet_state[address]
+        self.viewed_host = address
+        self.fleet.subscribe(address)
+        self.history = host.history
+        if host.metrics is not None:
+            self.show_metrics(host.metrics)
+        self.update_host_label()
+        self.host_bar.pack(side=tk.TOP, fill=tk.X, before=self.notebook)
+        self.notebook.select(self.perf_tab)
+        self.update_process_list(host.rows)
+        self.renderer.invalidate(self.perf_tab)
+        self.renderer.flush()
+
+    def update_host_label(self):
+        host = self.fleet_state[self.viewed_host]
+        text = f"Viewing {host.label} ({host.address[0]}:{host.address[1]})"
+        if not host.status.connected:
+            text += f" - offline: {host.status.error}"
+        self.host_label.config(text=text)
+
+    def view_local(self):
+        if self.viewed_host is None:
+            return
+        self.fleet.subscribe(self.viewed_host, False)
+        self.viewed_host = None
+        self.host_bar.pack_forget()
+
+        self.history = self.live_history
+        if self.last_live_sample is not None:
+            self.show_metrics(self.last_live_sample)
+        self.update_process_list(self.live_rows)
+        self.renderer.invalidate(self.perf_tab)
+        self.renderer.flush()
+
+    def on_tab_changed(self, event):
+        if self.notebook.select() == str(self.sys_tab):
+            self.refresh_system_details()
+        self.renderer.flush()
+
+    def refresh_system_details(self):
+        if self.sys_info.refresh() and not self.sys_info_polling:
+            self.sys_info_polling = True
+            self.root.after(100, self.poll_system_details)
+
+    def poll_system_details(self):
+        if not self.running:
+            return
+        for category, details in self.sys_info.poll().items():
+            if isinstance(details, Exception):
+                details = {"Error": str(details)}
+            self.render_system_section(category, details)
+
+        if self.sys_info.loading:
+            self.root.after(100, self.poll_system_details)
+        else:
+            self.sys_info_polling = False
+
+    def render_system_section(self, category, details):
+        if self.sys_rendered.get(category) == details:
+            return
+        self.sys_rendered[category] = details
+
+        details_frame = self.sys_sections[category]
+        for child in details_frame.winfo_children():
+            child.destroy()
+            
+        for i, (key, value) in enumerate(details.items()):
+            ttk.Label(
+                details_frame,
+                text=f"{key}:",
+                font=('Segoe UI', 9),
+                foreground='#9CDCFE',
+                background='#252526'
+            ).grid(row=i, column=0, sticky='e', padx=(0, 5), pady=2)
+            
+            ttk.Label(
+                details_frame,
+                text=value,
+                font=('Segoe UI', 9),
+                foreground='white',
+                background='#252526',
+                wraplength=400
+            ).grid(row=i, column=1, sticky='w', padx=(0, 10), pady=2)
+
+    def create_perf_card(self, parent, title, color, max_limit=None):
         frame = ttk.Frame(parent)
         
         header = ttk.Frame(frame)
@@ -371,6 +1909,15 @@ class TaskManagerStyleMonitor:
                  text=title, 
                  font=('Segoe UI', 10, 'bold'), 
                  foreground=color).pack(side=tk.LEFT)
+
+        frame.range_var = tk.StringVar(value='1 min')
+        range_box = ttk.Combobox(header,
+                                 textvariable=frame.range_var,
+                                 values=list(TIME_RANGES),
+                                 state='readonly',
+                                 width=9)
+        range_box.pack(side=tk.RIGHT)
+        range_box.bind('<<ComboboxSelected>>', lambda e: self.update_perf_graphs())
         
         usage_frame = ttk.Frame(frame)
         usage_frame.pack(fill=tk.X, pady=(5, 0))
@@ -385,6 +1932,8 @@ class TaskManagerStyleMonitor:
         ax = fig.add_subplot(111)
         ax.set_facecolor('#1F1F1F')
         ax.tick_params(axis='both', colors='white')
+        ax.set_xticks([])
+        ax.set_yticks([])
         [spine.set_color('#404040') for spine in ax.spines.values()]
         
         canvas = FigureCanvasTkAgg(fig, master=frame)
@@ -400,164 +1949,481 @@ class TaskManagerStyleMonitor:
         frame._ax = ax
         frame._canvas = canvas
         frame._color = color
+        frame._chart = BlitChart(ax, canvas, color, max_limit)
         
         return frame
 
     def init_data_structures(self):
-        self.history = {
-            'CPU': [],
-            'Memory': [],
-            'Disk': [],
-            'Network_Up': [],
-            'Network_Down': []
+        self.core_history = CoreHistory()
+        self.disk_history = DiskHistory(DISK_FIELDS)
+        self.live_history = {
+            'CPU': MetricHistory(),
+            'Memory': MetricHistory(),
+            'Disk': MetricHistory(),
+            'Network_Up': MetricHistory(),
+            'Network_Down': MetricHistory()
         }
+        # The charts read self.history, which is swapped for a separate
+        # set while a recording is replayed or a remote host is shown.
+        self.history = self.live_history
+        self.replay = None
+        self.viewed_host = None
+        self.last_live_sample = None
+        self.live_rows = ()
         self.process_data = []
-        self.net_io_last = psutil.net_io_counters()
+        self.process_order = {}
+        self.process_index = ProcessIndex()
+        self.process_filter = ProcessFilter('')
+        self.filter_job = None
+        self.alert_hook = None
+        self.alert_worker = None
+        self.alert_events = deque(maxlen=500)
+        self.alert_event_count = 0
+        self.load_alert_rules()
+        self.scheduler = AdaptiveScheduler(
+            interval=self.perf_update_interval / 1000,
+            process_interval=self.process_update_interval / 1000,
+            ui_interval=self.ui_poll_interval / 1000,
+            cpu_budget=self.cpu_budget
+        )
+        self.intervals = None
+        try:
+            self.recorder = StoreWriter(MetricStore(self.history_dir))
+        except (OSError, ValueError):
+            self.recorder = None
+        self.exporter = None
+        if self.exporter_port is not None:
+            try:
+                self.exporter = MetricsExporter(port=self.exporter_port).start()
+            except OSError:
+                self.exporter = None
 
+    @profiled('update_data')
     def update_data(self):
         if not self.running:
             return
 
         try:
-            self.cpu_percent = psutil.cpu_percent()
-            self.mem = psutil.virtual_memory()
-            self.disk = psutil.disk_usage('/')
-            net_io = psutil.net_io_counters()
-            
-            self.history['CPU'].append(self.cpu_percent)
-            self.history['Memory'].append(self.mem.percent)
-            self.history['Disk'].append(self.disk.percent)
-            
-            self.net_up = (net_io.bytes_sent - self.net_io_last.bytes_sent) / 1024
-            self.net_down = (net_io.bytes_recv - self.net_io_last.bytes_recv) / 1024
-            self.net_io_last = net_io
-            self.history['Network_Up'].append(self.net_up)
-            self.history['Network_Down'].append(self.net_down)
+            metrics = None
+            processes = None
+            error = None
+            for sample in self.collector.drain():
+                if self.exporter is not None:
+                    self.exporter.publish(sample)
+                if isinstance(sample, MetricSample):
+                    self.record_metrics(sample)
+                    self.check_alerts(sample)
+                    if self.viewed_host is None:
+                        metrics = sample
+                elif isinstance(sample, ProcessSample):
+                    if self.recorder is not None:
+                        self.recorder.submit(sample)
+                    self.check_alerts(sample)
+                    self.live_rows = sample.rows
+                    if self.viewed_host is None:
+                        processes = sample
+                elif isinstance(sample, Exception):
+                    # Reported once the samples queued after it are applied.
+                    if error is None:
+                        error = sample
+            self.apply_alert_events()
 
-            for key in self.history:
-                if len(self.history[key]) > 60:
-                    self.history[key].pop(0)
+            for address, item in self.fleet.drain():
+                host = self.fleet_state.get(address)
+                if host is None:
+                    continue
+                host.apply(item)
+                self.renderer.invalidate(self.fleet_tab)
+                if address == self.viewed_host:
+                    if isinstance(item, MetricSample):
+                        self.show_metrics(item)
+                        metrics = item
+                    elif isinstance(item, ProcessSample):
+                        processes = item
+                    else:
+                        self.update_host_label()
 
-            self.update_perf_graphs()
-            
-            if len(self.history['CPU']) % 5 == 0:
-                self.update_process_list()
+            self.apply_schedule()
+
+            if self.replay is not None:
+                metrics, processes = self.replay_step()
+
+            if metrics is not None:
+                self.renderer.invalidate(self.perf_tab)
+
+            if processes is not None:
+                self.update_process_list(processes.rows)
+
+            self.renderer.flush()
+            if error is not None:
+                raise error
 
         except Exception as e:
             messagebox.showerror("Update Error", str(e))
 
         finally:
-            self.root.after(self.perf_update_interval, self.update_data)
+            self.root.after(self.ui_poll_interval, self.update_data)
+
+    def window_state(self):
+        if not self.root.winfo_viewable() or self.root.state() == 'iconic':
+            return 'minimized'
+        try:
+            focused = self.root.focus_displayof() is not None
+        except KeyError:
+            # Tk can report focus on internal widgets (e.g. a combobox popdown).
+            focused = True
+        return 'focused' if focused else 'unfocused'
+
+    def apply_schedule(self):
+        intervals = self.scheduler.intervals(self.window_state())
+        if intervals == self.intervals:
+            return
+        self.intervals = intervals
+        self.collector.set_intervals(intervals.metric, intervals.process)
+        self.ui_poll_interval = max(int(intervals.ui * 1000), 1)
+
+    def record_metrics(self, sample):
+        self.scheduler.observe(sample)
+        if self.recorder is not None:
+            self.recorder.submit(sample)
+
+        ts = sample.timestamp
+        self.live_history['CPU'].append(ts, sample.cpu_percent)
+        self.live_history['Memory'].append(ts, sample.mem.percent)
+        self.live_history['Disk'].append(ts, sample.disk.percent)
+        self.live_history['Network_Up'].append(ts, sample.net_up)
+        self.live_history['Network_Down'].append(ts, sample.net_down)
+        if sample.cores is not None:
+            self.core_history.append(ts, sample.cores)
+        if sample.disks is not None:
+            self.disk_history.append(ts, *sample.disks)
+
+        self.last_live_sample = sample
+        if self.replay is None and self.viewed_host is None:
+            self.show_metrics(sample)
+
+    def show_metrics(self, sample):
+        self.cpu_percent = sample.cpu_percent
+        self.mem = sample.mem
+        self.disk = sample.disk
+        self.net_up = sample.net_up
+        self.net_down = sample.net_down
+
+    def open_recording(self):
+        directory = filedialog.askdirectory(
+            title="Open Recording",
+            initialdir=os.path.dirname(self.history_dir),
+            mustexist=True
+        )
+        if not directory:
+            return
+        self.view_local()
+        try:
+            store = MetricStore(directory, readonly=True)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Could not open recording: {e}")
+            return
+        if store.time_range() is None:
+            store.close()
+            messagebox.showerror("Error", "The recording is empty.")
+            return
+
+        if self.replay is not None:
+            self.replay.store.close()
+        self.replay = Replay(store, speed=int(self.replay_speed.get().rstrip('x')))
+        self.replay_scale.configure(from_=self.replay.start, to=self.replay.end)
+        self.replay_button.config(text="Pause")
+        self.replay_bar.pack(side=tk.BOTTOM, fill=tk.X, before=self.notebook)
+
+    def return_to_live(self):
+        if self.replay is None:
+            return
+        self.replay.store.close()
+        self.replay = None
+        self.replay_bar.pack_forget()
+
+        self.history = self.live_history
+        if self.last_live_sample is not None:
+            self.show_metrics(self.last_live_sample)
+        self.update_process_list(self.live_rows)
+        self.renderer.invalidate(self.perf_tab)
+        self.renderer.flush()
 
+    def toggle_replay(self):
+        self.replay.toggle()
+        self.replay_button.config(text="Pause" if self.replay.playing else "Play")
+
+    def start_scrub(self, event):
+        self.replay_dragging = True
+
+    def end_scrub(self, event):
+        self.replay_dragging = False
+        self.replay.seek(self.replay_position.get())
+
+    @profiled('replay_step')
+    def replay_step(self):
+        records, reset = self.replay.advance()
+        if reset:
+            self.history = {key: MetricHistory() for key in self.live_history}
+
+        if len(records):
+            ts = records['ts']
+            self.history['CPU'].extend(ts, records['cpu'])
+            self.history['Memory'].extend(ts, records['memory'])
+            self.history['Disk'].extend(ts, records['disk'])
+            self.history['Network_Up'].extend(ts, records['net_up'])
+            self.history['Network_Down'].extend(ts, records['net_down'])
+
+            last = records[-1]
+            self.cpu_percent = float(last['cpu'])
+            self.mem = Usage(float(last['memory']))
+            self.disk = Usage(float(last['disk']))
+            self.net_up = float(last['net_up'])
+            self.net_down = float(last['net_down'])
+
+        if not self.replay_dragging:
+            self.replay_position.set(self.replay.position)
+        self.replay_time_label.config(text=time.strftime(
+            "%Y-%m-%d %H:%M:%S", time.localtime(self.replay.position)))
+        if self.replay.finished and self.replay.playing:
+            self.toggle_replay()
+
+        metrics = True if len(records) or reset else None
+        return metrics, self.replay.processes()
+
+    @profiled('update_perf_graphs')
     def update_perf_graphs(self):
+        cores = self.hardware['logical_cores']
+        if self.viewed_host is not None:
+            info = self.fleet_state[self.viewed_host].info
+            cores = info.logical_cores if info is not None else '?'
+
         for card_name, card in self.perf_cards.items():
-            ax = card._ax
-            ax.clear()
+            span = TIME_RANGES[card.range_var.get()]
             
             if card_name == 'CPU':
-                values = self.history['CPU']
+                series = self.history['CPU'].series(span)
                 current_value = self.cpu_percent
                 unit = '%'
-                detail_text = f"Cores: {psutil.cpu_count()} | Usage: {current_value:.1f}%"
+                detail_text = f"Cores: {cores} | Usage: {current_value:.1f}%"
             elif card_name == 'Memory':
-                values = self.history['Memory']
+                series = self.history['Memory'].series(span)
                 current_value = self.mem.percent
                 unit = '%'
                 detail_text = f"Used: {self.mem.used//(1024**3)}GB / {self.mem.total//(1024**3)}GB | {current_value:.1f}%"
+                if self.replay is not None:
+                    detail_text = f"Recorded | {current_value:.1f}%"
             elif card_name == 'Disk':
-                values = self.history['Disk']
-                current_value = self.disk.percent
-                unit = '%'
-                detail_text = f"Used: {self.disk.used//(1024**3)}GB / {self.disk.total//(1024**3)}GB | {current_value:.1f}%"
+                self.update_disk_card(card, span)
+                continue
             elif card_name == 'Network':
-                values = self.history['Network_Up']
+                series = self.history['Network_Up'].series(span)
                 current_value = self.net_up
                 unit = ' KB/s'
                 detail_text = f"↑ {self.net_up:.1f} KB/s | ↓ {self.net_down:.1f} KB/s"
             
-            color = card._color
-            
-            if values:
-                ax.plot(values, color=color, linewidth=1.5, alpha=0.8)
-                ax.fill_between(range(len(values)), values, color=color, alpha=0.2)
-                
-                ax.set_ylim(0, max(values) * 1.2 if max(values) > 0 else 100)
-                ax.set_xticks([])
-                ax.set_yticks([])
+            if len(series.values):
+                card._chart.update(series.times - series.times[-1], series.values, span)
                 
                 card.stats_label.config(text=f"{current_value:.1f}{unit}")
                 card.detail_label.config(text=detail_text)
-            
-            card._canvas.draw()
 
+        if self.perf_cards:
+            self.update_core_heatmap()
+
+    @profiled('update_disk_card')
+    def update_disk_card(self, card, span):
+        sample = self.last_live_sample
+        if (self.replay is not None or self.viewed_host is not None
+                or sample is None or sample.disks is None):
+            # Recordings and agents only carry how full the root
+            # filesystem is.
+            series = self.history['Disk'].series(span)
+            card.capacity_label.config(text="")
+            if not len(series.values):
+                # Nothing recorded yet; drop the per-device layers of the
+                # live view.
+                card._chart.update(np.zeros(0), [], span)
+                card.stats_label.config(text="-")
+                card.detail_label.config(text="Root filesystem")
+                return
+            card._chart.update(series.times - series.times[-1], [series.values], span,
+                               labels=['/'], max_limit=100)
+            card.stats_label.config(text=f"{self.disk.percent:.1f}%")
+            card.detail_label.config(text=f"Root filesystem | {self.disk.percent:.1f}% full")
+            return
+
+        disks = sample.disks
+        self.sync_disk_devices(card, disks.names)
+        selected = [(index, name) for index, name in enumerate(disks.names)
+                    if card.device_vars[name].get() and name in self.disk_history.devices]
+        view = card.view_var.get()
+        fields, stacked = DISK_VIEWS[view]
+
+        layers = []
+        for _, name in selected:
+            parts = [self.disk_history.series(name, field, span) for field in fields]
+            values = parts[0].values.astype('f8')
+            for part in parts[1:]:
+                values += part.values
+            layers.append((parts[0].times, values))
+        # Devices seen at different times (or read from different tiers)
+        # have different timestamps; put them all on the union of those,
+        # with NaN where a device has no data.
+        times = np.unique(np.concatenate([t for t, _ in layers])) if layers else np.zeros(0)
+        if not len(times):
+            card._chart.update(np.zeros(0), [], span)
+        else:
+            layers = [np.interp(times, t, values, left=np.nan, right=np.nan) if len(t)
+                      else np.full(len(times), np.nan) for t, values in layers]
+            card._chart.update(times - times[-1], layers, span,
+                               labels=[name for _, name in selected], stacked=stacked)
+
+        columns = [DISK_FIELDS.index(field) for field in fields]
+        current = disks.values[[index for index, _ in selected]][:, columns].sum(axis=1)
+        if view == 'Await':
+            stats = f"{current.max():.1f} ms" if len(current) else "-"
+        elif view == 'IOPS':
+            stats = f"{current.sum():.0f} IOPS"
+        else:
+            stats = format_rate(float(current.sum()))
+        card.stats_label.config(text=stats)
+
+        lines = []
+        for index, name in selected:
+            read, write, read_iops, write_iops, wait = disks.values[index].tolist()
+            lines.append(f"{name}: R {format_rate(read)} | W {format_rate(write)} | "
+                         f"{read_iops + write_iops:.0f} IOPS | await {wait:.1f} ms")
+        card.detail_label.config(text="\n".join(lines) or "No devices selected")
+        card.capacity_label.config(text=" | ".join(
+            f"{part.mountpoint} {part.percent:.0f}% of {part.total / (1024**3):.0f}GB"
+            for part in sample.partitions or ()
+        ))
+
+    @profiled('update_core_heatmap')
+    def update_core_heatmap(self):
+        card = self.cores_card
+        if self.replay is not None or self.viewed_host is not None:
+            card.detail_label.config(text="Per-core data is only shown for this computer's live view")
+            return
+        latest = self.core_history.latest()
+        if latest is None:
+            return
+
+        field = CORE_FIELDS.index(card.field_var.get().lower())
+        window = self.core_history.window(HEATMAP_SAMPLES, field)
+        card._chart.update(*fold_cores(heatmap_frame(window)))
+
+        average = latest.mean(axis=0)
+        card.stats_label.config(
+            text=f"{len(latest)} cores | user {average[1]:.0f}% | system {average[2]:.0f}% "
+                 f"| iowait {average[3]:.0f}% | steal {average[4]:.0f}%"
+        )
+
+        busy = latest[:, 0]
+        hottest = int(busy.argmax())
+        _, user, system, iowait, steal = latest[hottest]
+        detail_text = (f"Hottest: core {hottest} at {busy[hottest]:.0f}% "
+                       f"(user {user:.0f} / sys {system:.0f} / iowait {iowait:.0f} / steal {steal:.0f})")
+        pinned = pinned_cores(self.core_history.window(PINNED_SAMPLES))
+        if len(pinned):
+            listed = ", ".join(map(str, pinned[:8])) + (", ..." if len(pinned) > 8 else "")
+            detail_text += (f" | Pinned (≥{PINNED_PERCENT}% for {PINNED_SAMPLES} samples): "
+                            f"{len(pinned)} - {listed}")
+        card.detail_label.config(text=detail_text)
+
+    @profiled('sort_processes')
     def sort_processes(self, column):
         if self.sort_column == column:
             self.sort_reverse = not self.sort_reverse
         else:
             self.sort_column = column
             self.sort_reverse = False
-            
-        items = [(self.process_tree.set(child, column), child) 
-                for child in self.process_tree.get_children('')]
-        
-        if column in ['cpu', 'memory', 'pid']:
-            items.sort(key=lambda x: float(x[0].strip('%')) if '%' in x[0] else int(x[0]),
-                      reverse=self.sort_reverse)
-        else:
-            items.sort(key=lambda x: x[0].lower(), reverse=self.sort_reverse)
-        
+
         for col in self.process_tree['columns']:
             self.process_tree.heading(col, text=self.process_tree.heading(col)['text'].rstrip(' ↑↓'))
         self.process_tree.heading(column, 
                                 text=f"{self.process_tree.heading(column)['text']} {'↓' if self.sort_reverse else '↑'}")
-        
-        for index, (_, child) in enumerate(items):
-            self.process_tree.move(child, '', index)
 
-    def update_process_list(self):
-        current_processes = {}
-        for proc in psutil.process_iter(['pid', 'name', 'status', 'cpu_percent', 'memory_percent']):
-            try:
-                current_processes[proc.info['pid']] = proc.info
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
+        self.render_process_list()
 
-        for child in self.process_tree.get_children():
-            pid = int(self.process_tree.item(child)['values'][1])
-            if pid in current_processes:
-                proc = current_processes[pid]
-                self.process_tree.item(child, values=(
-                    proc['name'], 
-                    proc['pid'], 
-                    proc['status'], 
-                    f"{proc['cpu_percent']:.1f}%",
-                    f"{proc['memory_percent']:.1f}%",
-                    "0.0",
-                    "0.0"
-                ))
-                del current_processes[pid]
-
-        for pid, proc in current_processes.items():
-            self.process_tree.insert('', 'end', values=(
-                proc['name'], 
-                proc['pid'], 
-                proc['status'], 
-                f"{proc['cpu_percent']:.1f}%",
-                f"{proc['memory_percent']:.1f}%",
-                "0.0", 
-                "0.0"
-            ))
+    def order_processes(self, rows):
+        if self.sort_column not in PROCESS_SORT_KEYS:
+            return list(rows)
+
+        # Start from the previous display order so equal keys keep their
+        # place and an unchanged table sorts to exactly the same order.
+        previous = self.process_order
+        ordered = sorted(rows, key=lambda proc: previous.get(proc.pid, len(previous)))
+        ordered.sort(key=PROCESS_SORT_KEYS[self.sort_column], reverse=self.sort_reverse)
+        self.process_order = {proc.pid: index for index, proc in enumerate(ordered)}
+        return ordered
+
+    @profiled('update_process_list')
+    def update_process_list(self, rows):
+        self.process_data = rows
+        self.use_virtual_list(len(rows))
+        self.renderer.invalidate(self.process_tab)
+
+    def use_virtual_list(self, process_count):
+        """Switch between the reconciled and the virtual process list."""
+        if self.virtual_list:
+            enabled = process_count >= VIRTUAL_LIST_THRESHOLD * 3 // 4
+        else:
+            enabled = process_count > VIRTUAL_LIST_THRESHOLD
+        if enabled == self.virtual_list:
+            return
+
+        tree = self.process_tree
+        if self.virtual_list:
+            self.process_rows.close()
+            self.process_rows = TreeviewReconciler(tree)
+        else:
+            selected = tree.selection()
+            selected_pid = self.process_rows.key_for(selected[0]) if selected else None
+            if self.process_rows.items:
+                tree.delete(*self.process_rows.items.values())
+            self.process_rows = VirtualProcessList(tree, self.process_vsb,
+                                                   selected_pid=selected_pid)
+        self.virtual_list = enabled
+
+    @profiled('render_process_list')
+    def render_process_list(self):
+        rows = self.filter_processes(self.process_data)
+        if self.process_tree_mode.get():
+            # The tree diffs against the table it last saw, so skipped
+            # refreshes while the list was shown cost nothing here.
+            self.process_tree_view.update(rows)
+            return
+
+        rows = self.order_processes(rows)
+        if self.virtual_list:
+            self.process_rows.update(rows)
+            return
+
+        self.process_rows.reconcile(
+            (proc.pid, format_process_row(proc)) for proc in rows
+        )
+
+    def showing_live_processes(self):
+        # Recorded and remote PIDs may belong to an unrelated local process.
+        return self.replay is None and self.viewed_host is None
 
     def show_context_menu(self, event):
-        item = self.process_tree.identify_row(event.y)
+        item = event.widget.identify_row(event.y)
         if item:
-            self.process_tree.selection_set(item)
+            event.widget.selection_set(item)
+            self.context_menu.entryconfigure(
+                "End Task", state=tk.NORMAL if self.showing_live_processes() else tk.DISABLED)
             self.context_menu.tk_popup(event.x_root, event.y_root)
 
     def end_process(self):
-        selected = self.process_tree.selection()
-        if selected:
-            pid = int(self.process_tree.item(selected[0], 'values')[1])
+        if not self.showing_live_processes():
+            messagebox.showinfo("End Task",
+                                "Processes can only be ended in this computer's live view.")
+            return
+        pid = self.selected_process()
+        if pid is not None:
             try:
                 p = psutil.Process(pid)
                 p.terminate()
@@ -566,6 +2432,18 @@ class TaskManagerStyleMonitor:
 
     def on_close(self):
         self.running = False
+        self.collector.stop()
+        self.sys_info.shutdown()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.replay is not None:
+            self.replay.store.close()
+        if self.exporter is not None:
+            self.exporter.stop()
+        self.fleet.stop()
+        self.alert_worker.close()
+        if self.alert_hook is not None:
+            self.alert_hook.close()
         self.root.destroy()
 
 if __name__ == "__main__":
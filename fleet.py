@@ -0,0 +1,171 @@
+import asyncio
+import queue
+import threading
+from collections import namedtuple
+
+from agent import (DEFAULT_PORT, HELLO, METRICS, PROCESS_KEYFRAME, PROCESS_DELTA,
+                   SUBSCRIBE, HostInfo, ProcessTable, decode_hello, decode_metrics,
+                   decode_rows, frame, read_frame)
+from collector import MetricSample, ProcessSample
+from history import MetricHistory
+
+HISTORY_KEYS = ('CPU', 'Memory', 'Disk', 'Network_Up', 'Network_Down')
+
+HostStatus = namedtuple('HostStatus', ['connected', 'error'])
+
+
+def parse_address(text):
+    host, _, port = text.strip().rpartition(':')
+    if not host:
+        return text.strip(), DEFAULT_PORT
+    return host.strip('[]'), int(port)
+
+
+class FleetClient:
+    """Connections to many agents, all on one asyncio loop in a daemon thread.
+
+    Everything received is put on ``updates`` as ``(address, item)``,
+    where item is a HostInfo, HostStatus, MetricSample or ProcessSample,
+    for the UI thread to ``drain``. Process tables are only requested
+    from subscribed hosts, so an overview of many hosts costs one small
+    metrics frame per host per sample. Lost connections are retried
+    every ``reconnect_delay`` seconds.
+    """
+
+    def __init__(self, reconnect_delay=2.0, connect_timeout=5.0):
+        self.reconnect_delay = reconnect_delay
+        self.connect_timeout = connect_timeout
+        self.updates = queue.SimpleQueue()
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever,
+                                        name='fleet-client', daemon=True)
+        self._tasks = {}
+        self._writers = {}
+        self._subscribed = set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=1.0):
+        def shutdown():
+            for task in self._tasks.values():
+                task.cancel()
+            self._loop.call_soon(self._loop.stop)
+        self._loop.call_soon_threadsafe(shutdown)
+        self._thread.join(timeout)
+
+    def add(self, address):
+        self._loop.call_soon_threadsafe(self._add, address)
+
+    def remove(self, address):
+        self._loop.call_soon_threadsafe(self._remove, address)
+
+    def subscribe(self, address, enabled=True):
+        self._loop.call_soon_threadsafe(self._subscribe, address, enabled)
+
+    def drain(self):
+        items = []
+        while True:
+            try:
+                items.append(self.updates.get_nowait())
+            except queue.Empty:
+                return items
+
+    def _add(self, address):
+        if address not in self._tasks:
+            self._tasks[address] = self._loop.create_task(self._connect_forever(address))
+
+    def _remove(self, address):
+        task = self._tasks.pop(address, None)
+        if task is not None:
+            task.cancel()
+        self._subscribed.discard(address)
+
+    def _subscribe(self, address, enabled):
+        if enabled:
+            self._subscribed.add(address)
+        else:
+            self._subscribed.discard(address)
+        writer = self._writers.get(address)
+        if writer is not None:
+            writer.write(frame(SUBSCRIBE, b'\x01' if enabled else b'\x00'))
+
+    async def _connect_forever(self, address):
+        while True:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(*address),
+                                                        self.connect_timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                error = str(e) or "connection timed out"
+            else:
+                self._writers[address] = writer
+                try:
+                    await self._receive(address, reader, writer)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    error = "connection closed"
+                except Exception as e:
+                    # Anything a malformed frame raises while decoding
+                    # (struct.error, KeyError, TypeError, ...) must not
+                    # end the reconnect loop.
+                    error = f"bad frame: {e or type(e).__name__}"
+                finally:
+                    self._writers.pop(address, None)
+                    writer.close()
+            self.updates.put((address, HostStatus(False, error)))
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _receive(self, address, reader, writer):
+        table = ProcessTable()
+        if address in self._subscribed:
+            writer.write(frame(SUBSCRIBE, b'\x01'))
+        self.updates.put((address, HostStatus(True, None)))
+
+        while True:
+            kind, payload = await read_frame(reader)
+            if kind == METRICS:
+                self.updates.put((address, decode_metrics(payload)))
+            elif kind in (PROCESS_KEYFRAME, PROCESS_DELTA):
+                timestamp, changed, removed = decode_rows(payload)
+                sample = table.apply(timestamp, changed, removed,
+                                     reset=kind == PROCESS_KEYFRAME)
+                if address in self._subscribed:
+                    self.updates.put((address, sample))
+            elif kind == HELLO:
+                self.updates.put((address, decode_hello(payload)))
+
+
+class FleetHost:
+    """What the dashboard knows about one remote host."""
+
+    def __init__(self, address):
+        self.address = address
+        self.info = None
+        self.status = HostStatus(False, "connecting")
+        self.history = {key: MetricHistory() for key in HISTORY_KEYS}
+        self.metrics = None
+        self.rows = ()
+        self.changed = True
+
+    @property
+    def label(self):
+        if self.info is not None:
+            return self.info.hostname
+        return f"{self.address[0]}:{self.address[1]}"
+
+    def apply(self, item):
+        if isinstance(item, MetricSample):
+            self.metrics = item
+            ts = item.timestamp
+            self.history['CPU'].append(ts, item.cpu_percent)
+            self.history['Memory'].append(ts, item.mem.percent)
+            self.history['Disk'].append(ts, item.disk.percent)
+            self.history['Network_Up'].append(ts, item.net_up)
+            self.history['Network_Down'].append(ts, item.net_down)
+        elif isinstance(item, ProcessSample):
+            self.rows = item.rows
+        elif isinstance(item, HostInfo):
+            self.info = item
+        elif isinstance(item, HostStatus):
+            self.status = item
+        self.changed = True
@@ -0,0 +1,186 @@
+"""Headless collector: streams metrics as JSON lines without any GUI.
+
+    python headless.py --interval 0.1 --process-interval 0.1 -o metrics.jsonl
+
+Each line is one record with a ``type`` of ``metrics`` or ``processes``.
+Process tables are written column-wise to keep lines compact.
+"""
+import argparse
+import json
+import queue
+import sys
+import time
+
+from collector import MetricsCollector, MetricSample, ProcessSample, ProcessRow
+from tsstore import MetricStore, StoreWriter
+from exporter import MetricsExporter
+
+encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def metric_record(sample):
+    return {
+        'type': 'metrics',
+        'ts': sample.timestamp,
+        'cpu_percent': sample.cpu_percent,
+        'mem_percent': sample.mem.percent,
+        'mem_used': sample.mem.used,
+        'mem_total': sample.mem.total,
+        'disk_percent': sample.disk.percent,
+        'disk_used': sample.disk.used,
+        'disk_total': sample.disk.total,
+        'net_up_kbs': round(sample.net_up, 3),
+        'net_down_kbs': round(sample.net_down, 3),
+    }
+
+
+def process_record(sample):
+    columns = zip(*sample.rows) if sample.rows else ([] for _ in ProcessRow._fields)
+    return {
+        'type': 'processes',
+        'ts': sample.timestamp,
+        'columns': dict(zip(ProcessRow._fields, map(list, columns))),
+    }
+
+
+def serialize(sample):
+    if isinstance(sample, MetricSample):
+        return encoder.encode(metric_record(sample))
+    if isinstance(sample, ProcessSample):
+        return encoder.encode(process_record(sample))
+    return encoder.encode({'type': 'error', 'ts': time.time(), 'error': str(sample)})
+
+
+class JsonLinesWriter:
+    """Buffers serialized records and writes them out in batches."""
+
+    def __init__(self, stream, flush_interval=1.0):
+        self.stream = stream
+        self.flush_interval = flush_interval
+        self.lines = []
+        self.last_flush = time.monotonic()
+
+    def add(self, sample):
+        self.lines.append(serialize(sample))
+
+    def due(self):
+        return time.monotonic() - self.last_flush >= self.flush_interval
+
+    def flush(self):
+        if self.lines:
+            self.lines.append('')
+            self.stream.write('\n'.join(self.lines))
+            self.stream.flush()
+            self.lines = []
+        self.last_flush = time.monotonic()
+
+
+def run(collector, writer, count=None, duration=None, recorder=None, exporter=None):
+    """Pump samples from ``collector`` into ``writer`` until done.
+
+    Samples are also handed to ``recorder`` (a StoreWriter) and
+    ``exporter`` (a MetricsExporter) when given.
+
+    Stops after ``count`` metric samples or ``duration`` seconds, or on
+    Ctrl+C; whatever is buffered is flushed on the way out.
+    """
+    collector.start()
+    deadline = time.monotonic() + duration if duration else None
+    written = 0
+    try:
+        while count is None or written < count:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            try:
+                sample = collector.samples.get(timeout=writer.flush_interval)
+            except queue.Empty:
+                sample = None
+            if sample is not None:
+                writer.add(sample)
+                if recorder is not None:
+                    recorder.submit(sample)
+                if exporter is not None:
+                    exporter.publish(sample)
+                if isinstance(sample, MetricSample):
+                    written += 1
+            if writer.due():
+                writer.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+        writer.flush()
+        if recorder is not None:
+            recorder.close()
+        if exporter is not None:
+            exporter.stop()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-o', '--output', default='-',
+                        help="file to append JSON lines to (default: stdout)")
+    parser.add_argument('--interval', type=float, default=1.0,
+                        help="seconds between metric samples (default: 1.0)")
+    parser.add_argument('--process-interval', type=float, default=2.0,
+                        help="seconds between process scans (default: 2.0)")
+    parser.add_argument('--source', choices=('psutil', 'procfs'), default='psutil',
+                        help="process data source (default: psutil)")
+    parser.add_argument('--flush-interval', type=float, default=1.0,
+                        help="seconds between writes to the output (default: 1.0)")
+    parser.add_argument('--record', metavar='DIR',
+                        help="also append samples to an on-disk history store in DIR")
+    parser.add_argument('--http-port', type=int,
+                        help="serve /metrics (Prometheus) and /metrics.json on this port")
+    parser.add_argument('--http-host', default='127.0.0.1',
+                        help="address for --http-port to listen on (default: 127.0.0.1)")
+    parser.add_argument('--top', type=int, default=10,
+                        help="processes exported over HTTP, by CPU (default: 10)")
+    parser.add_argument('--count', type=int,
+                        help="exit after this many metric samples")
+    parser.add_argument('--duration', type=float,
+                        help="exit after this many seconds")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    collector = MetricsCollector(
+        interval=args.interval,
+        process_interval=args.process_interval,
+        process_source=args.source,
+        # Room for over an hour of samples at the default intervals
+        # before a stalled output makes the collector drop the oldest.
+        maxsize=8192
+    )
+    if args.output == '-':
+        stream = sys.stdout
+    else:
+        stream = open(args.output, 'a', buffering=1 << 16)
+    recorder = None
+    if args.record:
+        try:
+            recorder = StoreWriter(MetricStore(args.record))
+        except (OSError, ValueError) as e:
+            sys.exit(f"Cannot record to {args.record}: {e}")
+    exporter = None
+    if args.http_port is not None:
+        try:
+            exporter = MetricsExporter(args.http_host, args.http_port, args.top).start()
+        except OSError as e:
+            if recorder is not None:
+                recorder.close()
+            if stream is not sys.stdout:
+                stream.close()
+            sys.exit(f"Cannot serve metrics on {args.http_host}:{args.http_port}: {e}")
+    try:
+        run(collector, JsonLinesWriter(stream, args.flush_interval),
+            count=args.count, duration=args.duration, recorder=recorder,
+            exporter=exporter)
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+
+if __name__ == "__main__":
+    main()
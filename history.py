@@ -0,0 +1,290 @@
+from collections import namedtuple
+
+import numpy as np
+
+Series = namedtuple('Series', ['times', 'values', 'low', 'high'])
+
+# (bucket seconds, number of buckets); the first tier keeps raw samples.
+DEFAULT_TIERS = (
+    (1, 600),      # 1 s raw for 10 minutes
+    (10, 1080),    # 10 s min/avg/max for 3 hours
+    (60, 1440),    # 1 min min/avg/max for 24 hours
+)
+
+TIME_RANGES = {
+    '1 min': 60,
+    '10 min': 600,
+    '3 hours': 3 * 3600,
+    '24 hours': 24 * 3600,
+}
+
+
+class RingBuffer:
+    """Fixed number of values, or of fixed-``shape`` arrays, oldest first."""
+
+    def __init__(self, capacity, dtype='f8', shape=()):
+        self.capacity = capacity
+        self._data = np.zeros((capacity,) + tuple(shape), dtype=dtype)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def append(self, value):
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def extend(self, values):
+        values = np.asarray(values)[-self.capacity:]
+        n = len(values)
+        first = min(n, self.capacity - self._next)
+        self._data[self._next:self._next + first] = values[:first]
+        self._data[:n - first] = values[first:]
+        self._next = (self._next + n) % self.capacity
+        self._count = min(self.capacity, self._count + n)
+
+    def first(self):
+        if not self._count:
+            return None
+        return self._data[(self._next - self._count) % self.capacity].item()
+
+    def last(self):
+        if not self._count:
+            return None
+        return self._data[self._next - 1].item()
+
+    def latest(self):
+        """The newest entry as an array view, for buffers with a shape."""
+        if not self._count:
+            return None
+        return self._data[self._next - 1]
+
+    def values(self, last=None):
+        n = self._count if last is None else min(last, self._count)
+        start = (self._next - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[start:start + n].copy()
+        return np.concatenate((self._data[start:], self._data[:self._next]))
+
+
+class Tier:
+    def __init__(self, step, capacity, rollup):
+        self.step = step
+        self.capacity = capacity
+        self.rollup = rollup
+        self.times = RingBuffer(capacity, 'f8')
+        self.avg = RingBuffer(capacity, 'f4')
+        if rollup:
+            self.min = RingBuffer(capacity, 'f4')
+            self.max = RingBuffer(capacity, 'f4')
+        self._bucket = None
+        self._sum = 0.0
+        self._count = 0
+        self._low = 0.0
+        self._high = 0.0
+
+    @property
+    def span(self):
+        return self.step * self.capacity
+
+    def covers(self, span):
+        """Whether the buffered data reaches back ``span`` seconds.
+
+        A full tier fed faster than once per ``step`` (the raw tier while
+        sampling is sped up) holds less than its nominal span.
+        """
+        if len(self.times) < self.capacity:
+            return True
+        return self.times.last() - self.times.first() + self.step >= span
+
+    @property
+    def nbytes(self):
+        buffers = [self.times, self.avg]
+        if self.rollup:
+            buffers += [self.min, self.max]
+        return sum(buf.nbytes for buf in buffers)
+
+    def add(self, timestamp, value):
+        if not self.rollup:
+            self.times.append(timestamp)
+            self.avg.append(value)
+            return
+
+        bucket = int(timestamp // self.step)
+        if self._count and bucket != self._bucket:
+            self._flush()
+        if not self._count:
+            self._bucket = bucket
+            self._low = self._high = value
+        self._sum += value
+        self._count += 1
+        self._low = min(self._low, value)
+        self._high = max(self._high, value)
+
+    def extend(self, times, values):
+        """Vectorized ``add`` for a time-ordered batch of samples."""
+        if not len(times):
+            return
+        if not self.rollup:
+            self.times.extend(times)
+            self.avg.extend(values)
+            return
+
+        buckets = (times // self.step).astype(np.int64)
+        if self._count and buckets[0] != self._bucket:
+            self._flush()
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        counts = np.diff(np.r_[starts, len(values)])
+        sums = np.add.reduceat(values, starts).astype('f8')
+        lows = np.minimum.reduceat(values, starts)
+        highs = np.maximum.reduceat(values, starts)
+
+        if self._count:
+            # The first group continues the bucket that is being filled.
+            sums[0] += self._sum
+            counts[0] += self._count
+            lows[0] = min(lows[0], self._low)
+            highs[0] = max(highs[0], self._high)
+
+        done = len(starts) - 1
+        if done:
+            self.times.extend(buckets[starts[:done]] * self.step)
+            self.avg.extend(sums[:done] / counts[:done])
+            self.min.extend(lows[:done])
+            self.max.extend(highs[:done])
+
+        # The last group stays open, it may still receive samples.
+        self._bucket = int(buckets[starts[-1]])
+        self._sum = float(sums[-1])
+        self._count = int(counts[-1])
+        self._low = float(lows[-1])
+        self._high = float(highs[-1])
+
+    def _flush(self):
+        self.times.append(self._bucket * self.step)
+        self.avg.append(self._sum / self._count)
+        self.min.append(self._low)
+        self.max.append(self._high)
+        self._sum = 0.0
+        self._count = 0
+
+    def series(self):
+        times = self.times.values()
+        values = self.avg.values()
+        if not self.rollup:
+            return Series(times, values, values, values)
+
+        low = self.min.values()
+        high = self.max.values()
+        if self._count:
+            # Include the bucket still being filled so the newest data shows.
+            times = np.append(times, self._bucket * self.step)
+            values = np.append(values, self._sum / self._count)
+            low = np.append(low, self._low)
+            high = np.append(high, self._high)
+        return Series(times, values, low, high)
+
+
+class MetricHistory:
+    """Fixed-size history of one metric with min/avg/max rollup tiers."""
+
+    def __init__(self, tiers=DEFAULT_TIERS):
+        self.tiers = [Tier(step, capacity, rollup=index > 0)
+                      for index, (step, capacity) in enumerate(tiers)]
+
+    def __len__(self):
+        return len(self.tiers[0].times)
+
+    @property
+    def nbytes(self):
+        return sum(tier.nbytes for tier in self.tiers)
+
+    def append(self, timestamp, value):
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+
+    def extend(self, times, values):
+        for tier in self.tiers:
+            tier.extend(times, values)
+
+    def last(self):
+        return self.tiers[0].avg.last()
+
+    def series(self, span):
+        tier = next((t for t in self.tiers if t.span >= span and t.covers(span)),
+                    self.tiers[-1])
+        series = tier.series()
+        if not len(series.times):
+            return series
+        start = np.searchsorted(series.times, series.times[-1] - span, side='right')
+        return Series(*(column[start:] for column in series))
+
+
+class CoreHistory:
+    """Per-core CPU samples in one 2-D ring of (cores, CORE_FIELDS) rows.
+
+    The core count is taken from the first sample; a sample with a
+    different count (CPUs hot-plugged) starts the history over.
+    """
+
+    def __init__(self, capacity=600):
+        self.capacity = capacity
+        self.times = None
+        self.cores = None
+
+    def __len__(self):
+        return 0 if self.times is None else len(self.times)
+
+    def append(self, timestamp, cores):
+        if self.cores is None or self.cores.latest().shape != cores.shape:
+            self.times = RingBuffer(self.capacity, 'f8')
+            self.cores = RingBuffer(self.capacity, cores.dtype, cores.shape)
+        self.times.append(timestamp)
+        self.cores.append(cores)
+
+    def latest(self):
+        return None if self.cores is None else self.cores.latest()
+
+    def window(self, last, field=0):
+        """The last ``last`` samples of one field as a (cores, samples) array."""
+        if self.cores is None:
+            return None
+        return self.cores.values(last)[:, :, field].T
+
+
+class DiskHistory:
+    """Per-device disk I/O history, one MetricHistory per device and field.
+
+    A device gets its histories the first time it is seen and keeps them
+    if it goes away, so it can be plotted again when it comes back.
+    """
+
+    def __init__(self, fields, tiers=DEFAULT_TIERS):
+        self.fields = fields
+        self.tiers = tiers
+        self.devices = {}
+
+    def __len__(self):
+        return len(self.devices)
+
+    @property
+    def nbytes(self):
+        return sum(history.nbytes for device in self.devices.values() for history in device)
+
+    def append(self, timestamp, names, values):
+        for name, row in zip(names, values.tolist()):
+            device = self.devices.get(name)
+            if device is None:
+                device = self.devices[name] = [MetricHistory(self.tiers) for _ in self.fields]
+            for history, value in zip(device, row):
+                history.append(timestamp, value)
+
+    def series(self, name, field, span):
+        return self.devices[name][self.fields.index(field)].series(span)
@@ -0,0 +1,223 @@
+import os
+import time
+
+from collector import IORateCache, SocketOwners, empty_columns, user_name
+
+PROC = '/proc'
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+# /proc/[pid]/stat state letters, named the way psutil reports them.
+STATUS_NAMES = {
+    b'R': 'running',
+    b'S': 'sleeping',
+    b'D': 'disk-sleep',
+    b'T': 'stopped',
+    b't': 'tracing-stop',
+    b'Z': 'zombie',
+    b'X': 'dead',
+    b'x': 'dead',
+    b'K': 'wake-kill',
+    b'W': 'waking',
+    b'I': 'idle',
+    b'P': 'parked',
+}
+
+# Indexes into the fields that follow "pid (comm) " in /proc/[pid]/stat.
+STAT_STATE = 0
+STAT_PPID = 1
+STAT_UTIME = 11
+STAT_STIME = 12
+STAT_STARTTIME = 19
+STAT_RSS = 21
+
+# The kernel truncates comm to 15 bytes.
+COMM_LENGTH = 15
+
+# Value positions in the whitespace-split /proc/[pid]/io text.
+IO_RCHAR = 1
+IO_WCHAR = 3
+IO_READ_BYTES = 9
+IO_WRITE_BYTES = 11
+
+
+def read_uptime():
+    with open(os.path.join(PROC, 'uptime'), 'rb') as f:
+        return float(f.read().split()[0])
+
+
+def read_total_memory():
+    with open(os.path.join(PROC, 'meminfo'), 'rb') as f:
+        for line in f:
+            if line.startswith(b'MemTotal:'):
+                return int(line.split()[1]) * 1024
+    return os.sysconf('SC_PHYS_PAGES') * PAGE_SIZE
+
+
+class ProcfsProcessSource:
+    """Linux process source that reads /proc/[pid]/stat directly.
+
+    Each scan does one read per PID into a reused buffer and creates no
+    per-process objects. CPU% is computed from utime+stime jiffy deltas
+    between scans (keyed by PID and start time so a reused PID starts
+    over), matching the psutil source; a process seen for the first time
+    reports its lifetime average. RSS is
+    taken from the same stat line, so statm does not need to be read.
+    Names truncated to 15 characters are expanded from the cmdline the
+    way psutil does; the expansion is kept until the process exits or
+    its comm changes, so cmdline is read once per long-named process.
+    Disk and network rates come from one read of /proc/[pid]/io; it is
+    only readable for our own processes unless running as root, and
+    unreadable processes report 0.0.
+    """
+
+    def __init__(self, buffer_size=4096):
+        self._buffer = bytearray(buffer_size)
+        self._total_memory = read_total_memory()
+        self._last_times = {}
+        self._names = {}
+        self._last_scan = None
+        self.io_rates = IORateCache()
+        self.sockets = SocketOwners()
+
+    def scan(self):
+        now = time.monotonic()
+        elapsed = now - self._last_scan if self._last_scan else 0.0
+        self._last_scan = now
+        # Jiffies -> percent of one CPU over the elapsed wall time.
+        cpu_scale = 100.0 / (CLOCK_TICKS * elapsed) if elapsed else 0.0
+        uptime_ticks = read_uptime() * CLOCK_TICKS
+        memory_scale = PAGE_SIZE * 100.0 / self._total_memory
+
+        buf = self._buffer
+        last_times = self._last_times
+        last_names = self._names
+        times = {}
+        long_names = {}
+        columns = empty_columns()
+        pids, names, statuses, cpu, memory, disk, network, cpu_times, ppids, users = columns
+        socket_pids = self.sockets.pids(now)
+        self.io_rates.begin(now)
+
+        for entry in os.listdir(PROC):
+            if not entry.isdigit():
+                continue
+            try:
+                fd = os.open(f'{PROC}/{entry}/stat', os.O_RDONLY)
+            except OSError:
+                continue
+            try:
+                size = os.readv(fd, [buf])
+                # /proc/[pid] entries are owned by the process's effective uid.
+                uid = os.fstat(fd).st_uid
+            except OSError:
+                continue
+            finally:
+                os.close(fd)
+
+            # comm may itself contain spaces or parentheses.
+            start = buf.find(b'(', 0, size)
+            end = buf.rfind(b')', 0, size)
+            if start < 0 or end < 0:
+                continue
+            fields = buf[end + 2:size].split()
+
+            pid = int(entry)
+            key = (pid, int(fields[STAT_STARTTIME]))
+            total = int(fields[STAT_UTIME]) + int(fields[STAT_STIME])
+            times[key] = total
+            previous = last_times.get(key)
+
+            name = buf[start + 1:end].decode('utf-8', 'replace')
+            if len(name) >= COMM_LENGTH:
+                comm = name
+                cached = last_names.get(key)
+                if cached is not None and cached[0] == comm:
+                    name = cached[1]
+                else:
+                    name = self._expand_name(entry, comm)
+                long_names[key] = (comm, name)
+
+            pids.append(pid)
+            names.append(name)
+            statuses.append(STATUS_NAMES.get(bytes(fields[STAT_STATE]), '?'))
+            if previous is not None:
+                cpu.append((total - previous) * cpu_scale)
+            else:
+                # First sighting: average over the process lifetime.
+                lifetime = uptime_ticks - key[1]
+                cpu.append(total * 100.0 / lifetime if lifetime > 0 else 0.0)
+            cpu_times.append(total / CLOCK_TICKS)
+            ppids.append(int(fields[STAT_PPID]))
+            users.append(user_name(uid))
+            memory.append(int(fields[STAT_RSS]) * memory_scale)
+
+            disk_rate = network_rate = 0.0
+            counters = self._read_io(entry)
+            if counters is not None:
+                disk_bytes = counters[2] + counters[3]
+                other_bytes = counters[0] + counters[1] - disk_bytes
+                disk_rate, network_rate = self.io_rates.rates(key, disk_bytes, other_bytes)
+                if socket_pids is not None and pid not in socket_pids:
+                    network_rate = 0.0
+            disk.append(disk_rate)
+            network.append(network_rate)
+
+        # Replacing the maps drops exited processes.
+        self._last_times = times
+        self._names = long_names
+        self.io_rates.end()
+        return columns
+
+    def _expand_name(self, entry, comm):
+        """Return the cmdline's program name if ``comm`` is a truncation of it.
+
+        Like psutil's Process.name(); unreadable or empty cmdlines
+        (kernel threads, zombies) keep ``comm``.
+        """
+        buf = self._buffer
+        try:
+            fd = os.open(f'{PROC}/{entry}/cmdline', os.O_RDONLY)
+        except OSError:
+            return comm
+        try:
+            size = os.readv(fd, [buf])
+        except OSError:
+            return comm
+        finally:
+            os.close(fd)
+        if not size:
+            return comm
+        data = bytes(buf[:size])
+        # Arguments are NUL-separated, but setproctitle() users may have
+        # rewritten them with spaces; a full buffer may have cut the
+        # trailing NUL off.
+        truncated = size == len(buf) and b'\0' in data
+        sep = b'\0' if data.endswith(b'\0') or truncated else b' '
+        if data.endswith(sep):
+            data = data[:-1]
+        args = data.split(sep)
+        if sep == b'\0' and len(args) == 1 and b' ' in data:
+            args = data.split(b' ')
+        expanded = os.path.basename(args[0].decode('utf-8', 'replace'))
+        return expanded if expanded.startswith(comm) else comm
+
+    def _read_io(self, entry):
+        buf = self._buffer
+        try:
+            fd = os.open(f'{PROC}/{entry}/io', os.O_RDONLY)
+        except OSError:
+            return None
+        try:
+            size = os.readv(fd, [buf])
+        except OSError:
+            return None
+        finally:
+            os.close(fd)
+        values = buf[:size].split()
+        try:
+            return (int(values[IO_RCHAR]), int(values[IO_WCHAR]),
+                    int(values[IO_READ_BYTES]), int(values[IO_WRITE_BYTES]))
+        except (IndexError, ValueError):
+            return None
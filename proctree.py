@@ -0,0 +1,155 @@
+"""Parent/child process hierarchy maintained incrementally from ppid."""
+from collections import namedtuple
+
+# removed: PIDs that exited; placed: PIDs that were linked under a new
+# parent (new processes included); dirty: PIDs whose row or subtree
+# totals changed.
+TreeChanges = namedtuple('TreeChanges', ['removed', 'placed', 'dirty'])
+
+# Subtree totals are kept as integers in millionths of a percent, so
+# adding and later subtracting a row's share leaves no rounding drift.
+UNITS = 1000000
+
+
+def units(percent):
+    return round(percent * UNITS)
+
+
+class ProcessNode:
+    __slots__ = ('pid', 'row', 'parent', 'children', 'cpu_units', 'memory_units',
+                 'waiting_for')
+
+    def __init__(self, row):
+        self.pid = row.pid
+        self.row = row
+        self.parent = None
+        self.children = {}
+        # Totals for this process and everything below it.
+        self.cpu_units = units(row.cpu_percent)
+        self.memory_units = units(row.memory_percent)
+        # The missing parent PID a root is waiting to appear, if any.
+        self.waiting_for = None
+
+    @property
+    def cpu(self):
+        return self.cpu_units / UNITS
+
+    @property
+    def memory(self):
+        return self.memory_units / UNITS
+
+
+class ProcessTree:
+    """Process table arranged by ``ppid`` with rolled-up CPU and memory.
+
+    ``update`` diffs a new table against the previous one and patches the
+    tree in place: exited processes are unlinked, new ones are linked
+    under their parent, and a change to one row's CPU or memory is added
+    to the totals of its ancestors only. A refresh costs one dict lookup
+    per row plus work proportional to what changed, never a rebuild.
+    A process whose parent is not in the table is a root until a process
+    with that PID shows up (a child can be listed before its parent);
+    children of an exited process stay roots until the OS reparents them.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.roots = {}
+        # missing parent PID -> {pid: root node waiting for it}
+        self.waiting = {}
+        self.dirty = set()
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def update(self, rows):
+        nodes = self.nodes
+        self.dirty = dirty = set()
+        current = {row.pid: row for row in rows}
+
+        removed = [pid for pid in nodes if pid not in current]
+        relink = []
+        for pid in removed:
+            node = nodes.pop(pid)
+            self._detach(node)
+            for child in node.children.values():
+                child.parent = None
+                relink.append(child)
+
+        for pid, row in current.items():
+            node = nodes.get(pid)
+            if node is None:
+                nodes[pid] = node = ProcessNode(row)
+                relink.append(node)
+                # Roots that were waiting for this PID as their parent.
+                relink.extend(self.waiting.get(pid, {}).values())
+                continue
+            old = node.row
+            if old == row:
+                continue
+            node.row = row
+            dirty.add(pid)
+            cpu = units(row.cpu_percent) - units(old.cpu_percent)
+            memory = units(row.memory_percent) - units(old.memory_percent)
+            if cpu or memory:
+                self._propagate(node, cpu, memory)
+            if row.ppid != old.ppid:
+                relink.append(node)
+
+        placed = []
+        for node in relink:
+            if nodes.get(node.pid) is not node:
+                continue
+            parent = self._parent_for(node)
+            if parent is node.parent and (parent is not None or node.pid in self.roots):
+                continue
+            self._detach(node)
+            self._attach(node, parent)
+            placed.append(node.pid)
+        return TreeChanges(removed, placed, dirty)
+
+    def _parent_for(self, node):
+        parent = self.nodes.get(node.row.ppid)
+        # Guard against a ppid cycle from PID reuse between scans.
+        ancestor = parent
+        while ancestor is not None:
+            if ancestor is node:
+                return None
+            ancestor = ancestor.parent
+        return parent
+
+    def _propagate(self, node, cpu, memory):
+        dirty = self.dirty
+        while node is not None:
+            node.cpu_units += cpu
+            node.memory_units += memory
+            dirty.add(node.pid)
+            node = node.parent
+
+    def _detach(self, node):
+        parent = node.parent
+        if parent is None:
+            self.roots.pop(node.pid, None)
+            if node.waiting_for is not None:
+                waiting = self.waiting[node.waiting_for]
+                del waiting[node.pid]
+                if not waiting:
+                    del self.waiting[node.waiting_for]
+                node.waiting_for = None
+            return
+        del parent.children[node.pid]
+        node.parent = None
+        self._propagate(parent, -node.cpu_units, -node.memory_units)
+
+    def _attach(self, node, parent):
+        node.parent = parent
+        self.dirty.add(node.pid)
+        if parent is None:
+            self.roots[node.pid] = node
+            ppid = node.row.ppid
+            if ppid and ppid != node.pid and ppid not in self.nodes:
+                node.waiting_for = ppid
+                self.waiting.setdefault(ppid, {})[node.pid] = node
+            return
+        parent.children[node.pid] = node
+        self._propagate(parent, node.cpu_units, node.memory_units)
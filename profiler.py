@@ -0,0 +1,149 @@
+import functools
+import threading
+import time
+
+import numpy as np
+import psutil
+
+from history import RingBuffer
+
+
+def profiled(stage):
+    """Time a TaskManagerStyleMonitor method as ``stage`` of ``self.profiler``.
+
+    While profiling is off the wrapper only checks one flag.
+    """
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if not profiler.enabled:
+                return method(self, *args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                profiler.record(stage, start, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+def summarize(durations):
+    if not len(durations):
+        return {'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+    ms = durations * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3),
+        'max_ms': round(float(ms.max()), 3),
+    }
+
+
+class Profiler:
+    """Stage timers, Tk event-loop lag and the monitor's own resource use.
+
+    Stage durations and loop lags are kept for the last ``window`` events.
+    Loop lag is how late an ``after`` callback fires compared with when it
+    was scheduled; the probe only runs while profiling is enabled.
+    """
+
+    def __init__(self, window=512, busy_span=10.0, lag_interval=100):
+        self.window = window
+        self.busy_span = busy_span
+        self.lag_interval = lag_interval
+        self.enabled = False
+        self.calls = {}
+        self._starts = {}
+        self._durations = {}
+        self._lags = RingBuffer(window, 'f8')
+        self._root = None
+        self._lag_job = None
+        self._process = psutil.Process()
+        self._cpu_time = None
+        self._cpu_at = None
+        self.cpu_percent = 0.0
+
+    def enable(self, root):
+        if self.enabled:
+            return
+        self.enabled = True
+        self._root = root
+        self._schedule_lag_probe()
+
+    def disable(self):
+        self.enabled = False
+        if self._lag_job is not None:
+            self._root.after_cancel(self._lag_job)
+            self._lag_job = None
+
+    def record(self, stage, start, duration):
+        if stage not in self._durations:
+            self.calls[stage] = 0
+            self._starts[stage] = RingBuffer(self.window, 'f8')
+            self._durations[stage] = RingBuffer(self.window, 'f8')
+        self.calls[stage] += 1
+        self._starts[stage].append(start)
+        self._durations[stage].append(duration)
+
+    def _schedule_lag_probe(self):
+        expected = time.perf_counter() + self.lag_interval / 1000
+        self._lag_job = self._root.after(self.lag_interval, self._lag_probe, expected)
+
+    def _lag_probe(self, expected):
+        self._lag_job = None
+        if not self.enabled:
+            return
+        self._lags.append(max(time.perf_counter() - expected, 0.0))
+        self._schedule_lag_probe()
+
+    def resources(self):
+        now = time.monotonic()
+        with self._process.oneshot():
+            times = self._process.cpu_times()
+            rss = self._process.memory_info().rss
+            threads = self._process.num_threads()
+        cpu_time = times.user + times.system
+        if self._cpu_time is not None and now > self._cpu_at:
+            self.cpu_percent = (cpu_time - self._cpu_time) / (now - self._cpu_at) * 100
+        self._cpu_time = cpu_time
+        self._cpu_at = now
+        return {
+            'cpu_percent': round(self.cpu_percent, 2),
+            'rss_bytes': rss,
+            'threads': threads,
+            'python_threads': threading.active_count(),
+        }
+
+    def snapshot(self):
+        now = time.perf_counter()
+        stages = {}
+        for stage, durations in self._durations.items():
+            values = durations.values()
+            starts = self._starts[stage].values()
+            recent = values[starts >= now - self.busy_span]
+            stats = summarize(values)
+            stats['calls'] = self.calls[stage]
+            # Share of wall time spent in this stage over the last busy_span.
+            stats['busy_percent'] = round(float(recent.sum()) / self.busy_span * 100, 2)
+            stages[stage] = stats
+        return {
+            'timestamp': time.time(),
+            'stages': stages,
+            'loop_lag': summarize(self._lags.values()),
+            'process': self.resources(),
+        }
+
+
+def format_snapshot(snapshot):
+    lines = [f"{'stage':22} {'calls':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'busy %':>7}"]
+    for stage, stats in sorted(snapshot['stages'].items()):
+        lines.append(f"{stage:22} {stats['calls']:7d} {stats['p50_ms']:8.2f} "
+                     f"{stats['p95_ms']:8.2f} {stats['max_ms']:8.2f} {stats['busy_percent']:7.2f}")
+    lag = snapshot['loop_lag']
+    lines.append(f"{'Tk loop lag':22} {'':7} {lag['p50_ms']:8.2f} {lag['p95_ms']:8.2f} "
+                 f"{lag['max_ms']:8.2f}")
+    process = snapshot['process']
+    lines.append(f"Monitor: CPU {process['cpu_percent']:.1f}% | "
+                 f"RSS {process['rss_bytes'] / (1024**2):.1f} MB | "
+                 f"threads {process['threads']}")
+    return "\n".join(lines)
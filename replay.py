@@ -0,0 +1,78 @@
+import time
+from collections import namedtuple
+
+from history import TIME_RANGES
+
+SPEEDS = (1, 10, 100)
+
+# Stand-in for the psutil memory/disk tuples when replaying: only the
+# percentage is recorded.
+Usage = namedtuple('Usage', ['percent'])
+
+
+class Replay:
+    """Plays a recorded MetricStore back on a wall clock at a given speed.
+
+    Each ``advance()`` returns every record between the previous and the
+    new playback position as one structured array, however long the UI
+    took since the last call, so a slow frame or a high speed skips frames
+    instead of falling behind. After a ``seek()`` it returns the full
+    lookback window before the new position so the charts can be rebuilt
+    in one vectorized load.
+    """
+
+    def __init__(self, store, speed=1, lookback=max(TIME_RANGES.values())):
+        self.store = store
+        self.start, self.end = store.time_range()
+        self.speed = speed
+        self.lookback = lookback
+        self.playing = True
+        self.position = self.start
+        self._wall = None
+        self._seeked = True
+        self._snapshot_ts = None
+
+    def seek(self, ts):
+        self.position = min(max(ts, self.start), self.end)
+        self._seeked = True
+
+    def set_speed(self, speed):
+        self.speed = speed
+
+    def toggle(self):
+        self.playing = not self.playing
+        # Playing from the end starts over instead of stopping right away.
+        if self.playing and self.finished:
+            self.seek(self.start)
+
+    def advance(self, now=None):
+        """Return ``(records, reset)``; ``reset`` means history was rebuilt."""
+        now = time.monotonic() if now is None else now
+        elapsed = now - self._wall if self._wall is not None else 0.0
+        self._wall = now
+
+        if self._seeked:
+            self._seeked = False
+            self._snapshot_ts = None
+            records = self.store.metrics_between(self.position - self.lookback,
+                                                 self.position + 1e-6)
+            return records, True
+
+        if not self.playing or self.position >= self.end:
+            return self.store.metrics_between(0, 0), False
+
+        previous = self.position
+        self.position = min(previous + elapsed * self.speed, self.end)
+        return self.store.metrics_between(previous + 1e-6, self.position + 1e-6), False
+
+    def processes(self):
+        """The process snapshot for the current position if it changed."""
+        snapshot_ts = self.store.snapshot_time_at(self.position)
+        if snapshot_ts is None or snapshot_ts == self._snapshot_ts:
+            return None
+        self._snapshot_ts = snapshot_ts
+        return self.store.processes_at(snapshot_ts)
+
+    @property
+    def finished(self):
+        return self.position >= self.end
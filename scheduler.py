@@ -0,0 +1,103 @@
+import math
+import time
+from collections import namedtuple
+
+import psutil
+
+Intervals = namedtuple('Intervals', ['metric', 'process', 'ui'])
+
+# How much slower everything runs in each window state.
+WINDOW_BACKOFF = {
+    'focused': 1.0,
+    'unfocused': 2.0,
+    'minimized': 10.0,
+}
+
+
+class AdaptiveScheduler:
+    """Chooses the sampling and UI refresh intervals for the dashboard.
+
+    Starts from the base intervals and:
+
+    * backs off by ``WINDOW_BACKOFF`` when the window loses focus or is
+      minimized;
+    * samples metrics every ``fast_interval`` seconds for ``hold`` seconds
+      after CPU or memory moved ``change_threshold`` percentage points
+      away from its recent level, an exponential moving average with a
+      time constant of ``smoothing`` seconds (focused window only).
+      Comparing against the average rather than the previous sample
+      keeps jitter between fast samples from holding fast mode on;
+    * stretches every interval while the monitor's own CPU use, measured
+      over at least ``measure_every`` seconds, is above ``cpu_budget``
+      percent of one core, and relaxes again once it is well below.
+    """
+
+    def __init__(self, interval=1.0, process_interval=2.0, ui_interval=0.1,
+                 fast_interval=0.25, change_threshold=10.0, hold=10.0, smoothing=5.0,
+                 cpu_budget=5.0, max_throttle=8.0, measure_every=2.0):
+        self.base = Intervals(interval, process_interval, ui_interval)
+        self.fast_interval = fast_interval
+        self.change_threshold = change_threshold
+        self.hold = hold
+        self.smoothing = smoothing
+        self.cpu_budget = cpu_budget
+        self.max_throttle = max_throttle
+        self.measure_every = measure_every
+        self.throttle = 1.0
+        self.own_cpu = 0.0
+        self._fast_until = 0.0
+        self._previous = None
+        self._average = None
+        self._process = psutil.Process()
+        self._cpu_time = self._total_cpu_time()
+        self._measured_at = time.monotonic()
+
+    def _total_cpu_time(self):
+        times = self._process.cpu_times()
+        return times.user + times.system
+
+    def observe(self, sample, now=None):
+        """Feed a MetricSample to detect fast-changing metrics."""
+        values = (sample.cpu_percent, sample.mem.percent)
+        previous = self._previous
+        self._previous = sample
+        if previous is None:
+            self._average = values
+            return
+        elapsed = sample.timestamp - previous.timestamp
+        if elapsed <= 0:
+            return
+        average = self._average
+        change = max(abs(value - mean) for value, mean in zip(values, average))
+        if change >= self.change_threshold:
+            self._fast_until = (time.monotonic() if now is None else now) + self.hold
+        weight = 1.0 - math.exp(-elapsed / self.smoothing)
+        self._average = tuple(mean + (value - mean) * weight
+                              for value, mean in zip(values, average))
+
+    def _measure(self, now):
+        elapsed = now - self._measured_at
+        if elapsed < self.measure_every:
+            return
+        cpu_time = self._total_cpu_time()
+        self.own_cpu = (cpu_time - self._cpu_time) / elapsed * 100
+        self._cpu_time = cpu_time
+        self._measured_at = now
+
+        if self.own_cpu > self.cpu_budget:
+            self.throttle = min(self.throttle * self.own_cpu / self.cpu_budget,
+                                self.max_throttle)
+        elif self.own_cpu < self.cpu_budget / 2:
+            self.throttle = max(self.throttle * 0.8, 1.0)
+
+    def intervals(self, window_state='focused', now=None):
+        now = time.monotonic() if now is None else now
+        self._measure(now)
+
+        backoff = WINDOW_BACKOFF[window_state] * self.throttle
+        metric = self.base.metric
+        if window_state == 'focused' and now < self._fast_until:
+            metric = min(metric, self.fast_interval)
+        return Intervals(metric * backoff,
+                         self.base.process * backoff,
+                         self.base.ui * backoff)
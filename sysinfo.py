@@ -0,0 +1,169 @@
+import platform
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import psutil
+
+from collector import REMOTE_FSTYPES, is_whole_disk, mounted_partitions
+
+
+def gpu_info():
+    try:
+        import GPUtil
+        gpus = GPUtil.getGPUs()
+        if gpus:
+            return f"{gpus[0].name} ({gpus[0].driver})"
+    except Exception:
+        pass
+    return "Not detected"
+
+
+def operating_system_info():
+    return {
+        "System": platform.system(),
+        "Node Name": platform.node(),
+        "Release": platform.release(),
+        "Version": platform.version(),
+        "Machine": platform.machine(),
+        "Processor": platform.processor()
+    }
+
+
+def hardware_info():
+    freq = psutil.cpu_freq()
+    return {
+        "Physical Cores": str(psutil.cpu_count(logical=False)),
+        "Total Cores": str(psutil.cpu_count(logical=True)),
+        "Max Frequency": f"{freq.max:.2f} MHz" if freq else "Unknown",
+        "Total RAM": f"{psutil.virtual_memory().total / (1024**3):.2f} GB",
+        "GPU": gpu_info()
+    }
+
+
+def boot_info():
+    boot_time = datetime.fromtimestamp(psutil.boot_time())
+    return {
+        "Boot Time": boot_time.strftime("%Y-%m-%d %H:%M:%S"),
+        "Up Time": str(datetime.now() - boot_time)
+    }
+
+
+def network_info():
+    net_interfaces = []
+    for interface, addrs in psutil.net_if_addrs().items():
+        for addr in addrs:
+            if addr.family == 2:  # AF_INET
+                net_interfaces.append(f"{interface}: {addr.address}")
+
+    try:
+        listening = "\n".join(f"{conn.laddr.ip}:{conn.laddr.port}"
+                              for conn in psutil.net_connections(kind='inet')
+                              if conn.status == 'LISTEN')
+    except psutil.AccessDenied:
+        listening = "Access denied"
+
+    return {
+        "Hostname": platform.node(),
+        "IP Addresses": "\n".join(net_interfaces) if net_interfaces else "Not connected",
+        "DNS": listening
+    }
+
+
+def disk_info():
+    partitions = []
+    for part in mounted_partitions():
+        if part.fstype in REMOTE_FSTYPES:
+            # Listed without capacity: statvfs may hang on an unreachable server.
+            partitions.append(f"{part.device} ({part.mountpoint}, {part.fstype})")
+            continue
+        try:
+            usage = psutil.disk_usage(part.mountpoint)
+        except OSError:
+            partitions.append(f"{part.device} ({part.mountpoint})")
+            continue
+        partitions.append(f"{part.device} ({part.mountpoint}): "
+                          f"{usage.used / (1024**3):.2f} / {usage.total / (1024**3):.2f} GB "
+                          f"({usage.percent:.1f}%)")
+    devices = sorted(filter(is_whole_disk, psutil.disk_io_counters(perdisk=True) or {}))
+    return {
+        "Partitions": "\n".join(partitions),
+        "Block Devices": ", ".join(devices) if devices else "Not detected"
+    }
+
+
+def probe_hardware():
+    return {
+        'logical_cores': psutil.cpu_count(logical=True),
+        'physical_cores': psutil.cpu_count(logical=False),
+        'process_count': len(psutil.pids()),
+    }
+
+
+# (title, fetch function, TTL in seconds; None never goes stale)
+SECTIONS = (
+    ("Operating System", operating_system_info, None),
+    ("Hardware Information", hardware_info, None),
+    ("Boot Information", boot_info, 60),
+    ("Network Information", network_info, 300),
+    ("Disk Information", disk_info, 60),
+)
+
+
+class SystemInfoCache:
+    """Fetches System Details sections concurrently and caches each one.
+
+    ``refresh()`` submits only the sections that are missing or older than
+    their TTL and not already in flight; ``poll()`` returns the sections
+    that finished since the last call, as a details dict or the exception
+    the fetch raised.
+    """
+
+    def __init__(self, sections=SECTIONS, max_workers=4):
+        self.sections = sections
+        self.values = {}
+        self.fetched_at = {}
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='sysinfo')
+
+    @property
+    def titles(self):
+        return [title for title, _, _ in self.sections]
+
+    @property
+    def loading(self):
+        return bool(self._pending)
+
+    def is_stale(self, title, ttl, now):
+        if title not in self.fetched_at:
+            return True
+        return ttl is not None and now - self.fetched_at[title] >= ttl
+
+    def refresh(self):
+        now = time.monotonic()
+        submitted = []
+        for title, fetch, ttl in self.sections:
+            if title in self._pending or not self.is_stale(title, ttl, now):
+                continue
+            self._pending[title] = self._executor.submit(fetch)
+            submitted.append(title)
+        return submitted
+
+    def poll(self):
+        finished = {}
+        for title, future in list(self._pending.items()):
+            if not future.done():
+                continue
+            del self._pending[title]
+            try:
+                result = future.result()
+            except Exception as e:
+                finished[title] = e
+                continue
+            self.values[title] = result
+            self.fetched_at[title] = time.monotonic()
+            finished[title] = result
+        return finished
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
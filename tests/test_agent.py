@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from agent import (HELLO, MAX_PAYLOAD, METRICS, FRAME_HEADER, HostInfo, ProcessTable, Usage,
+                   decode_hello, decode_metrics, decode_rows, encode_hello, encode_metrics,
+                   encode_rows, frame, read_frame)
+from collector import MetricSample, ProcessRow, ProcessSample
+
+
+def read(data):
+    async def go():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_frame(reader)
+    return asyncio.run(go())
+
+
+def test_frames_round_trip():
+    assert read(frame(METRICS, b'abc') + frame(HELLO, b'')) == (METRICS, b'abc')
+    with pytest.raises(asyncio.IncompleteReadError):
+        read(frame(METRICS, b'abc')[:-1])
+    with pytest.raises(ValueError):
+        read(FRAME_HEADER.pack(METRICS, MAX_PAYLOAD + 1))
+
+
+def test_hello_round_trip():
+    info = decode_hello(encode_hello())
+    assert isinstance(info, HostInfo)
+    assert info.hostname and info.logical_cores >= 1
+    assert decode_hello(b'{"hostname": "a"}') == HostInfo('a', None, None, None)
+
+
+def test_metrics_round_trip():
+    sample = MetricSample(1700000000.5, 12.5, Usage(40.25, 4 << 30, 16 << 30),
+                          Usage(75.0, 300 << 30, 400 << 30), 12.0, 3400.5)
+    decoded = decode_metrics(encode_metrics(sample))
+    assert decoded.timestamp == sample.timestamp
+    assert decoded.mem == sample.mem and decoded.disk == sample.disk
+    assert decoded.cpu_percent == pytest.approx(12.5)
+    assert decoded.net_down == pytest.approx(3400.5)
+
+
+def test_rows_round_trip():
+    rows = [ProcessRow(1, 'init', 'sleeping', 0.5, 1.25, 0.0, 0.0, 12.0, 0, 'root'),
+            ProcessRow(42, 'nginx', 'running', 20.0, 3.5, 1024.0, 2048.0, 5.0, 1, 'www')]
+    assert decode_rows(encode_rows(5.0, rows, removed=[7])) == (5.0, rows, [7])
+    assert decode_rows(encode_rows(6.0, [])) == (6.0, [], [])
+
+
+def test_rows_from_an_older_agent_get_defaults():
+    import json
+    import zlib
+    columns = {field: [value] for field, value in zip(
+        ProcessRow._fields[:8], (3, 'sh', 'sleeping', 0.0, 0.1, 0.0, 0.0, 1.0))}
+    payload = zlib.compress(json.dumps({'ts': 1.0, 'removed': [], 'columns': columns}).encode())
+    _, rows, _ = decode_rows(payload)
+    assert rows[0].ppid == 0 and rows[0].user == ''
+
+
+def test_delta_stream_rebuilds_the_table():
+    def table(ts, *rows):
+        return ProcessSample(ts, tuple(ProcessRow(pid, name, 'running', cpu, 0.0, 0, 0, 0)
+                                       for pid, name, cpu in rows))
+    sender = ProcessTable()
+    receiver = ProcessTable()
+    samples = [table(1, (1, 'a', 0.0), (2, 'b', 1.0)),
+               table(2, (1, 'a', 5.0), (2, 'b', 1.0), (3, 'c', 0.0)),
+               table(3, (1, 'a', 5.0), (3, 'c', 2.0))]
+    for index, sample in enumerate(samples):
+        changed, removed = sender.delta(sample)
+        timestamp, changed, removed = decode_rows(encode_rows(sample.timestamp, changed,
+                                                              removed))
+        rebuilt = receiver.apply(timestamp, changed, removed, reset=index == 0)
+        assert sorted(rebuilt.rows) == sorted(sample.rows)
+    assert sender.delta(samples[-1]) == ([], [])
@@ -0,0 +1,186 @@
+import json
+import time
+
+import pytest
+
+from alerts import (DEFAULT_RULES, AlertEngine, AlertWorker, BucketWindow, Rule,
+                    SlidingWindow, load_rules)
+from collector import MetricSample, ProcessRow, ProcessSample
+from replay import Usage
+
+
+def metric(ts, cpu, mem=40.0):
+    return MetricSample(ts, cpu, Usage(mem), Usage(50.0), 0.0, 0.0)
+
+
+def test_sliding_window_aggregates():
+    window = SlidingWindow(10)
+    for ts, value in enumerate([5, 1, 4, 8, 2, 7, 3, 6, 9, 0, 5, 2, 8]):
+        window.add(float(ts), float(value))
+        values = [v for _, _, v in window.samples]
+        assert window.aggregate('min') == min(values)
+        assert window.aggregate('max') == max(values)
+        assert window.aggregate('avg') == pytest.approx(sum(values) / len(values))
+    # ts 2..12 remain: a span of 10 seconds, both ends included.
+    assert len(window.samples) == 11
+    assert window.aggregate('last') == 8
+    assert window.aggregate('delta') == 8 - 4
+    assert window.aggregate('rate') == pytest.approx(0.4)
+    assert window.full
+
+
+def test_system_rule_needs_a_full_window():
+    engine = AlertEngine([Rule("CPU busy", 'cpu', '>', 90, aggregate='avg', window=5)])
+    events = []
+    for ts in range(5):
+        events += engine.observe_metrics(metric(float(ts), 95.0))
+    assert events == []
+    events = engine.observe_metrics(metric(5.0, 95.0))
+    assert [(e.state, e.rule.name) for e in events] == [('firing', "CPU busy")]
+    assert engine.observe_metrics(metric(6.0, 95.0)) == []
+    events = []
+    for ts in range(7, 13):
+        events += engine.observe_metrics(metric(float(ts), 10.0))
+    assert [e.state for e in events] == ['resolved']
+    assert not engine.active
+
+
+def table(ts, *rows):
+    return ProcessSample(ts, tuple(ProcessRow(pid, name, 'running', cpu, 1.0, 0, 0, 0)
+                                   for pid, name, cpu in rows))
+
+
+def test_bucket_window_is_bounded():
+    window = BucketWindow(10, slots=4)
+    for ts in range(1000):
+        window.add(float(ts), float(ts % 7))
+        assert len(window.buckets) <= 5
+    assert window.full
+    assert window.aggregate('last') == 999 % 7
+    assert window.aggregate('max') == 6 and window.aggregate('min') == 0
+    # Buckets are 2.5 s wide: the oldest one left starts at 987.5 at the latest.
+    assert 987 <= window.buckets[0][0] <= 990
+
+
+def test_bucket_window_delta_and_rate():
+    window = BucketWindow(60)
+    for ts in range(0, 121, 5):
+        window.add(float(ts), ts * 2.0)
+    # The oldest bucket may reach one bucket (15 s) past the span.
+    assert 120 <= window.aggregate('delta') <= 150
+    assert window.aggregate('rate') == pytest.approx(2.0)
+    # Exactly the last 60 s would average 180; an older bucket can only lower it.
+    assert 150 <= window.aggregate('avg') <= 180
+
+
+def test_process_rule_resolves_when_process_exits():
+    engine = AlertEngine([Rule("Hog", 'cpu_percent', '>', 50, scope='process',
+                               match='hog*')])
+
+    events = engine.observe_processes(table(0, (1, 'hog', 80), (2, 'idle', 90)), 1 << 30)
+    assert [(e.state, e.subject) for e in events] == [('firing', (1, 'hog'))]
+    events = engine.observe_processes(table(1, (2, 'idle', 90)), 1 << 30)
+    assert [(e.state, e.subject) for e in events] == [('resolved', (1, 'hog'))]
+    assert not engine._subjects
+
+
+def test_rules_are_indexed_by_name():
+    rules = [Rule("Exact", 'cpu_percent', '>', 50, scope='process', match='nginx'),
+             Rule("Glob", 'cpu_percent', '>', 50, scope='process', match='post*'),
+             Rule("Any", 'cpu_percent', '>', 99, scope='process')]
+    engine = AlertEngine(rules, name_cache_size=2)
+    assert [rule.name for _, rule, _, _ in engine.candidates('nginx')] == ["Exact", "Any"]
+    assert [rule.name for _, rule, _, _ in engine.candidates('postgres')] == ["Glob", "Any"]
+    assert [rule.name for _, rule, _, _ in engine.candidates('bash')] == ["Any"]
+    assert len(engine._candidates) <= 2
+
+    events = engine.observe_processes(
+        table(0, (1, 'nginx', 80), (2, 'postgres', 80), (3, 'bash', 80)), 1 << 30)
+    assert sorted((e.rule.name, e.subject) for e in events) == [
+        ("Exact", (1, 'nginx')), ("Glob", (2, 'postgres'))]
+
+
+def test_windows_are_dropped_for_exited_and_renamed_processes():
+    engine = AlertEngine([Rule("Growth", 'rss', '>', 100, aggregate='delta', window=10,
+                               scope='process')])
+    engine.observe_processes(table(0, (1, 'a', 0), (2, 'b', 0)), 1 << 30)
+    assert set(engine._subjects) == {1, 2}
+    engine.observe_processes(table(1, (1, 'c', 0)), 1 << 30)
+    # pid 2 exited and pid 1 now runs another program.
+    assert engine._subjects[1][0] == 'c' and set(engine._subjects) == {1}
+    engine.observe_processes(table(2), 1 << 30)
+    assert not engine._subjects
+
+
+def test_many_processes_stay_bounded():
+    engine = AlertEngine([Rule("Growth", 'rss', '>', 1 << 40, aggregate='delta', window=300,
+                               scope='process')])
+    rows = [(pid, f'worker-{pid % 50}', 1.0) for pid in range(30000)]
+    started = time.perf_counter()
+    for ts in range(0, 600, 20):
+        assert engine.observe_processes(table(float(ts), *rows), 1 << 30) == []
+    elapsed = time.perf_counter() - started
+    assert len(engine._subjects) == 30000
+    assert max(len(window.buckets) for _, windows in engine._subjects.values()
+               for window in windows.values()) <= 5
+    # 30 refreshes of 30k processes: generous, but far from seconds per refresh.
+    assert elapsed < 30
+
+
+def test_worker_posts_only_transitions():
+    worker = AlertWorker(AlertEngine([Rule("CPU", 'cpu', '>', 90)]))
+    try:
+        for ts, cpu in enumerate([10.0, 95.0, 96.0, 10.0]):
+            worker.submit(metric(float(ts), cpu))
+        deadline = time.monotonic() + 5
+        items = []
+        while len(items) < 2 and time.monotonic() < deadline:
+            items += worker.drain()
+            time.sleep(0.01)
+    finally:
+        worker.close()
+    assert [[e.state for e in events] for events in items] == [['firing'], ['resolved']]
+    assert worker.dropped == 0
+
+
+def test_worker_reports_errors():
+    worker = AlertWorker(AlertEngine([Rule("CPU", 'cpu', '>', 90)]))
+    try:
+        worker.submit(object())
+        deadline = time.monotonic() + 5
+        items = []
+        while not items and time.monotonic() < deadline:
+            items += worker.drain()
+            time.sleep(0.01)
+    finally:
+        worker.close()
+    assert len(items) == 1 and isinstance(items[0], AttributeError)
+
+
+def test_default_rules():
+    names = [spec['name'] for spec in DEFAULT_RULES]
+    assert "Memory high" in names
+    # Per-process rules are opt-in.
+    assert all(spec.get('scope', 'system') == 'system' for spec in DEFAULT_RULES)
+    assert len(set(names)) == len(names)
+    AlertEngine([Rule.from_dict(spec) for spec in DEFAULT_RULES])
+
+
+def test_load_rules_rejects_duplicate_names(tmp_path):
+    path = tmp_path / 'alerts.json'
+    rule = {'name': "CPU", 'metric': 'cpu', 'op': '>', 'threshold': 90}
+    path.write_text(json.dumps({'rules': [rule, dict(rule, threshold=95)]}))
+    with pytest.raises(ValueError, match="duplicate"):
+        load_rules(str(path))
+
+    path.write_text(json.dumps({'hook': 'true', 'rules': [rule]}))
+    rules, hook = load_rules(str(path))
+    assert [r.name for r in rules] == ["CPU"] and hook == 'true'
+
+
+def test_bad_rule_is_rejected():
+    with pytest.raises(ValueError):
+        Rule.from_dict({'name': "x", 'metric': 'nope', 'op': '>', 'threshold': 1})
+    with pytest.raises(ValueError):
+        Rule.from_dict({'name': "x", 'metric': 'cpu', 'op': '>', 'threshold': 1,
+                        'colour': 'red'})
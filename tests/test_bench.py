@@ -0,0 +1,96 @@
+import json
+import os
+import shutil
+
+import pytest
+
+import bench
+from collector import MetricSample, ProcessSample
+
+
+def test_synthetic_table_churns_but_keeps_its_size():
+    table = bench.SyntheticProcessTable(200, churn=0.05, seed=1)
+    before = {row.pid for row in table.rows}
+    rows = table.step()
+    assert len(rows) == 200
+    assert len({row.pid for row in rows}) == 200
+    assert len(before - {row.pid for row in rows}) == 10
+    assert bench.SyntheticProcessTable(200, seed=1).rows == bench.SyntheticProcessTable(
+        200, seed=1).rows
+
+
+def test_synthetic_collector_serves_samples():
+    collector = bench.SyntheticCollector(bench.SyntheticProcessTable(50), cores=4)
+    samples = collector.drain()
+    assert [type(sample) for sample in samples] == [MetricSample, ProcessSample]
+    assert samples[0].cores.shape == (4, len(bench.CORE_FIELDS))
+    collector.tick(processes=False)
+    assert [type(sample) for sample in collector.drain()] == [MetricSample]
+    assert collector.drain() == []
+
+
+def test_tk_call_counter_counts_only_commands():
+    class Interp:
+        def call(self, *args):
+            return args
+
+        def getboolean(self, value):
+            return bool(value)
+
+    counter = bench.TkCallCounter(Interp())
+    assert counter.call('set', 'x', 1) == ('set', 'x', 1)
+    assert counter.getboolean(1)
+    assert counter.calls == 1
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {'update_data/1000': {'p50_ms': 2.0, 'tk_calls': 10.0},
+                'sort_processes/1000': {'p50_ms': 4.0, 'tk_calls': 0.0}}
+    results = {'update_data/1000': {'p50_ms': 2.4, 'tk_calls': 13.0},
+               'sort_processes/1000': {'p50_ms': 9.0, 'tk_calls': 5.0},
+               'update_data/5000': {'p50_ms': 50.0, 'tk_calls': 50.0}}
+    regressions = bench.compare(results, baseline, 0.25)
+    assert regressions == ['update_data/1000: tk_calls 10.0 -> 13.0 (+30%)',
+                           'sort_processes/1000: p50_ms 4.0 -> 9.0 (+125%)']
+
+
+def fake_results(p50):
+    stats = {'iterations': 2, 'p50_ms': p50, 'p90_ms': p50, 'p99_ms': p50, 'max_ms': p50,
+             'tk_calls': 1.0, 'alloc_peak_kb': 1.0, 'alloc_retained_kb': 0.0}
+    return {'update_data/10': stats}
+
+
+def test_main_writes_report_and_checks_baseline(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv('DISPLAY', ':0')
+    monkeypatch.setattr(bench, 'run_benchmarks', lambda sizes, iterations, cores:
+                        fake_results(1.0))
+    output = tmp_path / 'results.json'
+    bench.main(['--sizes', '10', '--iterations', '2', '-o', str(output)])
+    report = json.loads(output.read_text())
+    assert report['results'] == fake_results(1.0)
+    assert report['meta']['iterations'] == 2
+    assert 'update_data/10' in capsys.readouterr().out
+
+    monkeypatch.setattr(bench, 'run_benchmarks', lambda sizes, iterations, cores:
+                        fake_results(2.0))
+    with pytest.raises(SystemExit) as exit_info:
+        bench.main(['--sizes', '10', '--baseline', str(output)])
+    assert exit_info.value.code == 1
+    assert 'p50_ms 1.0 -> 2.0' in capsys.readouterr().err
+
+
+@pytest.mark.skipif(not os.environ.get('DISPLAY') and shutil.which('Xvfb') is None,
+                    reason="needs a display or Xvfb")
+def test_dashboard_benchmark_runs(tmp_path):
+    server = None
+    if not os.environ.get('DISPLAY'):
+        server = bench.start_virtual_display()
+    try:
+        results = bench.run_benchmarks([200], iterations=2, cores=2)
+    finally:
+        if server is not None:
+            server.terminate()
+            del os.environ['DISPLAY']
+    assert set(results) == {f'{path}/200' for path in (
+        'update_data', 'update_process_list', 'sort_processes', 'update_perf_graphs')}
+    assert all(stats['p50_ms'] > 0 for stats in results.values())
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.patches import Polygon
+
+import finalos
+from finalos import BlitChart, StackedChart, nice_ceiling
+
+
+class CountingCanvas(FigureCanvasAgg):
+    """Agg canvas that counts full draws and blits."""
+
+    def __init__(self, figure):
+        super().__init__(figure)
+        self.draws = 0
+        self.blits = 0
+
+    def draw(self):
+        self.draws += 1
+        super().draw()
+
+    def blit(self, bbox=None):
+        self.blits += 1
+
+
+@pytest.fixture
+def axes(monkeypatch):
+    monkeypatch.setattr(finalos, 'Polygon', Polygon)
+    figure = Figure(figsize=(4, 3))
+    canvas = CountingCanvas(figure)
+    return figure.add_subplot(), canvas
+
+
+X = np.arange(-60, 1, dtype='f8')
+
+
+def test_nice_ceiling():
+    assert nice_ceiling(0) == 100
+    assert nice_ceiling(12) == 20
+    assert nice_ceiling(20) == 20
+    assert nice_ceiling(0.3) == pytest.approx(0.5)
+    assert nice_ceiling(2400) == 2500
+
+
+def test_blit_chart_blits_while_the_limits_hold(axes):
+    ax, canvas = axes
+    chart = BlitChart(ax, canvas, 'blue', max_limit=100)
+    chart.update(X, np.full(len(X), 50.0), 60)
+    assert (canvas.draws, canvas.blits) == (1, 0)
+    assert ax.get_ylim() == (0, 100)
+    assert chart.background is not None
+
+    chart.update(X, np.full(len(X), 60.0), 60)
+    assert (canvas.draws, canvas.blits) == (1, 1)
+    assert chart.line.get_ydata()[-1] == 60
+    assert chart.fill.get_xy()[0].tolist() == [-60, 0]
+
+
+def test_blit_chart_redraws_when_span_or_limit_changes(axes):
+    ax, canvas = axes
+    chart = BlitChart(ax, canvas, 'blue')
+    chart.update(X, np.full(len(X), 10.0), 60)
+    # 10 * 1.2 rounds up to 20.
+    assert ax.get_ylim() == (0, 20)
+    chart.update(X, np.full(len(X), 30.0), 60)
+    assert canvas.draws == 2 and ax.get_ylim() == (0, 50)
+    chart.update(X * 5, np.full(len(X), 30.0), 300)
+    assert canvas.draws == 3 and ax.get_xlim() == (-300, 0)
+    chart.update(X * 5, np.full(len(X), 31.0), 300)
+    assert canvas.draws == 3 and canvas.blits == 1
+
+
+def test_blit_chart_caps_the_limit(axes):
+    ax, canvas = axes
+    chart = BlitChart(ax, canvas, 'blue', max_limit=100)
+    chart.update(X, np.full(len(X), 99.0), 60)
+    assert ax.get_ylim() == (0, 100)
+
+
+def test_stacked_chart_stacks_layers(axes):
+    ax, canvas = axes
+    chart = StackedChart(ax, canvas)
+    layers = [np.full(len(X), 10.0), np.full(len(X), 20.0)]
+    chart.update(X, layers, 60, labels=('sda', 'sdb'))
+    assert canvas.draws == 1
+    assert chart.lines[1].get_ydata()[0] == 30
+    assert ax.get_ylim() == (0, 50)
+    assert [text.get_text() for text in ax.get_legend().get_texts()] == ['sda', 'sdb']
+
+    chart.update(X, [np.full(len(X), 12.0), np.full(len(X), 20.0)], 60,
+                 labels=('sda', 'sdb'))
+    assert (canvas.draws, canvas.blits) == (1, 1)
+
+
+def test_stacked_chart_redraws_when_layers_change(axes):
+    ax, canvas = axes
+    chart = StackedChart(ax, canvas)
+    chart.update(X, [np.full(len(X), 10.0)] * 2, 60, labels=('sda', 'sdb'))
+    chart.update(X, [np.full(len(X), 10.0)], 60, labels=('sda',))
+    assert canvas.draws == 2
+    assert len(chart.bands) == 1 and len(ax.patches) == 1
+    # A single layer needs no legend.
+    assert ax.get_legend() is None
+
+
+def test_stacked_chart_overlays_and_skips_gaps(axes):
+    ax, canvas = axes
+    chart = StackedChart(ax, canvas)
+    gap = np.full(len(X), 10.0)
+    gap[:30] = np.nan
+    chart.update(X, [gap, np.full(len(X), 20.0)], 60, labels=('a', 'b'), stacked=False)
+    assert np.isnan(chart.lines[0].get_ydata()[:30]).all()
+    assert chart.lines[1].get_ydata()[0] == 20
+    assert ax.get_ylim() == (0, 25)
+    # Stacked, the gap adds nothing to the layer above it.
+    chart.update(X, [gap, np.full(len(X), 20.0)], 60, labels=('a', 'b'))
+    assert chart.lines[1].get_ydata()[0] == 20
+    assert chart.lines[1].get_ydata()[-1] == 30
@@ -0,0 +1,50 @@
+import os
+
+import psutil
+import pytest
+
+from collector import MetricsCollector, PsutilProcessSource
+
+
+def test_queue_must_be_bounded():
+    for maxsize in (0, -1):
+        with pytest.raises(ValueError):
+            MetricsCollector(maxsize=maxsize)
+
+
+def test_publish_drops_the_oldest_sample_when_full():
+    collector = MetricsCollector(maxsize=2)
+    for sample in ('a', 'b', 'c'):
+        collector._publish(sample)
+    assert [collector.samples.get_nowait() for _ in range(2)] == ['b', 'c']
+
+
+@pytest.mark.skipif(not psutil.LINUX, reason="start times come from /proc/[pid]/stat")
+def test_scan_only_constructs_processes_for_new_pids(monkeypatch):
+    constructed = []
+
+    class CountingProcess(psutil.Process):
+        def __init__(self, pid=None):
+            constructed.append(pid)
+            super().__init__(pid)
+
+    monkeypatch.setattr(psutil, 'Process', CountingProcess)
+    source = PsutilProcessSource()
+    source.scan()
+    known = set(source.registry.entries)
+    constructed.clear()
+    columns = source.scan()
+    assert set(constructed) <= set(columns.pid) - known
+    assert len(constructed) < len(known)
+
+
+@pytest.mark.skipif(not psutil.LINUX, reason="start times come from /proc/[pid]/stat")
+def test_scan_replaces_the_entry_of_a_reused_pid():
+    source = PsutilProcessSource()
+    source.scan()
+    entry = source.registry.entries[os.getpid()]
+    entry.start = b'0'
+    source.scan()
+    renewed = source.registry.entries[os.getpid()]
+    assert renewed is not entry
+    assert renewed.key == entry.key and renewed.start != b'0'
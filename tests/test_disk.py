@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+import pytest
+
+import collector
+import sysinfo
+from collector import PartitionSampler, PartitionUsage, is_whole_disk
+
+Partition = namedtuple('Partition', ['device', 'mountpoint', 'fstype', 'opts'])
+Usage = namedtuple('Usage', ['total', 'used', 'free', 'percent'])
+
+PARTITIONS = [
+    Partition('/dev/sda1', '/', 'ext4', 'rw'),
+    Partition('/dev/sda1', '/srv/bind', 'ext4', 'rw,bind'),
+    Partition('/dev/loop0', '/snap/core', 'squashfs', 'ro'),
+    Partition('nas:/export', '/mnt/nas', 'nfs4', 'rw'),
+    Partition('/dev/sdb1', '/data', 'xfs', 'rw'),
+]
+
+
+def fake_sys_block(monkeypatch, devices):
+    """devices: name -> list of slaves."""
+    monkeypatch.setattr(collector.os.path, 'isdir', lambda path: path == '/sys/block')
+    monkeypatch.setattr(collector.os.path, 'exists',
+                        lambda path: path.rpartition('/')[2] in devices)
+
+    def listdir(path):
+        return devices[path.split('/')[3]]
+    monkeypatch.setattr(collector.os, 'listdir', listdir)
+
+
+def test_is_whole_disk(monkeypatch):
+    fake_sys_block(monkeypatch, {'sda': [], 'nvme0n1': [], 'dm-0': ['sda'],
+                                 'md0': ['sdb', 'sdc'], 'zram0': [], 'loop0': []})
+    assert is_whole_disk('sda')
+    assert is_whole_disk('nvme0n1')
+    assert not is_whole_disk('sda1')
+    assert not is_whole_disk('dm-0')
+    assert not is_whole_disk('md0')
+    assert not is_whole_disk('zram0')
+    assert not is_whole_disk('loop0')
+
+
+def test_partitions_skip_duplicates_loop_and_remote(monkeypatch):
+    monkeypatch.setattr(psutil, 'disk_partitions', lambda: PARTITIONS)
+    monkeypatch.setattr(psutil, 'disk_usage', lambda path: Usage(100, 25, 75, 25.0))
+    sampler = PartitionSampler()
+    assert sampler.sample(0.0) == ()
+    sampler._thread.join(1)
+    # The posted refresh is picked up by the next sample.
+    partitions = sampler.sample(1.0)
+    assert partitions == (PartitionUsage('/dev/sda1', '/', 100, 25, 25.0),
+                          PartitionUsage('/dev/sdb1', '/data', 100, 25, 25.0))
+
+    info = sysinfo.disk_info()['Partitions'].splitlines()
+    assert len(info) == 3
+    assert info[1] == 'nas:/export (/mnt/nas, nfs4)'
+
+
+def test_hung_mount_does_not_block_sampling(monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def disk_usage(path):
+        calls.append(path)
+        if path == '/data':
+            release.wait()
+        return Usage(100, 50, 50, 50.0)
+
+    monkeypatch.setattr(psutil, 'disk_partitions', lambda: PARTITIONS)
+    monkeypatch.setattr(psutil, 'disk_usage', disk_usage)
+    sampler = PartitionSampler(refresh_interval=1.0)
+    try:
+        started = time.monotonic()
+        assert sampler.sample(0.0) == ()
+        # A refresh is due, but the stuck one is not joined by another.
+        assert sampler.sample(5.0) == ()
+        assert time.monotonic() - started < 0.5
+        deadline = time.monotonic() + 2
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert calls == ['/', '/data']
+    finally:
+        release.set()
+    sampler._thread.join(1)
+    assert len(sampler.sample(10.0)) == 2
+
+
+IOCounters = namedtuple('IOCounters', ['read_count', 'write_count', 'read_bytes', 'write_bytes',
+                                       'read_time', 'write_time'])
+
+
+def test_disk_sampler_rates_and_await(monkeypatch):
+    counters = {'sda': IOCounters(100, 50, 1 << 20, 2 << 20, 300, 200),
+                'sda1': IOCounters(100, 50, 1 << 20, 2 << 20, 300, 200)}
+    clock = iter([10.0, 12.0, 13.0])
+    monkeypatch.setattr(collector, 'is_whole_disk', lambda name: name == 'sda')
+    monkeypatch.setattr(psutil, 'disk_io_counters', lambda perdisk: dict(counters))
+    monkeypatch.setattr(collector.time, 'monotonic', lambda: next(clock))
+    sampler = collector.DiskSampler()
+    assert sampler.sample() is None
+
+    counters['sda'] = IOCounters(140, 70, 3 << 20, 2 << 20, 700, 400)
+    counters['sdb'] = IOCounters(5, 5, 4096, 4096, 10, 10)
+    monkeypatch.setattr(collector, 'is_whole_disk', lambda name: name in ('sda', 'sdb'))
+    stats = sampler.sample()
+    assert stats.names == ('sda', 'sdb')
+    read, write, read_iops, write_iops, wait = stats.values[0].tolist()
+    assert read == (2 << 20) / 2 and write == 0
+    assert read_iops == 20 and write_iops == 10
+    # 600 ms over 60 operations.
+    assert wait == pytest.approx(10.0)
+    # A new device reports zero until its next sample.
+    assert stats.values[1].tolist() == [0.0] * 5
+
+    counters['sda'] = IOCounters(140, 70, 3 << 20, 2 << 20, 700, 400)
+    stats = sampler.sample()
+    assert stats.values[0].tolist() == [0.0] * 5
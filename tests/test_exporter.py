@@ -0,0 +1,84 @@
+import socket
+from collections import namedtuple
+
+import pytest
+
+import headless
+from collector import MetricSample, ProcessRow, ProcessSample
+from exporter import MetricsExporter, escape_label, render_prometheus
+from tsstore import MetricStore
+
+Usage = namedtuple('Usage', 'percent used total')
+
+
+def metric():
+    return MetricSample(1.0, 12.5, Usage(40.0, 4096, 8192), Usage(50.0, 1 << 30, 1 << 31),
+                        3.0, 4.0)
+
+
+def row(pid, name, cpu):
+    return ProcessRow(pid, name, 'running', cpu, 1.0, 10.0, 20.0, 5.0, 1, 'root')
+
+
+def parse(body):
+    lines = body.decode().splitlines()
+    help_lines = {line.split()[2]: line for line in lines if line.startswith('# HELP ')}
+    types = {line.split()[2]: line.split()[3] for line in lines if line.startswith('# TYPE ')}
+    values = [line for line in lines if not line.startswith('#')]
+    return help_lines, types, values
+
+
+def test_system_metrics_have_help_and_type():
+    help_lines, types, values = parse(render_prometheus(metric(), ()))
+    assert set(help_lines) == set(types)
+    assert types['system_cpu_percent'] == 'gauge'
+    assert 'system_cpu_percent 12.5' in values
+    assert 'system_memory_total_bytes 8192.0' in values
+    assert not any(name.startswith('process_') for name in types)
+    assert render_prometheus(metric(), ()).endswith(b'\n')
+
+
+def test_process_metrics_are_labelled_and_typed():
+    help_lines, types, values = parse(render_prometheus(None, [row(7, 'nginx', 2.0)]))
+    assert types['process_cpu_percent'] == 'gauge'
+    assert types['process_cpu_seconds_total'] == 'counter'
+    assert 'process_cpu_percent{pid="7",name="nginx"} 2.0' in values
+    assert 'process_cpu_seconds_total{pid="7",name="nginx"} 5.0' in values
+    # One HELP/TYPE pair per metric, not per process.
+    body = render_prometheus(None, [row(7, 'a', 1.0), row(8, 'b', 2.0)]).decode()
+    assert body.count('# TYPE process_cpu_percent ') == 1
+
+
+def test_labels_are_escaped():
+    assert escape_label('a\\b"c\nd') == 'a\\\\b\\"c\\nd'
+    _, _, values = parse(render_prometheus(None, [row(1, 'evil"\n\\name', 0.0)]))
+    assert 'process_cpu_percent{pid="1",name="evil\\"\\n\\\\name"} 0.0' in values
+
+
+def test_publish_keeps_the_top_processes():
+    exporter = MetricsExporter(port=0, top_n=2)
+    try:
+        exporter.publish(ProcessSample(1.0, (row(1, 'a', 1.0), row(2, 'b', 9.0),
+                                             row(3, 'c', 5.0))))
+        _, _, values = parse(exporter._snapshot[0])
+        pids = {value.split('pid="')[1].split('"')[0] for value in values}
+        assert pids == {'2', '3'}
+    finally:
+        exporter.server.server_close()
+
+
+def test_headless_exits_cleanly_when_the_port_is_taken(tmp_path):
+    taken = socket.socket()
+    taken.bind(('127.0.0.1', 0))
+    taken.listen()
+    port = taken.getsockname()[1]
+    store = str(tmp_path / 'store')
+    try:
+        with pytest.raises(SystemExit) as exit_info:
+            headless.main(['--http-port', str(port), '--record', store,
+                           '-o', str(tmp_path / 'out.jsonl')])
+    finally:
+        taken.close()
+    assert f"Cannot serve metrics on 127.0.0.1:{port}" in str(exit_info.value.code)
+    # The recorder was closed, so the store is no longer locked.
+    MetricStore(store).close()
@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+from agent import METRICS, frame, parse_args
+from fleet import FleetClient, HostStatus
+
+
+def test_agent_listens_on_loopback_by_default():
+    assert parse_args([]).host == '127.0.0.1'
+    assert parse_args(['--host', '0.0.0.0']).host == '0.0.0.0'
+
+
+def test_bad_frame_keeps_reconnecting():
+    client = FleetClient(reconnect_delay=0.01, connect_timeout=1.0).start()
+
+    async def handle(reader, writer):
+        # Too short for METRICS_FRAME: decoding raises struct.error.
+        writer.write(frame(METRICS, b'\x00'))
+        await writer.drain()
+
+    async def listen():
+        return await asyncio.start_server(handle, '127.0.0.1', 0)
+
+    server = asyncio.run_coroutine_threadsafe(listen(), client._loop).result(1)
+    address = server.sockets[0].getsockname()[:2]
+    try:
+        client.add(address)
+        errors = []
+        deadline = time.monotonic() + 5
+        while len(errors) < 2 and time.monotonic() < deadline:
+            for _, item in client.drain():
+                if isinstance(item, HostStatus) and not item.connected:
+                    errors.append(item.error)
+            time.sleep(0.01)
+        assert len(errors) >= 2
+        assert all(error.startswith('bad frame') for error in errors)
+    finally:
+        client._loop.call_soon_threadsafe(server.close)
+        client.stop()
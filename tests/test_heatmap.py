@@ -0,0 +1,127 @@
+from collections import namedtuple
+
+import matplotlib
+import numpy as np
+import psutil
+import pytest
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import finalos
+from collector import PerCpuSampler
+from finalos import HeatmapChart, fold_cores, heatmap_frame, pinned_cores
+
+
+def test_fold_cores_leaves_small_hosts_alone():
+    data = np.arange(12, dtype='f4').reshape(4, 3)
+    folded, group = fold_cores(data, max_rows=4)
+    assert group == 1 and folded is data
+
+
+def test_fold_cores_takes_the_max_of_each_group():
+    data = np.zeros((10, 2), dtype='f4')
+    data[3, 1] = 100
+    data[9, 0] = 50
+    folded, group = fold_cores(data, max_rows=4)
+    # 10 cores in groups of 3: the last row has one real core and padding.
+    assert group == 3
+    assert folded.shape == (4, 2)
+    assert folded[1].tolist() == [0, 100]
+    assert folded[3].tolist() == [50, 0]
+
+
+def test_heatmap_frame_right_aligns_a_filling_history():
+    window = np.array([[1, 2], [3, 4]], dtype='f4')
+    data = heatmap_frame(window, samples=5)
+    assert data.shape == (2, 5)
+    assert np.isnan(data[:, :3]).all()
+    assert data[:, 3:].tolist() == [[1, 2], [3, 4]]
+    assert heatmap_frame(np.ones((2, 8)), samples=5).shape == (2, 5)
+    assert np.isnan(heatmap_frame(np.ones((2, 0)), samples=5)).all()
+
+
+def test_pinned_means_every_sample():
+    window = np.full((3, 10), 95.0)
+    # Core 1 averages over 90 but dropped once; core 2 never reached 90.
+    window[1, 4] = 60
+    window[2] = 89
+    assert pinned_cores(window).tolist() == [0]
+    assert window[1].mean() >= 90
+    assert pinned_cores(window[:, :9]).tolist() == []
+
+
+@pytest.fixture
+def heatmap(monkeypatch):
+    monkeypatch.setattr(finalos, 'colormaps', matplotlib.colormaps)
+    figure = Figure(figsize=(4, 3))
+    canvas = FigureCanvasAgg(figure)
+    chart = HeatmapChart(figure.add_subplot(), canvas)
+    draws = []
+    original = canvas.draw
+
+    def draw():
+        draws.append(1)
+        original()
+
+    canvas.draw = draw
+    return chart, draws
+
+
+def test_heatmap_redraws_only_when_the_shape_changes(heatmap):
+    chart, draws = heatmap
+    data, group = fold_cores(heatmap_frame(np.full((4, 3), 50.0), samples=20))
+    chart.update(data, group)
+    assert len(draws) == 1 and chart.background is not None
+    chart.update(heatmap_frame(np.full((4, 4), 60.0), samples=20), group)
+    assert len(draws) == 1
+    assert chart.image.get_array()[0, -1] == 60
+    chart.update(heatmap_frame(np.full((6, 4), 60.0), samples=20), group)
+    assert len(draws) == 2
+    assert chart.image.get_extent() == [-0.5, 19.5, -0.5, 5.5]
+
+
+def test_heatmap_labels_folded_rows_by_first_core(heatmap):
+    chart, _ = heatmap
+    data, group = fold_cores(np.zeros((300, 20), dtype='f4'))
+    chart.update(data, group)
+    labels = [label.get_text() for label in chart.ax.get_yticklabels()]
+    assert labels[0] == '0'
+    assert all(int(label) % group == 0 for label in labels)
+
+
+CpuTimes = namedtuple('CpuTimes', 'user nice system idle iowait irq softirq steal guest guest_nice')
+
+
+def test_per_cpu_sampler_splits_busy_time(monkeypatch):
+    idle = CpuTimes(*[0] * 10)
+    readings = [
+        [idle, idle],  # read by __init__ for the field names
+        [idle, idle],
+        # Core 0: 60 user (20 of it guest), 20 system, 10 idle, 10 iowait.
+        # Core 1: no time passed.
+        [CpuTimes(60, 0, 20, 10, 10, 0, 0, 0, 20, 0), idle],
+    ]
+    monkeypatch.setattr(psutil, 'cpu_times', lambda percpu=False: readings.pop(0))
+    sampler = PerCpuSampler()
+    assert sampler.sample() is None
+    cores = sampler.sample()
+    assert cores.shape == (2, 5)
+    busy, user, system, iowait, steal = cores[0]
+    # guest is already counted in user, so 100 jiffies passed in all.
+    assert busy == pytest.approx(80)
+    assert user == pytest.approx(60)
+    assert system == pytest.approx(20)
+    assert iowait == pytest.approx(10)
+    assert steal == 0
+    assert cores[1].tolist() == [0, 0, 0, 0, 0]
+
+
+def test_per_cpu_sampler_restarts_when_cores_change(monkeypatch):
+    idle = CpuTimes(*[0] * 10)
+    readings = [[idle], [idle], [idle, idle], [idle, idle]]
+    monkeypatch.setattr(psutil, 'cpu_times', lambda percpu=False: readings.pop(0))
+    sampler = PerCpuSampler()
+    assert sampler.sample() is None
+    # A core came online: no deltas against the old shape.
+    assert sampler.sample() is None
+    assert sampler.sample().shape == (2, 5)
@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from collector import DISK_FIELDS
+from history import CoreHistory, DiskHistory, MetricHistory, RingBuffer, Tier
+
+
+def test_ring_buffer_wraps():
+    ring = RingBuffer(4)
+    assert ring.first() is None and ring.last() is None
+    for value in range(6):
+        ring.append(value)
+    assert list(ring.values()) == [2, 3, 4, 5]
+    assert ring.first() == 2 and ring.last() == 5
+    assert list(ring.values(last=2)) == [4, 5]
+    ring.extend([6, 7, 8])
+    assert list(ring.values()) == [5, 6, 7, 8]
+    ring.extend(range(10, 20))
+    assert list(ring.values()) == [16, 17, 18, 19]
+    assert len(ring) == 4
+
+
+def test_rollup_buckets_hold_min_avg_max():
+    tier = Tier(10, 100, rollup=True)
+    for ts, value in [(0, 1), (4, 5), (9, 3), (10, 7), (25, 2), (27, 4)]:
+        tier.add(float(ts), float(value))
+    series = tier.series()
+    assert list(series.times) == [0, 10, 20]
+    assert list(series.values) == [3, 7, 3]
+    assert list(series.low) == [1, 7, 2]
+    assert list(series.high) == [5, 7, 4]
+
+
+def test_extend_matches_add():
+    rng = np.random.default_rng(3)
+    times = np.cumsum(rng.uniform(0.1, 3.0, 500))
+    values = rng.uniform(0, 100, 500).astype('f4')
+    added = Tier(10, 50, rollup=True)
+    for ts, value in zip(times, values):
+        added.add(ts, value)
+    extended = Tier(10, 50, rollup=True)
+    # In uneven batches, so a bucket is continued across calls.
+    for chunk in np.array_split(np.arange(500), [7, 8, 120, 333]):
+        extended.extend(times[chunk], values[chunk])
+    for a, b in zip(added.series(), extended.series()):
+        np.testing.assert_allclose(a, b, rtol=1e-6)
+
+
+def test_series_picks_the_finest_tier_covering_the_span():
+    history = MetricHistory(tiers=((1, 60), (10, 60)))
+    for ts in range(300):
+        history.append(float(ts), float(ts % 20))
+    assert len(history) == 60
+    raw = history.series(30)
+    assert list(raw.times) == list(range(270, 300))
+    rolled = history.series(200)
+    assert rolled.times[-1] == 290 and rolled.times[0] == 100
+    assert list(rolled.low[:2]) == [0, 10] and list(rolled.high[:2]) == [9, 19]
+    assert history.last() == 299 % 20
+
+
+def test_fast_sampling_falls_back_to_a_rollup():
+    history = MetricHistory(tiers=((1, 60), (10, 60)))
+    for index in range(240):
+        history.append(index * 0.25, 1.0)
+    # The raw tier is full but holds only 15 s; 30 s needs the rollup.
+    series = history.series(30)
+    assert series.times[-1] - series.times[0] >= 20
+
+
+def test_core_history_restarts_on_hotplug():
+    history = CoreHistory(capacity=10)
+    for ts in range(3):
+        history.append(float(ts), np.full((2, 5), ts, dtype='f4'))
+    assert history.window(2, field=0).shape == (2, 2)
+    history.append(3.0, np.ones((4, 5), dtype='f4'))
+    assert len(history) == 1
+    assert history.latest().shape == (4, 5)
+
+
+def test_disk_history_per_device():
+    history = DiskHistory(DISK_FIELDS, tiers=((1, 60),))
+    history.append(0.0, ('sda',), np.array([[1, 2, 3, 4, 5]], dtype='f4'))
+    history.append(1.0, ('sda', 'nvme0n1'), np.array([[6, 7, 8, 9, 10],
+                                                      [11, 12, 13, 14, 15]], dtype='f4'))
+    assert len(history) == 2
+    assert list(history.series('sda', 'write', 60).values) == [2, 7]
+    series = history.series('nvme0n1', 'await', 60)
+    assert list(series.times) == [1.0] and list(series.values) == [15]
+    with pytest.raises(KeyError):
+        history.series('sdb', 'read', 60)
@@ -0,0 +1,55 @@
+import types
+
+from collector import ProcessRow
+from finalos import TaskManagerStyleMonitor
+
+
+def monitor(column, reverse=False):
+    return types.SimpleNamespace(sort_column=column, sort_reverse=reverse, process_order={})
+
+
+def order(state, rows):
+    return [row.pid for row in TaskManagerStyleMonitor.order_processes(state, rows)]
+
+
+def row(pid, name, cpu):
+    return ProcessRow(pid, name, 'running', cpu, 1.0, 0, 0, 0)
+
+
+ROWS = [row(1, 'b', 5.0), row(2, 'a', 9.0), row(3, 'C', 1.0), row(4, 'd', 5.0)]
+
+
+def test_unknown_column_keeps_the_input_order():
+    assert order(monitor(None), ROWS) == [1, 2, 3, 4]
+
+
+def test_sorts_ascending_and_reversed():
+    assert order(monitor('name'), ROWS) == [2, 1, 3, 4]
+    assert order(monitor('name', reverse=True), ROWS) == [4, 3, 1, 2]
+    assert order(monitor('pid', reverse=True), ROWS) == [4, 3, 2, 1]
+
+
+def test_ties_keep_the_previous_display_order():
+    state = monitor('cpu')
+    assert order(state, ROWS) == [3, 1, 4, 2]
+    # 1 and 4 tie on CPU: the previous order wins over the input order.
+    assert order(state, list(reversed(ROWS))) == [3, 1, 4, 2]
+
+    state.sort_reverse = True
+    assert order(state, ROWS) == [2, 1, 4, 3]
+    # Reversing the direction keeps tied rows stable rather than flipping them.
+    assert order(state, list(reversed(ROWS))) == [2, 1, 4, 3]
+
+
+def test_same_table_sorts_to_the_same_order():
+    state = monitor('cpu')
+    first = order(state, ROWS)
+    for _ in range(3):
+        assert order(state, ROWS[::-1]) == first
+
+
+def test_new_rows_go_after_known_ties():
+    state = monitor('cpu')
+    order(state, ROWS)
+    rows = [row(5, 'e', 5.0)] + ROWS
+    assert order(state, rows) == [3, 1, 4, 5, 2]
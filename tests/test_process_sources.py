@@ -0,0 +1,91 @@
+import os
+import pwd
+import sys
+import time
+
+import psutil
+import pytest
+
+import collector
+from collector import PsutilProcessSource
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'),
+                                reason="compares against /proc")
+
+
+def rows_by_pid(columns):
+    return dict(zip(columns.pid, zip(columns.name, columns.user, columns.ppid)))
+
+
+def fields_by_pid(columns, *names):
+    return dict(zip(columns.pid, zip(*(getattr(columns, name) for name in names))))
+
+
+def test_sources_agree_on_owner_and_parent():
+    from procfs import ProcfsProcessSource
+    psutil_rows = rows_by_pid(PsutilProcessSource().scan())
+    procfs_rows = rows_by_pid(ProcfsProcessSource().scan())
+    me = os.getpid()
+    expected_user = pwd.getpwuid(os.geteuid()).pw_name
+    assert psutil_rows[me][1] == procfs_rows[me][1] == expected_user
+    assert psutil_rows[me][2] == procfs_rows[me][2] == os.getppid()
+    common = psutil_rows.keys() & procfs_rows.keys()
+    assert all(psutil_rows[pid][1] == procfs_rows[pid][1] for pid in common)
+
+
+def started_before(pid, seconds):
+    try:
+        return time.time() - psutil.Process(pid).create_time() > seconds
+    except psutil.Error:
+        return False
+
+
+def test_sources_agree_on_name_status_memory_and_cpu():
+    from procfs import ProcfsProcessSource
+    fields = ('name', 'status', 'memory_percent', 'cpu_percent')
+    # First scans report lifetime CPU averages, which barely move between
+    # the two scans.
+    psutil_rows = fields_by_pid(PsutilProcessSource().scan(), *fields)
+    procfs_rows = fields_by_pid(ProcfsProcessSource().scan(), *fields)
+    common = psutil_rows.keys() & procfs_rows.keys()
+    assert os.getpid() in common
+    for pid in common:
+        (name, status, memory, cpu), (p_name, p_status, p_memory, p_cpu) = (
+            psutil_rows[pid], procfs_rows[pid])
+        assert p_name == name
+        assert p_memory == pytest.approx(memory, abs=0.5)
+        if started_before(pid, 30):
+            # psutil's start times are only as precise as the whole-second
+            # boot time, which skews the average of a young process.
+            assert p_cpu == pytest.approx(cpu, abs=5.0)
+    # A process may go to sleep between the two scans, but most don't.
+    same_status = sum(psutil_rows[pid][1] == procfs_rows[pid][1] for pid in common)
+    assert same_status >= 0.9 * len(common)
+
+
+def test_long_names_are_expanded_from_cmdline(tmp_path, monkeypatch):
+    import procfs
+    proc = tmp_path / '42'
+    proc.mkdir()
+    (proc / 'cmdline').write_bytes(b'/usr/libexec/gnome-keyring-daemon\0--start\0')
+    source = procfs.ProcfsProcessSource()
+    monkeypatch.setattr(procfs, 'PROC', str(tmp_path))
+    assert source._expand_name('42', 'gnome-keyring-d') == 'gnome-keyring-daemon'
+    assert source._expand_name('42', 'something-else-') == 'something-else-'
+    (proc / 'cmdline').write_bytes(b'')
+    assert source._expand_name('42', 'gnome-keyring-d') == 'gnome-keyring-d'
+    (proc / 'cmdline').write_bytes(b'gnome-keyring-daemon: worker process')
+    assert source._expand_name('42', 'gnome-keyring-d') == 'gnome-keyring-daemon:'
+    assert source._expand_name('43', 'gnome-keyring-d') == 'gnome-keyring-d'
+
+
+def test_owner_is_read_on_every_scan(monkeypatch):
+    source = PsutilProcessSource()
+    me = os.getpid()
+    columns = source.scan()
+    before = dict(zip(columns.pid, columns.user))[me]
+    # As if the process had called setuid() between two scans.
+    monkeypatch.setattr(collector, 'user_name', lambda uid: f'uid-{uid}')
+    columns = source.scan()
+    assert before != f'uid-{os.geteuid()}'
+    assert dict(zip(columns.pid, columns.user))[me] == f'uid-{os.geteuid()}'
@@ -0,0 +1,76 @@
+import pytest
+
+from collector import ProcessRow
+from procfilter import FilterError, ProcessFilter, ProcessIndex, parse_number
+
+
+def row(pid, name, user='root', status='sleeping', cpu=0.0, memory=0.0, disk=0.0,
+        network=0.0, ppid=1):
+    return ProcessRow(pid, name, status, cpu, memory, disk, network, 0.0, ppid, user)
+
+
+ROWS = (
+    row(1, 'systemd', memory=0.5),
+    row(100, 'chrome', user='alice', status='running', cpu=35.0, memory=8.0,
+        network=50 * 1024),
+    row(101, 'chrome', user='alice', cpu=2.0, memory=4.0),
+    row(200, 'nginx', user='www-data', disk=2 * 1024 ** 2),
+    row(1234, 'kworker/0:1', cpu=0.1),
+    row(300, 'py1234', user='bob', status='running', cpu=99.0),
+)
+
+
+def query(text, rows=ROWS):
+    index = ProcessIndex()
+    index.update(rows)
+    return [r.pid for r in index.query(ProcessFilter(text))]
+
+
+def test_parse_number_units():
+    assert parse_number('10') == 10
+    assert parse_number('1.5k') == 1536
+    assert parse_number('2M') == 2 * 1024 ** 2
+    assert parse_number('50%') == 50
+    with pytest.raises(FilterError):
+        parse_number('lots')
+
+
+@pytest.mark.parametrize('text, pids', [
+    ('', [1, 100, 101, 200, 1234, 300]),
+    ('CHROME', [100, 101]),
+    ('/^k/', [1234]),
+    ('1234', [1234, 300]),
+    ('pid=1234', [1234]),
+    ('user:alice', [100, 101]),
+    ('user:/^(www|bob)/', [200, 300]),
+    ('status:running cpu>20', [100, 300]),
+    ('chrome mem>=5', [100]),
+    ('disk>1M', [200]),
+    ('io>10k', [100]),
+    ('!user:root', [100, 101, 200, 300]),
+    ('!status:sleeping !chrome', [300]),
+    ('cpu<=0.1 !systemd', [200, 1234]),
+    ('"kworker/0:1"', [1234]),
+    ('nothing', []),
+])
+def test_queries(text, pids):
+    assert query(text) == pids
+
+
+@pytest.mark.parametrize('text', ['cpu>lots', '/[/', '!'])
+def test_bad_filters(text):
+    with pytest.raises(FilterError):
+        ProcessFilter(text)
+
+
+def test_index_follows_changes():
+    index = ProcessIndex()
+    index.update(ROWS)
+    renamed = tuple(r._replace(name='chromium') if r.pid == 100 else r
+                    for r in ROWS if r.pid != 101)
+    index.update(renamed)
+    assert [r.pid for r in index.query(ProcessFilter('chrom'))] == [100]
+    assert 'chrome' not in index.postings['name']
+    assert index.postings['name']['chromium'] == {100}
+    assert index.query(ProcessFilter('pid=101')) == []
+    assert len(index) == len(renamed)
@@ -0,0 +1,108 @@
+import random
+
+from collector import ProcessRow
+from proctree import ProcessTree
+
+
+def row(pid, ppid, cpu=0.0, memory=0.0, name=None):
+    return ProcessRow(pid, name or f'p{pid}', 'running', cpu, memory, 0, 0, 0, ppid)
+
+
+def brute_totals(rows):
+    by_pid = {r.pid: r for r in rows}
+    children = {}
+    for r in rows:
+        if r.ppid in by_pid and r.ppid != r.pid:
+            children.setdefault(r.ppid, []).append(r.pid)
+
+    def total(pid):
+        r = by_pid[pid]
+        cpu, memory = r.cpu_percent, r.memory_percent
+        for child in children.get(pid, ()):
+            c, m = total(child)
+            cpu += c
+            memory += m
+        return cpu, memory
+    return {pid: total(pid) for pid in by_pid}
+
+
+def test_links_and_totals():
+    tree = ProcessTree()
+    changes = tree.update([row(1, 0, 1.0, 1.0), row(2, 1, 2.0, 2.0), row(3, 2, 3.0, 3.0)])
+    assert sorted(changes.placed) == [1, 2, 3]
+    assert list(tree.roots) == [1]
+    assert tree.nodes[1].cpu == 6.0 and tree.nodes[2].memory == 5.0
+
+    changes = tree.update([row(1, 0, 1.0, 1.0), row(2, 1, 2.0, 2.0), row(3, 2, 5.0, 3.0)])
+    assert changes.dirty == {1, 2, 3}
+    assert changes.placed == []
+    assert tree.nodes[1].cpu == 8.0
+
+
+def test_exited_parent_leaves_children_as_roots():
+    tree = ProcessTree()
+    tree.update([row(1, 0, 1.0), row(2, 1, 2.0), row(3, 2, 3.0)])
+    changes = tree.update([row(1, 0, 1.0), row(3, 2, 3.0)])
+    assert changes.removed == [2]
+    assert set(tree.roots) == {1, 3}
+    assert tree.nodes[1].cpu == 1.0
+    # The OS reparents it to init.
+    changes = tree.update([row(1, 0, 1.0), row(3, 1, 3.0)])
+    assert changes.placed == [3]
+    assert list(tree.roots) == [1]
+    assert tree.nodes[1].cpu == 4.0
+
+
+def test_child_listed_before_its_parent_is_reattached():
+    tree = ProcessTree()
+    tree.update([row(1, 0, 1.0), row(5, 4, 2.0)])
+    assert set(tree.roots) == {1, 5}
+    changes = tree.update([row(1, 0, 1.0), row(4, 1, 1.0), row(5, 4, 2.0)])
+    assert set(changes.placed) == {4, 5}
+    assert list(tree.roots) == [1]
+    assert tree.nodes[5].parent is tree.nodes[4]
+    assert tree.nodes[1].cpu == 4.0
+    assert not tree.waiting
+
+
+def test_ppid_cycle_does_not_loop():
+    tree = ProcessTree()
+    tree.update([row(1, 2), row(2, 1)])
+    assert len(tree.roots) == 1
+    assert len(tree) == 2
+
+
+def test_random_updates_match_a_rebuild_exactly():
+    rng = random.Random(7)
+    tree = ProcessTree()
+    rows = {}
+    next_pid = 2
+    for step in range(300):
+        for pid in list(rows):
+            if rng.random() < 0.05:
+                del rows[pid]
+        for _ in range(rng.randint(0, 5)):
+            ppid = rng.choice(list(rows) or [1])
+            rows[next_pid] = row(next_pid, ppid)
+            next_pid += 1
+        for pid, r in rows.items():
+            if rng.random() < 0.5:
+                rows[pid] = r._replace(cpu_percent=rng.uniform(0, 100) / 3,
+                                       memory_percent=rng.uniform(0, 10) / 7)
+        table = list(rows.values())
+        rng.shuffle(table)
+        tree.update(table)
+
+        expected = brute_totals(table)
+        for pid, (cpu, memory) in expected.items():
+            node = tree.nodes[pid]
+            assert abs(node.cpu - cpu) < 1e-5 and abs(node.memory - memory) < 1e-5
+        # Subtree totals are exact sums: a leaf's total is its own row.
+        for node in tree.nodes.values():
+            if not node.children:
+                assert node.cpu_units == round(node.row.cpu_percent * 1000000)
+        # Every process whose parent is listed hangs under it.
+        for pid, r in rows.items():
+            parent = tree.nodes[pid].parent
+            if r.ppid in rows:
+                assert parent is tree.nodes[r.ppid]
@@ -0,0 +1,36 @@
+from profiler import Profiler
+
+
+class FakeRoot:
+    def __init__(self):
+        self.jobs = {}
+        self._next = 0
+
+    def after(self, delay, callback, *args):
+        self._next += 1
+        job = f'after#{self._next}'
+        self.jobs[job] = (callback, args)
+        return job
+
+    def after_cancel(self, job):
+        del self.jobs[job]
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback, args in jobs.values():
+            callback(*args)
+
+
+def test_lag_probe_is_a_single_chain_across_toggles():
+    root = FakeRoot()
+    profiler = Profiler()
+    for _ in range(5):
+        profiler.enable(root)
+        profiler.disable()
+        profiler.enable(root)
+    assert len(root.jobs) == 1
+    for _ in range(3):
+        root.run_pending()
+        assert len(root.jobs) == 1
+    profiler.disable()
+    assert not root.jobs
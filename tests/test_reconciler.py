@@ -0,0 +1,131 @@
+import random
+
+from finalos import TreeviewReconciler, increasing_subsequence_mask, move_into_order
+
+
+class FakeTree:
+    """Records the Treeview calls a reconciler makes."""
+
+    def __init__(self):
+        self.children = []
+        self.values = {}
+        self.calls = []
+        self._next = 0
+
+    def insert(self, parent, index, values):
+        self._next += 1
+        item = f'I{self._next}'
+        self.children.append(item)
+        self.values[item] = values
+        self.calls.append(('insert', item))
+        return item
+
+    def item(self, item, values):
+        self.values[item] = values
+        self.calls.append(('item', item))
+
+    def move(self, item, parent, index):
+        self.children.remove(item)
+        self.children.insert(index, item)
+        self.calls.append(('move', item))
+
+    def delete(self, *items):
+        for item in items:
+            self.children.remove(item)
+            del self.values[item]
+        self.calls.append(('delete',) + items)
+
+    def displayed(self):
+        return [self.values[item] for item in self.children]
+
+
+def rows(*keys, suffix=''):
+    return [(key, (f'{key}{suffix}',)) for key in keys]
+
+
+def test_increasing_subsequence_mask():
+    assert increasing_subsequence_mask([]) == []
+    seq = [3, 1, 2, 5, 4, 6, 0]
+    keep = increasing_subsequence_mask(seq)
+    kept = [value for value, flag in zip(seq, keep) if flag]
+    assert len(kept) == 4
+    assert kept == sorted(set(kept))
+    assert all(increasing_subsequence_mask(list(range(5))))
+
+
+def test_move_into_order_moves_only_rows_outside_the_lis():
+    tree = FakeTree()
+    items = {key: tree.insert('', 'end', values=(key,)) for key in 'abcdef'}
+    tree.calls.clear()
+    current = list('abcdef')
+    move_into_order(tree, '', current, list('bcdefa'), items)
+    assert current == list('bcdefa')
+    assert tree.calls == [('move', items['a'])]
+    assert tree.children == [items[key] for key in 'bcdefa']
+
+
+def test_move_into_order_random_permutations():
+    rng = random.Random(0)
+    for _ in range(50):
+        keys = list(range(20))
+        tree = FakeTree()
+        items = {key: tree.insert('', 'end', values=(key,)) for key in keys}
+        order = keys[:]
+        rng.shuffle(order)
+        tree.calls.clear()
+        move_into_order(tree, '', keys, order, items)
+        assert tree.children == [items[key] for key in order]
+        position = {key: index for index, key in enumerate(range(20))}
+        kept = sum(increasing_subsequence_mask([position[key] for key in order]))
+        assert len(tree.calls) == 20 - kept
+
+
+def test_unchanged_rows_issue_no_calls():
+    tree = FakeTree()
+    view = TreeviewReconciler(tree)
+    view.reconcile(rows(1, 2, 3))
+    tree.calls.clear()
+    view.reconcile(rows(1, 2, 3))
+    assert tree.calls == []
+
+
+def test_changed_values_update_only_that_row():
+    tree = FakeTree()
+    view = TreeviewReconciler(tree)
+    view.reconcile(rows(1, 2, 3))
+    tree.calls.clear()
+    view.reconcile(rows(1) + rows(2, suffix='!') + rows(3))
+    assert tree.calls == [('item', view.items[2])]
+    assert tree.displayed() == [('1',), ('2!',), ('3',)]
+
+
+def test_reorder_moves_only_rows_outside_the_lis():
+    tree = FakeTree()
+    view = TreeviewReconciler(tree)
+    view.reconcile(rows(1, 2, 3, 4, 5))
+    tree.calls.clear()
+    view.reconcile(rows(5, 1, 2, 3, 4))
+    assert tree.calls == [('move', view.items[5])]
+    assert tree.displayed() == [(str(key),) for key in (5, 1, 2, 3, 4)]
+
+
+def test_removed_rows_are_deleted_in_one_call():
+    tree = FakeTree()
+    view = TreeviewReconciler(tree)
+    view.reconcile(rows(1, 2, 3, 4))
+    stale = [view.items[2], view.items[4]]
+    tree.calls.clear()
+    view.reconcile(rows(1, 3))
+    assert tree.calls == [('delete',) + tuple(stale)]
+    assert tree.displayed() == [('1',), ('3',)]
+    assert view.key_for(stale[0]) is None
+    assert view.key_for(view.items[3]) == 3
+
+
+def test_inserts_deletes_and_moves_together():
+    tree = FakeTree()
+    view = TreeviewReconciler(tree)
+    view.reconcile(rows(1, 2, 3, 4))
+    view.reconcile(rows(4, 6, 2, 1, 5))
+    assert tree.displayed() == [(str(key),) for key in (4, 6, 2, 1, 5)]
+    assert view.order == [4, 6, 2, 1, 5]
@@ -0,0 +1,74 @@
+from finalos import TabRenderer
+
+
+class StubTab:
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+
+class StubNotebook:
+    def __init__(self, selected):
+        self.selected = selected
+        self.viewable = True
+
+    def select(self):
+        return str(self.selected)
+
+    def winfo_viewable(self):
+        return self.viewable
+
+
+def setup():
+    perf, procs = StubTab('.nb.perf'), StubTab('.nb.procs')
+    notebook = StubNotebook(perf)
+    renderer = TabRenderer(notebook)
+    calls = []
+    renderer.register(perf, lambda: calls.append('perf'))
+    renderer.register(procs, lambda: calls.append('procs'))
+    return renderer, notebook, perf, procs, calls
+
+
+def test_only_the_selected_stale_tab_renders():
+    renderer, notebook, perf, procs, calls = setup()
+    renderer.flush()
+    assert calls == ['perf']
+    renderer.flush()
+    assert calls == ['perf']
+    renderer.invalidate(perf, procs)
+    renderer.flush()
+    assert calls == ['perf', 'perf']
+
+
+def test_hidden_tab_is_skipped_and_catches_up_once():
+    renderer, notebook, perf, procs, calls = setup()
+    renderer.flush()
+    for _ in range(5):
+        renderer.invalidate(procs)
+        renderer.flush()
+    assert calls == ['perf']
+
+    notebook.selected = procs
+    renderer.flush()
+    renderer.flush()
+    assert calls == ['perf', 'procs']
+
+
+def test_nothing_renders_while_the_window_is_hidden():
+    renderer, notebook, perf, procs, calls = setup()
+    notebook.viewable = False
+    renderer.flush()
+    assert calls == []
+    notebook.viewable = True
+    renderer.flush()
+    assert calls == ['perf']
+
+
+def test_unregistered_tabs_are_ignored():
+    renderer, notebook, perf, procs, calls = setup()
+    notebook.selected = StubTab('.nb.other')
+    renderer.invalidate(notebook.selected)
+    renderer.flush()
+    assert calls == []
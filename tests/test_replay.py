@@ -0,0 +1,90 @@
+import pytest
+
+from collector import MetricSample, ProcessRow, ProcessSample
+from replay import Replay, Usage
+from tsstore import MetricStore
+
+
+@pytest.fixture
+def replay(tmp_path):
+    path = str(tmp_path / 'store')
+    writer = MetricStore(path)
+    for ts in range(100, 200):
+        writer.append_metrics(MetricSample(float(ts), float(ts % 100), Usage(40.0),
+                                           Usage(50.0), 0.0, 0.0))
+        if ts % 10 == 0:
+            rows = (ProcessRow(ts, f'proc{ts}', 'running', 1.0, 1.0, 0, 0, 0, 1, 'root'),)
+            writer.append_processes(ProcessSample(float(ts), rows))
+    writer.close()
+    store = MetricStore(path, readonly=True)
+    yield Replay(store, lookback=30)
+    store.close()
+
+
+def test_first_advance_loads_the_lookback(replay):
+    records, reset = replay.advance(now=0.0)
+    assert reset
+    assert list(records['ts']) == [100.0]
+    replay.seek(150)
+    records, reset = replay.advance(now=0.0)
+    assert reset
+    assert list(records['ts']) == [float(ts) for ts in range(120, 151)]
+
+
+def test_advance_follows_the_wall_clock_and_speed(replay):
+    replay.advance(now=0.0)
+    records, reset = replay.advance(now=3.0)
+    assert not reset
+    assert list(records['ts']) == [101.0, 102.0, 103.0]
+    replay.set_speed(10)
+    records, _ = replay.advance(now=4.0)
+    assert list(records['ts']) == [float(ts) for ts in range(104, 114)]
+    assert replay.position == 113
+
+
+def test_seek_is_clamped_to_the_recording(replay):
+    replay.seek(0)
+    assert replay.position == 100
+    replay.seek(1000)
+    assert replay.position == 199
+    assert replay.finished
+
+
+def test_paused_replay_returns_nothing(replay):
+    replay.advance(now=0.0)
+    replay.toggle()
+    assert not replay.playing
+    records, reset = replay.advance(now=5.0)
+    assert len(records) == 0 and not reset
+    assert replay.position == 100
+    replay.toggle()
+    # The pause does not count as playback time.
+    records, _ = replay.advance(now=6.0)
+    assert list(records['ts']) == [101.0]
+
+
+def test_end_of_data_stops_and_toggle_starts_over(replay):
+    replay.seek(195)
+    replay.advance(now=0.0)
+    records, _ = replay.advance(now=10.0)
+    assert list(records['ts']) == [196.0, 197.0, 198.0, 199.0]
+    assert replay.finished
+    records, reset = replay.advance(now=11.0)
+    assert len(records) == 0 and not reset
+
+    replay.toggle()
+    assert not replay.playing
+    replay.toggle()
+    assert replay.playing and replay.position == replay.start
+    records, reset = replay.advance(now=12.0)
+    assert reset and list(records['ts']) == [100.0]
+
+
+def test_processes_only_when_the_snapshot_changes(replay):
+    replay.seek(125)
+    sample = replay.processes()
+    assert sample.timestamp == 120.0
+    assert [row.pid for row in sample.rows] == [120]
+    assert replay.processes() is None
+    replay.seek(131)
+    assert replay.processes().timestamp == 130.0
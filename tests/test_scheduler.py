@@ -0,0 +1,40 @@
+import random
+import time
+
+from collector import MetricSample
+from replay import Usage
+from scheduler import AdaptiveScheduler
+
+
+def sample(ts, cpu, mem=40.0):
+    return MetricSample(ts, cpu, Usage(mem), Usage(50.0), 0.0, 0.0)
+
+
+def test_noisy_flat_input_returns_to_slow_interval():
+    scheduler = AdaptiveScheduler(interval=1.0, fast_interval=0.25, hold=10.0, cpu_budget=1e9)
+    start = time.monotonic()
+    noise = random.Random(1)
+    ts = 0.0
+    scheduler.observe(sample(ts, 20.0), now=start)
+    # A real jump switches to fast sampling...
+    ts += 1.0
+    scheduler.observe(sample(ts, 50.0), now=start + ts)
+    assert scheduler.intervals(now=start + ts).metric == 0.25
+
+    # ...and +-4 points of jitter every 0.25s (16 points/s between
+    # samples) must not keep it there.
+    while ts < 60.0:
+        ts += 0.25
+        scheduler.observe(sample(ts, 50.0 + noise.uniform(-4, 4)), now=start + ts)
+    assert scheduler.intervals(now=start + ts).metric == 1.0
+
+
+def test_memory_step_triggers_fast_mode():
+    scheduler = AdaptiveScheduler(interval=1.0, fast_interval=0.25, cpu_budget=1e9)
+    start = time.monotonic()
+    for ts in range(10):
+        scheduler.observe(sample(float(ts), 10.0, 40.0), now=start + ts)
+    assert scheduler.intervals(now=start + 10).metric == 1.0
+    scheduler.observe(sample(10.0, 10.0, 55.0), now=start + 10)
+    assert scheduler.intervals(now=start + 10).metric == 0.25
+    assert scheduler.intervals('unfocused', now=start + 10).metric == 2.0
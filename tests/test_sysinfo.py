@@ -0,0 +1,27 @@
+import sysinfo
+
+
+def test_system_info_cache_fetches_stale_sections_once():
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return {'Key': 'value'}
+
+    def broken():
+        raise OSError('unavailable')
+
+    cache = sysinfo.SystemInfoCache(sections=(('Good', fetch, None), ('Bad', broken, 60)))
+    try:
+        assert cache.refresh() == ['Good', 'Bad']
+        assert cache.refresh() == []
+        finished = {}
+        while cache.loading:
+            finished.update(cache.poll())
+        assert finished['Good'] == {'Key': 'value'}
+        assert isinstance(finished['Bad'], OSError)
+        # Good never goes stale; Bad was never fetched, so it is retried.
+        assert cache.refresh() == ['Bad']
+        assert len(calls) == 1
+    finally:
+        cache.shutdown()
@@ -0,0 +1,134 @@
+import queue
+import threading
+
+import pytest
+
+from collector import MetricSample, ProcessRow, ProcessSample
+from replay import Usage
+from tsstore import MetricStore, StoreLocked, StoreWriter
+
+
+def metric(ts, cpu=10.0):
+    return MetricSample(ts, cpu, Usage(40.0), Usage(50.0), 100.0, 200.0)
+
+
+def processes(ts, count=3):
+    rows = tuple(ProcessRow(pid, f'proc{pid}', 'running', 1.5, 0.5, 0, 0, 2.0, 1, 'root')
+                 for pid in range(1, count + 1))
+    return ProcessSample(ts, rows)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetricStore(str(tmp_path / 'store'))
+    yield store
+    store.close()
+
+
+def fill(store, start, stop):
+    for ts in range(start, stop):
+        store.append_metrics(metric(float(ts), cpu=ts % 100))
+        store.append_processes(processes(float(ts)))
+
+
+def test_round_trip(tmp_path, store):
+    fill(store, 0, 10)
+    store.close()
+
+    reader = MetricStore(str(tmp_path / 'store'), readonly=True)
+    try:
+        assert reader.time_range() == (0.0, 9.0)
+        records = reader.metrics_between(2, 5)
+        assert list(records['ts']) == [2.0, 3.0, 4.0]
+        assert list(records['cpu']) == [2.0, 3.0, 4.0]
+        assert records['memory'][0] == pytest.approx(40.0)
+        sample = reader.processes_at(4.5)
+        assert sample.timestamp == 4.0
+        assert sample.rows == processes(4.0).rows
+        assert reader.processes_at(-1) is None
+    finally:
+        reader.close()
+
+
+def test_prune_by_age(tmp_path, store):
+    fill(store, 0, 10)
+    reader = MetricStore(str(tmp_path / 'store'), readonly=True)
+    try:
+        assert reader.processes_at(3.0).rows == processes(3.0).rows
+        store.prune(6.0)
+        assert store.time_range() == (6.0, 9.0)
+        # Appends continue at the new end of the rebased data file.
+        fill(store, 10, 12)
+        store.flush()
+
+        reader.reload()
+        assert reader.time_range() == (6.0, 11.0)
+        assert reader.snapshot_time_at(100) == 11.0
+        assert reader.processes_at(6.0).rows == processes(6.0).rows
+        assert reader.processes_at(11.0).rows == processes(11.0).rows
+        assert reader.processes_at(5.0) is None
+    finally:
+        reader.close()
+
+
+def test_size_cutoff(store):
+    fill(store, 0, 50)
+    limit = store.nbytes // 2
+    store.prune(store.size_cutoff(limit))
+    assert store.nbytes <= limit
+    assert store.time_range()[1] == 49.0
+    assert store.size_cutoff(store.nbytes) is None
+
+
+def test_second_writer_is_refused(tmp_path, store):
+    with pytest.raises(StoreLocked):
+        MetricStore(str(tmp_path / 'store'))
+    reader = MetricStore(str(tmp_path / 'store'), readonly=True)
+    reader.close()
+
+
+def test_lock_is_released_on_close(tmp_path, store):
+    store.close()
+    MetricStore(str(tmp_path / 'store')).close()
+
+
+def test_writer_applies_retention(tmp_path):
+    writer = StoreWriter(MetricStore(str(tmp_path / 'store')), max_age=5,
+                         retention_interval=0)
+    for ts in range(20):
+        writer.submit(metric(float(ts)))
+    writer.close()
+    reader = MetricStore(str(tmp_path / 'store'), readonly=True)
+    try:
+        assert reader.time_range() == (14.0, 19.0)
+    finally:
+        reader.close()
+
+
+def test_close_does_not_block_on_full_queue(tmp_path):
+    writer = StoreWriter(MetricStore(str(tmp_path / 'store')), maxsize=2)
+    blocked = threading.Event()
+    release = threading.Event()
+    append = writer.store.append_metrics
+
+    def slow_append(sample):
+        blocked.set()
+        release.wait()
+        append(sample)
+
+    writer.store.append_metrics = slow_append
+    writer.submit(metric(0.0))
+    blocked.wait(1)
+    writer.submit(metric(1.0))
+    writer.submit(metric(2.0))
+    with pytest.raises(queue.Full):
+        writer._queue.put_nowait(metric(3.0))
+
+    closer = threading.Thread(target=writer.close, kwargs={'timeout': 0})
+    closer.start()
+    closer.join(1)
+    assert not closer.is_alive()
+    assert writer.dropped == 1
+    release.set()
+    writer._thread.join(1)
+    assert not writer._thread.is_alive()
@@ -0,0 +1,60 @@
+import types
+
+import finalos
+from collector import MetricSample, ProcessRow, ProcessSample
+from replay import Usage
+
+
+class FakeMonitor:
+    """Just the state update_data touches."""
+
+    def __init__(self, samples):
+        self.running = True
+        self.profiler = types.SimpleNamespace(enabled=False)
+        self.collector = types.SimpleNamespace(drain=lambda: samples)
+        self.fleet = types.SimpleNamespace(drain=lambda: [])
+        self.renderer = types.SimpleNamespace(invalidate=lambda tab: None, flush=lambda: None)
+        self.root = types.SimpleNamespace(after=lambda delay, callback: None)
+        self.exporter = None
+        self.recorder = None
+        self.viewed_host = None
+        self.replay = None
+        self.perf_tab = object()
+        self.ui_poll_interval = 100
+        self.live_rows = ()
+        self.recorded = []
+        self.process_lists = []
+        # Rescheduled by update_data; never called here.
+        self.update_data = None
+
+    def record_metrics(self, sample):
+        self.recorded.append(sample)
+
+    def check_alerts(self, sample):
+        pass
+
+    def apply_alert_events(self):
+        pass
+
+    def apply_schedule(self):
+        pass
+
+    def update_process_list(self, rows):
+        self.process_lists.append(rows)
+
+
+def test_samples_after_an_error_are_still_applied(monkeypatch):
+    errors = []
+    monkeypatch.setattr(finalos, 'messagebox', types.SimpleNamespace(
+        showerror=lambda title, message: errors.append(message)))
+    metrics = [MetricSample(ts, 1.0, Usage(1.0), Usage(1.0), 0.0, 0.0) for ts in (1.0, 2.0)]
+    rows = (ProcessRow(1, 'init', 'sleeping', 0.0, 0.1, 0, 0, 0),)
+    monitor = FakeMonitor([metrics[0], RuntimeError("scan failed"), metrics[1],
+                           RuntimeError("again"), ProcessSample(2.0, rows)])
+
+    finalos.TaskManagerStyleMonitor.update_data(monitor)
+
+    assert monitor.recorded == metrics
+    assert monitor.live_rows == rows
+    assert monitor.process_lists == [rows]
+    assert errors == ["scan failed"]
@@ -0,0 +1,178 @@
+import types
+
+from collector import ProcessRow
+from finalos import (VIRTUAL_LIST_THRESHOLD, TaskManagerStyleMonitor, TreeviewReconciler,
+                     VirtualProcessList)
+
+
+class FakeTree:
+    """The Treeview calls the process lists make."""
+
+    def __init__(self, height=28 * 11):
+        self.children = []
+        self.values = {}
+        self.bindings = {}
+        self.options = {}
+        self.selected = ()
+        self.height = height
+        self._next = 0
+
+    def insert(self, parent, index, values):
+        self._next += 1
+        item = f'I{self._next}'
+        self.children.append(item)
+        self.values[item] = values
+        return item
+
+    def item(self, item, values):
+        self.values[item] = values
+
+    def move(self, item, parent, index):
+        self.children.remove(item)
+        self.children.insert(index, item)
+
+    def delete(self, *items):
+        for item in items:
+            self.children.remove(item)
+            del self.values[item]
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def bind(self, sequence, callback):
+        self.bindings[sequence] = callback
+
+    def unbind(self, sequence):
+        self.bindings.pop(sequence, None)
+
+    def winfo_height(self):
+        return self.height
+
+    def yview(self, *args):
+        pass
+
+    def yview_moveto(self, fraction):
+        pass
+
+    def selection(self):
+        return self.selected
+
+    def selection_set(self, items):
+        self.selected = tuple(items)
+
+    def pids(self):
+        return [int(self.values[item][1]) for item in self.children]
+
+
+class FakeScrollbar:
+    def __init__(self):
+        self.options = {}
+        self.position = None
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+def table(count):
+    return [ProcessRow(pid, f'p{pid}', 'sleeping', 0.0, 0.0, 0, 0, 0)
+            for pid in range(count)]
+
+
+def virtual_list(count, visible=10, overscan=5):
+    tree = FakeTree(height=28 * (visible + 1))
+    rows = VirtualProcessList(tree, FakeScrollbar(), overscan=overscan)
+    rows.update(table(count))
+    return tree, rows
+
+
+def test_only_the_window_is_materialized():
+    tree, rows = virtual_list(100)
+    assert rows.visible == 10
+    assert tree.pids() == list(range(15))
+    rows.yview('moveto', '0.5')
+    assert rows.first == 50
+    assert tree.pids() == list(range(50, 65))
+    # Slot items are reused rather than recreated.
+    assert len(tree.children) == 15
+
+
+def test_key_for_maps_slots_to_the_current_window():
+    tree, rows = virtual_list(100)
+    slot = tree.children[3]
+    assert rows.key_for(slot) == 3
+    rows.yview('scroll', '2', 'pages')
+    assert rows.key_for(slot) == 23
+    assert rows.key_for('not-an-item') is None
+
+
+def test_key_for_ignores_slots_past_the_end():
+    tree, rows = virtual_list(100)
+    last = tree.children[-1]
+    rows.update(table(12))
+    assert rows.key_for(tree.children[-1]) == 11
+    assert rows.key_for(last) is None
+
+
+def test_scrolling_is_clamped_at_both_edges():
+    tree, rows = virtual_list(100)
+    rows.yview('scroll', '-5', 'units')
+    assert rows.first == 0
+    rows.yview('moveto', '2.0')
+    assert rows.first == 90
+    assert tree.pids()[0] == 90 and tree.pids()[-1] == 99
+    assert rows.scrollbar.position == (0.9, 1.0)
+    # A shrinking table pulls the window back in.
+    rows.update(table(50))
+    assert rows.first == 40
+    rows.update(table(3))
+    assert rows.first == 0 and tree.pids() == [0, 1, 2]
+
+
+def test_selection_follows_the_pid():
+    tree, rows = virtual_list(100)
+    tree.selected = (tree.children[4],)
+    rows._on_select(None)
+    assert rows.selected_pid == 4
+    rows.yview('scroll', '2', 'units')
+    assert tree.selected == (tree.children[2],)
+    rows.yview('scroll', '20', 'units')
+    assert tree.selected == ()
+
+
+def monitor(process_count):
+    state = types.SimpleNamespace(process_tree=FakeTree(), process_vsb=FakeScrollbar(),
+                                  virtual_list=False)
+    state.process_rows = TreeviewReconciler(state.process_tree)
+    TaskManagerStyleMonitor.use_virtual_list(state, process_count)
+    return state
+
+
+def test_switches_to_the_virtual_list_at_runtime():
+    state = monitor(10)
+    assert not state.virtual_list
+    state.process_rows.reconcile((proc.pid, (proc.name, str(proc.pid))) for proc in table(10))
+    state.process_tree.selected = (state.process_rows.items[7],)
+
+    TaskManagerStyleMonitor.use_virtual_list(state, VIRTUAL_LIST_THRESHOLD + 1)
+    assert state.virtual_list
+    assert isinstance(state.process_rows, VirtualProcessList)
+    assert state.process_tree.children == []
+    assert state.process_rows.selected_pid == 7
+
+
+def test_switches_back_below_the_hysteresis_band():
+    state = monitor(VIRTUAL_LIST_THRESHOLD + 1)
+    assert state.virtual_list
+    state.process_rows.update(table(100))
+
+    TaskManagerStyleMonitor.use_virtual_list(state, VIRTUAL_LIST_THRESHOLD - 1)
+    assert state.virtual_list
+    TaskManagerStyleMonitor.use_virtual_list(state, VIRTUAL_LIST_THRESHOLD // 2)
+    assert not state.virtual_list
+    assert isinstance(state.process_rows, TreeviewReconciler)
+    assert state.process_tree.children == []
+    assert state.process_tree.bindings == {}
+    assert state.process_tree.options['yscrollcommand'] == state.process_vsb.set
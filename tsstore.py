@@ -0,0 +1,425 @@
+"""Append-only on-disk history for the dashboard's metrics.
+
+Metric samples are stored as fixed-size little-endian records in a file
+that is written through ``mmap`` and grown in chunks. Records are in time
+order, so any timestamp can be found with a binary search over the file.
+Process snapshots are variable-sized, so they go to a separate data file
+as zlib-compressed JSON columns, with a fixed-record index
+(timestamp, offset, length) that is searched the same way.
+
+Only one writer may open a store at a time; it holds an exclusive lock
+on the directory's ``lock`` file. ``prune`` drops everything older than
+a timestamp, and StoreWriter uses it to keep the store within an age
+and a size limit.
+"""
+import json
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+
+from collector import MetricSample, ProcessSample, ProcessRow
+
+MAGIC = b'SMTS'
+VERSION = 1
+
+# magic, version, record size, record count
+HEADER = struct.Struct('<4sHHQ')
+
+# timestamp, cpu %, memory %, disk %, net up KB/s, net down KB/s
+METRIC_RECORD = struct.Struct('<dfffff')
+METRIC_DTYPE = np.dtype([
+    ('ts', '<f8'),
+    ('cpu', '<f4'),
+    ('memory', '<f4'),
+    ('disk', '<f4'),
+    ('net_up', '<f4'),
+    ('net_down', '<f4'),
+])
+
+# timestamp, offset into the data file, compressed length
+PROCESS_INDEX_RECORD = struct.Struct('<dQI')
+PROCESS_INDEX_DTYPE = np.dtype([
+    ('ts', '<f8'),
+    ('offset', '<u8'),
+    ('length', '<u4'),
+])
+
+
+class StoreLocked(OSError):
+    pass
+
+
+def lock_file(path):
+    """Open ``path`` and lock it exclusively without waiting."""
+    f = open(path, 'a+b')
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        raise StoreLocked(f"{path} is locked by another writer") from None
+    return f
+
+
+class RecordFile:
+    """Fixed-size records appended through a growing memory map.
+
+    The first field of every record must be a float timestamp and records
+    must be appended in time order; ``bisect`` relies on it.
+    """
+
+    def __init__(self, path, record, readonly=False, grow_by=1 << 20):
+        self.path = path
+        self.record = record
+        self.readonly = readonly
+        self.grow_by = grow_by
+        self._file = None
+        self._map = None
+        self.count = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) >= HEADER.size
+        if readonly and not exists:
+            raise FileNotFoundError(path)
+        self._file = open(path, 'rb' if readonly else ('r+b' if exists else 'w+b'))
+        if exists:
+            self._map_file()
+            magic, version, size, self.count = HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC or version != VERSION or size != record.size:
+                self.close()
+                raise ValueError(f"{path} is not a compatible history file")
+        else:
+            self._grow(HEADER.size + record.size * 1024)
+            self._write_header()
+
+    def __len__(self):
+        return self.count
+
+    def _map_file(self):
+        if self._map is not None:
+            self._map.close()
+        access = mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+        self._map = mmap.mmap(self._file.fileno(), 0, access=access)
+
+    def _grow(self, size):
+        if self._map is not None:
+            self._map.flush()
+        self._file.truncate(size)
+        self._map_file()
+
+    def _write_header(self):
+        HEADER.pack_into(self._map, 0, MAGIC, VERSION, self.record.size, self.count)
+
+    def _offset(self, index):
+        return HEADER.size + index * self.record.size
+
+    def append(self, *values):
+        end = self._offset(self.count + 1)
+        if end > len(self._map):
+            self._grow(max(end, len(self._map) + self.grow_by))
+        self.record.pack_into(self._map, self._offset(self.count), *values)
+        # Publish the record only after it is fully written.
+        self.count += 1
+        self._write_header()
+
+    def reload(self):
+        """Pick up records appended by another writer since opening."""
+        if os.path.getsize(self.path) != len(self._map):
+            self._map_file()
+        self.count = HEADER.unpack_from(self._map, 0)[3]
+
+    def read(self, index):
+        return self.record.unpack_from(self._map, self._offset(index))
+
+    def view(self, dtype):
+        """All records as a writable structured array over the map."""
+        return np.frombuffer(self._map, dtype=dtype, count=self.count,
+                             offset=HEADER.size)
+
+    def drop_before(self, index):
+        """Remove the first ``index`` records; the file keeps its size."""
+        index = min(index, self.count)
+        if index <= 0:
+            return
+        remaining = self.count - index
+        self._map.move(self._offset(0), self._offset(index), remaining * self.record.size)
+        self.count = remaining
+        self._write_header()
+
+    @property
+    def nbytes(self):
+        return HEADER.size + self.count * self.record.size
+
+    def timestamp(self, index):
+        return struct.unpack_from('<d', self._map, self._offset(index))[0]
+
+    def bisect(self, ts):
+        """Index of the first record with timestamp >= ``ts``."""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamp(mid) < ts:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def slice(self, start, stop, dtype):
+        start = max(start, 0)
+        stop = min(stop, self.count)
+        if stop <= start:
+            return np.empty(0, dtype=dtype)
+        return np.frombuffer(self._map, dtype=dtype, count=stop - start,
+                             offset=self._offset(start)).copy()
+
+    def flush(self):
+        if self._map is not None and not self.readonly:
+            self._map.flush()
+
+    def close(self):
+        if self._map is not None:
+            self.flush()
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class MetricStore:
+    """Metric series plus periodic process snapshots for one host."""
+
+    def __init__(self, directory, readonly=False):
+        self.directory = directory
+        self.readonly = readonly
+        self._lock = None
+        if not readonly:
+            os.makedirs(directory, exist_ok=True)
+            self._lock = lock_file(os.path.join(directory, 'lock'))
+        try:
+            self.metrics = RecordFile(os.path.join(directory, 'metrics.bin'),
+                                      METRIC_RECORD, readonly)
+            self.process_index = RecordFile(os.path.join(directory, 'processes.idx'),
+                                            PROCESS_INDEX_RECORD, readonly)
+        except (OSError, ValueError):
+            self._unlock()
+            raise
+        self._data_path = os.path.join(directory, 'processes.dat')
+        self._process_data = open(self._data_path, 'rb' if readonly else 'ab')
+
+    def _unlock(self):
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+
+    @property
+    def nbytes(self):
+        return (self.metrics.nbytes + self.process_index.nbytes
+                + os.path.getsize(self._data_path))
+
+    def prune(self, before):
+        """Drop metric records and process snapshots older than ``before``."""
+        self.metrics.drop_before(self.metrics.bisect(before))
+
+        index = self.process_index.bisect(before)
+        if not index:
+            return
+        if index < len(self.process_index):
+            base = self.process_index.read(index)[1]
+        else:
+            base = self._process_data.tell()
+        # Copy the snapshots that are kept to a new data file, then
+        # rebase the index offsets onto it.
+        self._process_data.close()
+        temporary = self._data_path + '.tmp'
+        with open(self._data_path, 'rb') as source, open(temporary, 'wb') as target:
+            source.seek(base)
+            while True:
+                chunk = source.read(1 << 20)
+                if not chunk:
+                    break
+                target.write(chunk)
+        os.replace(temporary, self._data_path)
+        self._process_data = open(self._data_path, 'ab')
+
+        self.process_index.drop_before(index)
+        self.process_index.view(PROCESS_INDEX_DTYPE)['offset'] -= base
+        self.process_index.flush()
+
+    def size_cutoff(self, max_bytes):
+        """Oldest timestamp to keep for the store to fit in ``max_bytes``."""
+        excess = self.nbytes - max_bytes
+        if excess <= 0:
+            return None
+        # Process snapshots are most of the store; metric records are
+        # dropped up to the same time.
+        records = self.process_index.view(PROCESS_INDEX_DTYPE)
+        index = int(np.searchsorted(records['offset'], excess))
+        if index < len(records):
+            return float(records['ts'][index])
+        metrics = len(self.metrics)
+        skip = min(metrics - 1, excess // METRIC_RECORD.size)
+        return self.metrics.timestamp(skip) if metrics else None
+
+    def append_metrics(self, sample):
+        self.metrics.append(sample.timestamp, sample.cpu_percent, sample.mem.percent,
+                            sample.disk.percent, sample.net_up, sample.net_down)
+
+    def append_processes(self, sample):
+        columns = zip(*sample.rows) if sample.rows else ([] for _ in ProcessRow._fields)
+        payload = json.dumps(dict(zip(ProcessRow._fields, map(list, columns))),
+                             separators=(',', ':'))
+        blob = zlib.compress(payload.encode(), 1)
+        offset = self._process_data.tell()
+        self._process_data.write(blob)
+        self._process_data.flush()
+        self.process_index.append(sample.timestamp, offset, len(blob))
+
+    def reload(self):
+        self.metrics.reload()
+        self.process_index.reload()
+
+    def time_range(self):
+        if not len(self.metrics):
+            return None
+        return self.metrics.timestamp(0), self.metrics.timestamp(len(self.metrics) - 1)
+
+    def metrics_between(self, start, end):
+        """Metric records with ``start <= ts < end`` as a structured array."""
+        return self.metrics.slice(self.metrics.bisect(start), self.metrics.bisect(end),
+                                  METRIC_DTYPE)
+
+    def _snapshot_index(self, ts):
+        index = self.process_index.bisect(ts)
+        if index < len(self.process_index) and self.process_index.timestamp(index) == ts:
+            index += 1
+        return index - 1 if index else None
+
+    def snapshot_time_at(self, ts):
+        """Timestamp of the last process snapshot at or before ``ts``."""
+        index = self._snapshot_index(ts)
+        return None if index is None else self.process_index.timestamp(index)
+
+    def processes_at(self, ts):
+        """The last process snapshot taken at or before ``ts``, or None."""
+        index = self._snapshot_index(ts)
+        if index is None:
+            return None
+        snapshot_ts, offset, length = self.process_index.read(index)
+        if self.readonly and (os.stat(self._data_path).st_ino
+                              != os.fstat(self._process_data.fileno()).st_ino):
+            # The writer pruned the store and replaced the data file.
+            self._process_data.close()
+            self._process_data = open(self._data_path, 'rb')
+        self._process_data.seek(offset)
+        columns = json.loads(zlib.decompress(self._process_data.read(length)))
+        rows = tuple(map(ProcessRow, *(columns[field] for field in ProcessRow._fields
+                                       if field in columns)))
+        return ProcessSample(snapshot_ts, rows)
+
+    def flush(self):
+        self.metrics.flush()
+        self.process_index.flush()
+
+    def close(self):
+        self.metrics.close()
+        self.process_index.close()
+        self._process_data.close()
+        self._unlock()
+
+
+class StoreWriter:
+    """Writes samples to a MetricStore on a background thread.
+
+    ``submit`` never blocks the caller: if the writer falls behind by more
+    than ``maxsize`` samples, new ones are dropped and counted in
+    ``dropped``. Process tables are only kept every ``snapshot_interval``
+    seconds. Every ``retention_interval`` seconds, data older than
+    ``max_age`` seconds is pruned, and then the oldest data until the
+    store fits in ``max_bytes``; either limit can be None.
+    """
+
+    def __init__(self, store, snapshot_interval=60.0, maxsize=4096,
+                 max_age=7 * 86400, max_bytes=512 * 1024 ** 2, retention_interval=600.0):
+        self.store = store
+        self.snapshot_interval = snapshot_interval
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.retention_interval = retention_interval
+        self.dropped = 0
+        self._last_snapshot = None
+        self._last_retention = None
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, name='history-writer',
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, sample):
+        if isinstance(sample, ProcessSample):
+            if (self._last_snapshot is not None
+                    and sample.timestamp - self._last_snapshot < self.snapshot_interval):
+                return
+            self._last_snapshot = sample.timestamp
+        try:
+            self._queue.put_nowait(sample)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            sample = self._queue.get()
+            if sample is None:
+                break
+            try:
+                if isinstance(sample, MetricSample):
+                    self.store.append_metrics(sample)
+                elif isinstance(sample, ProcessSample):
+                    self.store.append_processes(sample)
+            except (OSError, ValueError):
+                self.dropped += 1
+            now = time.monotonic()
+            if (self._last_retention is None
+                    or now - self._last_retention >= self.retention_interval):
+                self._last_retention = now
+                try:
+                    self.enforce_retention(sample.timestamp)
+                except (OSError, ValueError):
+                    pass
+        self.store.close()
+
+    def enforce_retention(self, now):
+        if self.max_age is not None:
+            self.store.prune(now - self.max_age)
+        if self.max_bytes is not None:
+            cutoff = self.store.size_cutoff(self.max_bytes)
+            if cutoff is not None:
+                self.store.prune(cutoff)
+
+    def close(self, timeout=2.0):
+        # Never block the caller: if the queue is full, drop the oldest
+        # pending sample to make room for the stop marker.
+        while True:
+            try:
+                self._queue.put_nowait(None)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+        self._thread.join(timeout)